@@ -0,0 +1,152 @@
+# Fake Ollama
+# Minimal stand-in for the Ollama HTTP API with canned responses and
+# injected latency, for benchmarking Atlas without a real model.
+#
+# Canned responses file (JSON):
+#   {
+#     "rules": [
+#       {"match": "what time", "response": "{\"tool\": \"get_time\", \"args\": {}}"},
+#       {"match": "returned:", "response": "It is {now}."}
+#     ],
+#     "default": "Understood.",
+#     "prefill_ms": 150,
+#     "tokens_per_second": 25,
+#     "models": ["qwen3:1.7b", "qwen3:0.6b"]
+#   }
+#
+# Rules are checked in order; "match" is a case-insensitive substring of the
+# last line of the prompt (the current user turn or tool result).
+
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_CANNED = {
+    "rules": [],
+    "default": "Understood.",
+    "prefill_ms": 0,
+    "tokens_per_second": 0,
+    "models": ["fake:latest"],
+}
+
+
+def load_canned(path=None):
+    """Load a canned responses file, or the defaults if path is None."""
+    canned = dict(DEFAULT_CANNED)
+    if path:
+        with open(path, 'r', encoding='utf-8') as f:
+            canned.update(json.load(f))
+    return canned
+
+
+def _estimate_tokens(text):
+    return max(1, len(text) // 4)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    canned = DEFAULT_CANNED
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json({"models": [{"name": name} for name in self.canned.get("models", [])]})
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def _pick_response(self, prompt):
+        lines = [line for line in prompt.strip().splitlines() if line.strip() and line.strip() != "Atlas:"]
+        last = lines[-1].lower() if lines else ""
+        for rule in self.canned.get("rules", []):
+            if rule.get("match", "").lower() in last:
+                return rule.get("response", "")
+        return self.canned.get("default", "")
+
+    def do_POST(self):
+        if self.path != "/api/generate":
+            self._send_json({"error": "not found"}, status=404)
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        prompt = request.get("prompt", "")
+        text = self._pick_response(prompt).replace("{now}", time.strftime("%H:%M"))
+        if request.get("format"):
+            # Structured output requested: plain answers come back as
+            # {"reply": ...}, after any <think> block (as raw qwen3 output)
+            reasoning, tag, answer = text.rpartition("</think>")
+            if not answer.lstrip().startswith("{"):
+                answer = json.dumps({"reply": answer.strip()})
+            text = reasoning + tag + ("\n\n" if tag else "") + answer
+
+        prefill = self.canned.get("prefill_ms", 0) / 1000
+        tps = self.canned.get("tokens_per_second", 0)
+        prompt_tokens = _estimate_tokens(prompt)
+        pieces = text.split(" ")
+        pieces = [p + (" " if i < len(pieces) - 1 else "") for i, p in enumerate(pieces)]
+        eval_tokens = len(pieces)
+        decode = eval_tokens / tps if tps else 0.0
+
+        stats = {
+            "model": request.get("model", ""),
+            "done": True,
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": int(prefill * 1e9),
+            "eval_count": eval_tokens,
+            "eval_duration": int(decode * 1e9),
+            "total_duration": int((prefill + decode) * 1e9),
+        }
+
+        time.sleep(prefill)
+
+        if not request.get("stream", True):
+            time.sleep(decode)
+            self._send_json(dict(stats, response=text))
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        try:
+            for piece in pieces:
+                if tps:
+                    time.sleep(1 / tps)
+                self.wfile.write((json.dumps({"response": piece, "done": False}) + "\n").encode('utf-8'))
+                self.wfile.flush()
+            self.wfile.write((json.dumps(dict(stats, response="")) + "\n").encode('utf-8'))
+        except (BrokenPipeError, ConnectionResetError):
+            # Client cancelled the stream
+            pass
+
+
+class FakeOllamaServer:
+    """Fake Ollama server on a background thread."""
+
+    def __init__(self, canned=None, host="127.0.0.1", port=0):
+        handler = type("CannedHandler", (_Handler,), {"canned": canned or DEFAULT_CANNED})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self.url
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -1,10 +1,36 @@
 # LLM Module - Ollama Integration
 # Handles communication with local Ollama model
 
+import re
+import json
+import time
 import requests
 import sys
 sys.path.insert(0, '..')
-from config import MODEL_NAME, OLLAMA_HOST
+from config import MODEL_NAME, OLLAMA_HOST, NUM_CTX
+from utils import metrics
+from brain.think_filter import ThinkFilter, strip_think
+from brain.tokens import estimate_tokens
+from brain.response_cache import response_cache
+from brain.llm_queue import llm_queue, PRIORITY_CONSOLE
+
+# Timing/count fields Ollama reports on the final response chunk
+STAT_KEYS = (
+    "total_duration", "load_duration",
+    "prompt_eval_count", "prompt_eval_duration",
+    "eval_count", "eval_duration",
+)
+
+LLM_REQUESTS = metrics.counter("atlas_llm_requests_total", "Ollama generate calls by outcome")
+LLM_SECONDS = metrics.histogram("atlas_llm_request_seconds", "Wall time of Ollama generate calls")
+LLM_FIRST_TOKEN_SECONDS = metrics.histogram("atlas_llm_first_token_seconds", "Time to the first streamed token")
+LLM_PREFILL_SECONDS = metrics.histogram("atlas_llm_prefill_seconds", "Prompt evaluation time reported by Ollama")
+LLM_TOKENS = metrics.counter("atlas_llm_tokens_total", "Prompt and generated tokens reported by Ollama")
+LLM_TOKENS_PER_SECOND = metrics.histogram("atlas_llm_tokens_per_second", "Decode speed reported by Ollama",
+                                          buckets=(1, 2, 5, 10, 15, 20, 30, 40, 60, 80, 120, 200))
+
+# Models whose Ollama rejected the "think" option; it is not sent to them again
+_no_think_models = set()
 
 
 def initialize_model():
@@ -30,39 +56,240 @@ def initialize_model():
         return False
 
 
-def generate_response(user_text, context):
+def generate_response(user_text, context, cancel_token=None, on_token=None, stats=None, format=None,
+                      model=None, think=None, cache=True, priority=PRIORITY_CONSOLE, session=None):
     """
     Send prompt to Ollama and return response.
     
     Args:
         user_text: Current user message
         context: Full context including system prompt and history
+        cancel_token: Optional CancellationToken; cancelling closes the stream
+        on_token: Optional callback receiving each streamed text chunk
+        stats: Optional dict filled with Ollama's timing/count fields
+        format: Optional JSON schema (or "json") constraining the output
+        model: Ollama model to use (default MODEL_NAME)
+        think: True/False to switch a reasoning model's thinking on or off
+            (None leaves the model default)
+        cache: False to bypass the response cache for this request
+        priority: Queue priority (brain.llm_queue PRIORITY_*)
+        session: Session id; a newer request from the same session drops
+            this one if it is still queued
         
     Returns:
-        Response string or error message
+        Response string or error message (partial text if cancelled, empty
+        if dropped from the queue), with any <think> reasoning removed;
+        stats["reasoning_tokens"] counts it and stats["queue_wait"] is the
+        time spent waiting for a backend slot
     """
+    start = time.perf_counter()
+    stats = {} if stats is None else stats
+    model = model or MODEL_NAME
+    
+    key = None
+    if cache and response_cache.enabled:
+        key = response_cache.key(model, context, {"num_ctx": NUM_CTX, "format": format, "think": think})
+        cached = response_cache.get(key)
+        if cached is not None:
+            stats["cache"] = "hit"
+            return _replay_cached(cached, cancel_token, on_token)
+    
+    with llm_queue.slot(priority, session, cancel_token) as ticket:
+        if ticket is None:
+            stats["queue"] = "dropped"
+            return ""
+        stats["queue_wait"] = round(ticket.wait, 4)
+        # Backend latency metrics start once the request is actually sent
+        start = time.perf_counter()
+        response = _request(context, cancel_token, on_token, stats, start, format, model, think)
+    _record_metrics(response, start, cancel_token, stats)
+    
+    # Only complete replies: not errors, cancelled or abandoned streams
+    if key and response and "eval_count" in stats and not response.startswith("[Error]") \
+            and not (cancel_token and cancel_token.cancelled):
+        response_cache.put(key, model, response)
+    return response
+
+
+def _replay_cached(text, cancel_token, on_token):
+    """Return a cached reply, streamed to on_token word by word like a live one."""
+    LLM_REQUESTS.inc(status="cached")
+    parts = []
+    for piece in re.findall(r"\S+\s*|\s+", text) if on_token else [text]:
+        if cancel_token and cancel_token.cancelled:
+            break
+        parts.append(piece)
+        if on_token:
+            on_token(piece)
+    return "".join(parts)
+
+
+def _request(context, cancel_token, on_token, stats, start, format=None, model=None, think=None):
+    """POST one generate request; see generate_response."""
+    stream = cancel_token is not None or on_token is not None
+    model = model or MODEL_NAME
     try:
         payload = {
-            "model": MODEL_NAME,
+            "model": model,
             "prompt": context,
-            "stream": False
+            "stream": stream,
+            # Fixed window: prompts are budgeted to fit, and a stable value
+            # avoids Ollama reloading the model with a different context size
+            "options": {"num_ctx": NUM_CTX}
         }
+        if format is not None:
+            payload["format"] = format
+        if think is not None and model not in _no_think_models:
+            payload["think"] = think
         
         response = requests.post(
             f"{OLLAMA_HOST}/api/generate",
             json=payload,
-            timeout=120
+            timeout=120,
+            stream=stream
         )
         
+        if response.status_code == 400 and "think" in payload:
+            # Older Ollama, or a model without a thinking mode: retry without it
+            response.close()
+            _no_think_models.add(model)
+            return _request(context, cancel_token, on_token, stats, start, format, model)
+        
         if response.status_code == 200:
+            if stream:
+                return _read_stream(response, cancel_token, on_token, stats, start)
             result = response.json()
-            return result.get("response", "No response received.")
+            _collect_stats(result, stats)
+            text, reasoning_tokens = strip_think(result.get("response", "No response received."))
+            stats["reasoning_tokens"] = reasoning_tokens + estimate_tokens(result.get("thinking") or "")
+            return text
         else:
             return f"[Error] Ollama returned status {response.status_code}"
             
     except requests.exceptions.Timeout:
         return "[Error] Request timed out. Model may be busy."
     except requests.exceptions.ConnectionError:
+        if cancel_token and cancel_token.cancelled:
+            return ""
         return "[Error] Lost connection to Ollama."
     except Exception as e:
         return f"[Error] {str(e)}"
+
+
+def list_models(timeout=5):
+    """Names of the models pulled in Ollama, or None if it can't be reached."""
+    try:
+        response = requests.get(f"{OLLAMA_HOST}/api/tags", timeout=timeout)
+        if response.status_code != 200:
+            return None
+        return [m.get("name", "") for m in response.json().get("models", [])]
+    except Exception:
+        return None
+
+
+def embed(texts, model, timeout=10):
+    """
+    Embed texts with an Ollama embedding model.
+    
+    Returns:
+        List of vectors (one per text), or None if the request failed
+    """
+    try:
+        response = requests.post(
+            f"{OLLAMA_HOST}/api/embed",
+            json={"model": model, "input": list(texts)},
+            timeout=timeout
+        )
+        if response.status_code != 200:
+            return None
+        return response.json().get("embeddings")
+    except Exception:
+        return None
+
+
+def _record_metrics(response, start, cancel_token, stats):
+    """Update LLM metrics for one finished request."""
+    if cancel_token and cancel_token.cancelled:
+        status = "cancelled"
+    elif response.startswith("[Error]"):
+        status = "error"
+    else:
+        status = "ok"
+    LLM_REQUESTS.inc(status=status)
+    LLM_SECONDS.observe(time.perf_counter() - start)
+    
+    if "prompt_eval_count" in stats:
+        LLM_TOKENS.inc(stats["prompt_eval_count"], kind="prompt")
+    if "prompt_eval_duration" in stats:
+        LLM_PREFILL_SECONDS.observe(stats["prompt_eval_duration"] / 1e9)
+    if stats.get("reasoning_tokens"):
+        LLM_TOKENS.inc(stats["reasoning_tokens"], kind="reasoning")
+    if "eval_count" in stats:
+        LLM_TOKENS.inc(stats["eval_count"], kind="eval")
+        if stats.get("eval_duration"):
+            LLM_TOKENS_PER_SECOND.observe(stats["eval_count"] / (stats["eval_duration"] / 1e9))
+
+
+def _collect_stats(chunk, stats):
+    """Copy Ollama's timing/count fields into stats."""
+    if stats is not None:
+        for key in STAT_KEYS:
+            if key in chunk:
+                stats[key] = chunk[key]
+
+
+def _read_stream(response, cancel_token, on_token, stats=None, start=None):
+    """
+    Collect a streamed Ollama response.
+    
+    Cancelling the token closes the connection, which unblocks the read here
+    and makes Ollama stop generating for the abandoned request. Reasoning
+    (<think> blocks or Ollama's "thinking" field) is filtered out here, so
+    on_token only sees the answer.
+    """
+    unregister = cancel_token.on_cancel(response.close) if cancel_token else None
+    think = ThinkFilter()
+    parts = []
+    
+    def emit(piece):
+        if not parts and start is not None:
+            LLM_FIRST_TOKEN_SECONDS.observe(time.perf_counter() - start)
+        parts.append(piece)
+        if on_token:
+            on_token(piece)
+    
+    try:
+        for line in response.iter_lines():
+            if cancel_token and cancel_token.cancelled:
+                break
+            if not line:
+                continue
+            
+            chunk = json.loads(line)
+            if "error" in chunk:
+                return f"[Error] {chunk['error']}"
+            think.add_reasoning(chunk.get("thinking"))
+            piece = think.feed(chunk.get("response", ""))
+            if piece:
+                emit(piece)
+            if chunk.get("done"):
+                _collect_stats(chunk, stats)
+                break
+        # Text held back as a possible partial tag, also when the stream
+        # ended without a "done" chunk
+        if not (cancel_token and cancel_token.cancelled):
+            piece = think.flush()
+            if piece:
+                emit(piece)
+    except Exception:
+        # Reads fail in various ways once the connection is closed under them
+        if not (cancel_token and cancel_token.cancelled):
+            raise
+    finally:
+        if unregister:
+            unregister()
+        response.close()
+        if stats is not None:
+            stats["reasoning_tokens"] = think.reasoning_tokens
+    
+    return "".join(parts)
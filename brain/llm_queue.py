@@ -0,0 +1,142 @@
+# LLM Request Queue
+# Admission control in front of the single local Ollama backend. Requests
+# wait for one of LLM_MAX_IN_FLIGHT slots, served by priority (voice before
+# console/API before background work such as history summaries), FIFO within
+# a priority. A newer request from the same session drops that session's
+# still-waiting ones, and a cancelled turn leaves the queue immediately.
+# Queue wait time is exported per priority.
+
+import time
+import heapq
+import itertools
+import threading
+from contextlib import contextmanager
+
+from config import LLM_MAX_IN_FLIGHT
+from utils import metrics, tracing
+
+PRIORITY_VOICE = 0
+PRIORITY_CONSOLE = 1
+PRIORITY_BACKGROUND = 2
+
+PRIORITY_NAMES = {PRIORITY_VOICE: "voice", PRIORITY_CONSOLE: "console", PRIORITY_BACKGROUND: "background"}
+
+QUEUE_WAIT_SECONDS = metrics.histogram("atlas_llm_queue_wait_seconds", "Time LLM requests wait for a slot",
+                                       buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0))
+QUEUE_DROPPED = metrics.counter("atlas_llm_queue_dropped_total", "LLM requests that left the queue unserved")
+QUEUE_DEPTH = metrics.gauge("atlas_llm_queue_depth", "LLM requests waiting and running")
+
+
+class _Ticket:
+    """One request's place in the queue."""
+
+    __slots__ = ("priority", "session", "state", "enqueued", "wait")
+
+    def __init__(self, priority, session):
+        self.priority = priority
+        self.session = session
+        self.state = "waiting"
+        self.enqueued = time.perf_counter()
+        self.wait = 0.0
+
+
+class LLMQueue:
+    """Priority queue with a fixed number of in-flight requests."""
+
+    def __init__(self, max_in_flight=LLM_MAX_IN_FLIGHT):
+        self.max_in_flight = max(1, max_in_flight)
+        self._heap = []
+        self._seq = itertools.count()
+        self._running = 0
+        self._cond = threading.Condition()
+
+        QUEUE_DEPTH.set_function(self.waiting, state="waiting")
+        QUEUE_DEPTH.set_function(lambda: self._running, state="running")
+
+    def waiting(self):
+        with self._cond:
+            return sum(1 for _, _, ticket in self._heap if ticket.state == "waiting")
+
+    def acquire(self, priority=PRIORITY_CONSOLE, session=None, cancel_token=None):
+        """
+        Block until a slot is free and this is the most urgent request.
+
+        Args:
+            priority: PRIORITY_VOICE, PRIORITY_CONSOLE or PRIORITY_BACKGROUND
+            session: Session id; a newer request from it drops this one
+            cancel_token: Optional CancellationToken; cancelling leaves the queue
+
+        Returns:
+            Ticket to pass to release(), or None if the request was
+            superseded or cancelled while waiting
+        """
+        ticket = _Ticket(priority, session)
+        unregister = cancel_token.on_cancel(self._wake) if cancel_token else None
+        try:
+            with self._cond:
+                if session is not None:
+                    for _, _, other in self._heap:
+                        if other.session == session and other.state == "waiting":
+                            other.state = "superseded"
+                    self._cond.notify_all()
+                heapq.heappush(self._heap, (priority, next(self._seq), ticket))
+
+                while True:
+                    if cancel_token and cancel_token.cancelled and ticket.state == "waiting":
+                        ticket.state = "cancelled"
+                    if ticket.state != "waiting":
+                        self._remove(ticket)
+                        QUEUE_DROPPED.inc(reason=ticket.state, priority=PRIORITY_NAMES.get(priority, priority))
+                        return None
+                    self._prune()
+                    if self._running < self.max_in_flight and self._heap[0][2] is ticket:
+                        heapq.heappop(self._heap)
+                        self._running += 1
+                        ticket.state = "running"
+                        break
+                    self._cond.wait()
+        finally:
+            if unregister:
+                unregister()
+
+        ticket.wait = time.perf_counter() - ticket.enqueued
+        QUEUE_WAIT_SECONDS.observe(ticket.wait, priority=PRIORITY_NAMES.get(priority, priority))
+        tracing.record("llm.queue", ticket.enqueued, ticket.enqueued + ticket.wait,
+                       priority=PRIORITY_NAMES.get(priority, priority))
+        return ticket
+
+    def release(self, ticket):
+        """Free the slot held by ticket."""
+        with self._cond:
+            if ticket.state == "running":
+                ticket.state = "done"
+                self._running -= 1
+                self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, priority=PRIORITY_CONSOLE, session=None, cancel_token=None):
+        """Context manager around acquire/release; yields the ticket or None."""
+        ticket = self.acquire(priority, session, cancel_token)
+        try:
+            yield ticket
+        finally:
+            if ticket:
+                self.release(ticket)
+
+    def _prune(self):
+        """Drop superseded/cancelled tickets from the top of the heap (lock held)."""
+        while self._heap and self._heap[0][2].state != "waiting":
+            heapq.heappop(self._heap)
+
+    def _remove(self, ticket):
+        """Take a ticket out of the heap wherever it is (lock held)."""
+        self._heap = [entry for entry in self._heap if entry[2] is not ticket]
+        heapq.heapify(self._heap)
+
+    def _wake(self):
+        with self._cond:
+            self._cond.notify_all()
+
+
+# Singleton instance
+llm_queue = LLMQueue()
@@ -0,0 +1,138 @@
+# Model Router
+# Two-model cascade. Each input is classified without a model call:
+#   tool    - a command the tool selector matched well (small model)
+#   chat    - short small talk and acknowledgements (small model)
+#   complex - coding, open-ended or long requests (MODEL_NAME)
+# MODEL_ROUTES maps routes to Ollama models. When the small model answers a
+# "tool" input with text instead of a tool call, the turn is escalated to
+# the complex model. Per-route latency and hit/miss counts are exported as
+# metrics.
+
+import re
+import time
+import threading
+
+from config import (MODEL_NAME, MODEL_ROUTING_ENABLED, MODEL_ROUTES, ROUTE_TOOL_MIN_SCORE,
+                    ROUTE_COMPLEX_MIN_WORDS)
+from utils import metrics
+from utils.logger import get_logger
+
+log = get_logger("router")
+
+ROUTE_TOOL = "tool"
+ROUTE_CHAT = "chat"
+ROUTE_COMPLEX = "complex"
+
+# Ollama's model list is re-read after this many seconds, so a model pulled
+# (or an Ollama started) while Atlas runs is picked up
+MODEL_LIST_TTL = 60
+
+# Model list placeholder while Ollama can't be reached: every model is assumed pulled
+_UNKNOWN = object()
+
+ROUTES = metrics.counter("atlas_route_total", "Turns by model route")
+ROUTE_OUTCOMES = metrics.counter("atlas_route_outcomes_total",
+                                 "Routing accuracy: hit when the route matched what the model did")
+ROUTE_SECONDS = metrics.histogram("atlas_route_llm_seconds", "LLM call latency by route and model")
+
+# Coding and open-ended requests that deserve the larger model
+_COMPLEX = re.compile(
+    r"\b(code|coding|function|class|script|program|bug|debug|refactor|implement|rewrite|"
+    r"algorithm|regex|sql|python|javascript|typescript|java|rust|html|css|compile|exception|"
+    r"explain|why|compare|difference|summari[sz]e|describe|analy[sz]e|essay|story|poem|"
+    r"plan|design|pros and cons|step by step)\b",
+    re.IGNORECASE,
+)
+_QUESTION = re.compile(r"^\s*(what|who|whom|whose|when|where|which|how|is|are|can|could|should|would|do|does)\b",
+                       re.IGNORECASE)
+
+
+def _normalize(name):
+    """Model name as Ollama resolves it: "qwen3" and "qwen3:latest" are the same model."""
+    return name[:-len(":latest")] if name.endswith(":latest") else name
+
+
+class ModelRouter:
+    """Chooses the route and model for each turn."""
+
+    def __init__(self, routes=MODEL_ROUTES, default=MODEL_NAME):
+        self.routes = dict(routes)
+        self.default = default
+        self._available = None      # normalized names pulled in Ollama, or _UNKNOWN
+        self._checked = 0.0
+        self._warned = set()
+        self._lock = threading.Lock()
+
+    def classify(self, text, tool_scores=None):
+        """
+        Route for an input.
+
+        Args:
+            text: User input
+            tool_scores: Tool selector scores for text (tool -> 0..1)
+
+        Returns:
+            ROUTE_TOOL, ROUTE_CHAT or ROUTE_COMPLEX
+        """
+        words = len(text.split())
+        best_tool = max(tool_scores.values(), default=0.0) if tool_scores else 0.0
+
+        if words >= ROUTE_COMPLEX_MIN_WORDS or "```" in text:
+            route = ROUTE_COMPLEX
+        elif _COMPLEX.search(text) and not (words <= 3 and best_tool >= ROUTE_TOOL_MIN_SCORE):
+            # "start coding" is a command; "write a python script ..." is not
+            route = ROUTE_COMPLEX
+        elif best_tool >= ROUTE_TOOL_MIN_SCORE:
+            route = ROUTE_TOOL
+        elif _QUESTION.match(text) and words >= 4:
+            route = ROUTE_COMPLEX
+        else:
+            route = ROUTE_CHAT
+
+        ROUTES.inc(route=route)
+        return route
+
+    def model_for(self, route):
+        """Ollama model for a route (MODEL_NAME if routing is off or it isn't pulled)."""
+        model = self.routes.get(route) or self.default
+        if not MODEL_ROUTING_ENABLED or model == self.default:
+            return self.default
+        if not self._is_available(model):
+            if model not in self._warned:
+                self._warned.add(model)
+                log.warning(f"[Router] Model '{model}' not found in Ollama; using '{self.default}' "
+                            f"for {route} (run: ollama pull {model})")
+            return self.default
+        return model
+
+    def should_escalate(self, route):
+        """Whether a text answer on this route is retried with the complex model."""
+        return route == ROUTE_TOOL and self.model_for(ROUTE_TOOL) != self.model_for(ROUTE_COMPLEX)
+
+    def _is_available(self, model):
+        if self._available is None or time.monotonic() - self._checked > MODEL_LIST_TTL:
+            with self._lock:
+                if self._available is None or time.monotonic() - self._checked > MODEL_LIST_TTL:
+                    from brain.llm import list_models
+
+                    names = list_models()
+                    self._available = _UNKNOWN if names is None else {_normalize(n) for n in names}
+                    self._checked = time.monotonic()
+        return self._available is _UNKNOWN or _normalize(model) in self._available
+
+    def record_call(self, route, model, seconds):
+        """Latency of one LLM call made for a route."""
+        ROUTE_SECONDS.observe(seconds, route=route, model=model)
+
+    def record_outcome(self, route, called_tool):
+        """
+        Routing accuracy for one turn: tool routes should end in a tool call,
+        chat and complex routes in a text answer.
+        """
+        hit = called_tool == (route == ROUTE_TOOL)
+        ROUTE_OUTCOMES.inc(route=route, outcome="hit" if hit else "miss")
+        return hit
+
+
+# Singleton instance
+model_router = ModelRouter()
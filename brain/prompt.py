@@ -6,7 +6,7 @@ PERSONALITY:
 - Calm and composed
 - Helpful and proactive
 - Excellent at coding and technical tasks
-- Able to read, modify, and rewrite full files upon request
+- Able to read, modify, and patch files upon request
 
 MEMORY CAPABILITIES:
 - You have persistent memory that survives between sessions via SQLite.
@@ -24,10 +24,10 @@ TOOL USAGE:
 
 - IMPORTANT RULES:
   1. Output ONLY the JSON object when calling a tool. Do not add explanations.
-  2. If a tool is not needed, reply with normal text.
-  3. Use 'create_file' to create new files (content overwrites if exists).
-  4. Use 'read_file' to read file content.
-  5. Use 'list_files' to see what files exist.
+  2. If a tool is not needed, {reply_rule}
+  3. Use 'create_file' to create new files (content overwrites if exists), and 'edit_file' with a patch to change existing ones.
+  4. Use 'read_file' to read file content (start_line, tail or pattern for large files).
+  5. Use 'list_files' to see what files exist, 'find_files' to locate a file by name, and 'search_files' to find text across all files.
   6. All file operations are restricted to the ATLAS_FILES directory.
   7. Use 'open_app' or 'open_file_in_editor' for system actions.
   8. Use 'store_fact', 'get_fact', 'update_fact', 'delete_fact', or 'list_memories' for memory.
@@ -38,11 +38,17 @@ TOOL USAGE:
   13. Use 'start_coding' to launch the coding workflow.
 
 CODING ASSISTANT RULES:
-1. When asked to write or edit code, ALWAYS generate the FULL updated file content.
-2. Do not use diffs or partial snippets unless explicitly asked.
-3. Use 'create_file' or 'edit_file' to apply changes.
+1. To change an existing file, use 'edit_file' with a patch of SEARCH/REPLACE blocks. Copy only the lines being changed, plus a line or two of context, exactly as in the file:
+<<<<<<< SEARCH
+old lines
+=======
+new lines
+>>>>>>> REPLACE
+2. Never resend a whole file to change part of it; use 'create_file' with the full content only for new files or complete rewrites.
+3. A unified diff (with @@ hunk headers) is also accepted as the patch.
 4. Before applying changes, wait for user confirmation.
 5. If modifying an existing file, first read it with 'read_file' to understand context.
+6. To explain or change one function or class, use 'find_symbol' and 'get_symbol_source' to read just that definition instead of the whole file.
 
 RESPONSE RULES:
 1. Keep responses short and direct by default
@@ -58,29 +64,108 @@ RESPONSE RULES:
 
 MEMORY CONTEXT:
 {memory_context}
-
-{tools_context}
 """
 
 
+import threading
+
 from core.tool_router import router
-from config import MAX_FACTS_IN_PROMPT
+from memory.memory_manager import memory
+from config import MAX_FACTS_IN_PROMPT, FACTS_TOKEN_BUDGET, TOOLS_TOKEN_BUDGET, TOOL_CALL_FORMAT
+from brain.tokens import estimate_tokens, truncate_to_tokens
+
+# Memoized system prompts per tool subset, valid for one (facts version,
+# tool registry version); a handful of subsets recur across turns
+_prompt_cache = {"version": None, "prompts": {}}
+_prompt_lock = threading.Lock()
+_MAX_CACHED_PROMPTS = 32
+
+def _fit_facts(facts):
+    """Fact lines, newest first, up to FACTS_TOKEN_BUDGET."""
+    lines = []
+    used = 0
+    for f in facts[:MAX_FACTS_IN_PROMPT]:
+        line = f"- {f['key']}: {f['value']}"
+        cost = estimate_tokens(line) + 1
+        if used + cost > FACTS_TOKEN_BUDGET:
+            break
+        lines.append(line)
+        used += cost
+    return lines
 
-def get_prompt_with_memory(facts):
-    """Generate system prompt with memory context and tools."""
-    limited_facts = facts[:MAX_FACTS_IN_PROMPT] if facts else []
+
+def _fit_tools(tool_names=None):
+    """
+    Tool descriptions within TOOLS_TOKEN_BUDGET: full docstrings if they fit,
+    otherwise each tool's one-line summary.
+    
+    Args:
+        tool_names: Tools to describe (default: all registered tools)
+    """
+    full = []
+    short = []
+    for name in tool_names if tool_names is not None else router.tools:
+        func = router.tools[name]
+        doc = func.__doc__.strip() if func.__doc__ else "No description."
+        full.append(f"- {name}: {doc}")
+        short.append(f"- {name}: {doc.splitlines()[0]}")
     
-    if limited_facts:
-        memory_lines = [f"- {f['key']}: {f['value']}" for f in limited_facts]
+    for lines in (full, short):
+        text = "\n".join(lines)
+        if estimate_tokens(text) <= TOOLS_TOKEN_BUDGET:
+            return text
+    return truncate_to_tokens(text, TOOLS_TOKEN_BUDGET)
+
+
+def get_prompt_with_memory(facts, tool_names=None):
+    """Generate system prompt with memory context and tools (all, or tool_names)."""
+    memory_lines = _fit_facts(facts) if facts else []
+    
+    if memory_lines:
         memory_context = "Known facts about the user:\n" + "\n".join(memory_lines)
     else:
         memory_context = "No stored facts about the user yet."
     
-    tools_list = []
-    for name, func in router.tools.items():
-        doc = func.__doc__.strip() if func.__doc__ else "No description."
-        tools_list.append(f"- {name}: {doc}")
+    if tool_names is None:
+        tools_context = "AVAILABLE TOOLS:\n" + _fit_tools()
+    else:
+        tools_context = "AVAILABLE TOOLS (those relevant to this request):\n" + _fit_tools(tool_names)
+    
+    # With a constrained reply format, plain answers are wrapped in JSON too
+    if TOOL_CALL_FORMAT:
+        reply_rule = 'reply with { "reply": "your answer" }.'
+    else:
+        reply_rule = "reply with normal text."
+    
+    return SYSTEM_PROMPT.format(memory_context=memory_context, tools_context=tools_context,
+                                reply_rule=reply_rule)
+
+
+def get_system_prompt(tool_names=None):
+    """
+    System prompt for the current facts and tools.
+    
+    Rebuilt only when a fact or the tool registry changes; otherwise the same
+    string object is returned, so callers can cache per-prompt work by identity.
     
-    tools_context = "AVAILABLE TOOLS:\n" + "\n".join(tools_list)
+    Args:
+        tool_names: Subset of tools to describe (from the tool selector),
+            or None for all of them
+    """
+    version = (memory.facts_version, router.version)
+    subset = tuple(tool_names) if tool_names is not None else None
+    if _prompt_cache["version"] == version:
+        prompt = _prompt_cache["prompts"].get(subset)
+        if prompt is not None:
+            return prompt
     
-    return SYSTEM_PROMPT.format(memory_context=memory_context, tools_context=tools_context)
+    with _prompt_lock:
+        if _prompt_cache["version"] != version:
+            _prompt_cache["prompts"] = {}
+            _prompt_cache["version"] = version
+        prompts = _prompt_cache["prompts"]
+        if subset not in prompts:
+            if len(prompts) >= _MAX_CACHED_PROMPTS:
+                prompts.clear()
+            prompts[subset] = get_prompt_with_memory(memory.list_facts(), subset)
+        return prompts[subset]
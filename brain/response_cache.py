@@ -0,0 +1,142 @@
+# Response Cache
+# Disk cache of LLM replies for exactly repeated requests ("what can you do",
+# the same tool result to summarize). Keyed on a hash of the model, request
+# options and the fully assembled prompt, scoped to the current facts and
+# tool registry, so a reply is never served after either changes. Stored in
+# SQLite next to memory.db, with a TTL and least-recently-used eviction.
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import inspect
+import threading
+
+from config import RESPONSE_CACHE_ENABLED, RESPONSE_CACHE_TTL, RESPONSE_CACHE_MAX_ENTRIES
+from utils import metrics
+
+CACHE_PATH = os.path.join(os.path.dirname(__file__), '..', 'response_cache.db')
+
+CACHE_LOOKUPS = metrics.counter("atlas_response_cache_total", "Response cache lookups by result")
+
+
+class ResponseCache:
+    """SQLite-backed LRU + TTL cache of generate results."""
+
+    def __init__(self, path=CACHE_PATH, ttl=RESPONSE_CACHE_TTL, max_entries=RESPONSE_CACHE_MAX_ENTRIES,
+                 enabled=RESPONSE_CACHE_ENABLED):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._ready = False
+        self._scope = (None, None)
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        if not self._ready:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)')
+            conn.commit()
+            self._ready = True
+        return conn
+
+    def _scope_hash(self):
+        """
+        Fingerprint of the stored facts and registered tools.
+
+        Recomputed only when memory.facts_version or router.version changes;
+        hashing content (not the in-process counters) keeps it valid across
+        restarts.
+        """
+        from memory.memory_manager import memory
+        from core.tool_router import router
+
+        version = (memory.facts_version, router.version)
+        if self._scope[0] != version:
+            with self._lock:
+                if self._scope[0] != version:
+                    tools = [(name, str(inspect.signature(func)), func.__doc__ or "")
+                             for name, func in sorted(router.tools.items())]
+                    content = json.dumps([memory.list_facts(), tools], sort_keys=True, default=str)
+                    self._scope = (version, hashlib.sha256(content.encode('utf-8')).hexdigest())
+        return self._scope[1]
+
+    def key(self, model, prompt, options):
+        """Cache key for one request (model, options such as format/think, prompt)."""
+        material = json.dumps({
+            "model": model,
+            "options": options,
+            "scope": self._scope_hash(),
+            "prompt": prompt,
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Cached reply for key, or None if absent or expired."""
+        now = time.time()
+        try:
+            conn = self._connect()
+            try:
+                row = conn.execute('SELECT response, created FROM responses WHERE key = ?', (key,)).fetchone()
+                if row and now - row[1] > self.ttl:
+                    conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+                    conn.commit()
+                    row = None
+                if row:
+                    conn.execute('UPDATE responses SET last_used = ? WHERE key = ?', (now, key))
+                    conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            row = None
+        CACHE_LOOKUPS.inc(result="hit" if row else "miss")
+        return row[0] if row else None
+
+    def put(self, key, model, response):
+        """Store a reply, evicting the least recently used past max_entries."""
+        now = time.time()
+        try:
+            conn = self._connect()
+            try:
+                conn.execute('''
+                    INSERT OR REPLACE INTO responses (key, model, response, created, last_used)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (key, model, response, now, now))
+                conn.execute('DELETE FROM responses WHERE created < ?', (now - self.ttl,))
+                conn.execute('''
+                    DELETE FROM responses WHERE key IN (
+                        SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                    )
+                ''', (self.max_entries,))
+                conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            pass
+
+    def clear(self):
+        """Drop every cached reply."""
+        try:
+            conn = self._connect()
+            try:
+                conn.execute('DELETE FROM responses')
+                conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            pass
+
+
+# Singleton instance
+response_cache = ResponseCache()
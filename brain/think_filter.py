@@ -0,0 +1,99 @@
+# Think Filter
+# Removes <think>...</think> reasoning blocks (qwen3 and similar models) from
+# streamed text, so reasoning is never printed, spoken or stored in history.
+# Tags may be split across stream chunks; the removed text is kept so each
+# turn can report how many reasoning tokens it spent.
+
+from brain.tokens import estimate_tokens
+
+OPEN_TAG = "<think>"
+CLOSE_TAG = "</think>"
+
+
+def _partial_tag(text, tag):
+    """Length of the longest suffix of text that is a prefix of tag."""
+    for n in range(min(len(tag) - 1, len(text)), 0, -1):
+        if text.endswith(tag[:n]):
+            return n
+    return 0
+
+
+class ThinkFilter:
+    """Streaming filter: feed() raw chunks, get back the visible text."""
+
+    def __init__(self):
+        self._inside = False
+        self._pending = ""
+        self._after_block = False
+        self._reasoning = []
+
+    def feed(self, chunk):
+        """Visible part of chunk (may hold back a partial tag until the next one)."""
+        text = self._pending + (chunk or "")
+        self._pending = ""
+        out = []
+
+        while text:
+            if self._inside:
+                index = text.find(CLOSE_TAG)
+                if index < 0:
+                    keep = _partial_tag(text, CLOSE_TAG)
+                    self._reasoning.append(text[:len(text) - keep])
+                    self._pending = text[len(text) - keep:]
+                    break
+                self._reasoning.append(text[:index])
+                text = text[index + len(CLOSE_TAG):]
+                self._inside = False
+                self._after_block = True
+            else:
+                if self._after_block:
+                    # Drop the blank lines models put after </think>
+                    text = text.lstrip()
+                    if not text:
+                        break
+                    self._after_block = False
+                index = text.find(OPEN_TAG)
+                if index < 0:
+                    keep = _partial_tag(text, OPEN_TAG)
+                    out.append(text[:len(text) - keep])
+                    self._pending = text[len(text) - keep:]
+                    break
+                out.append(text[:index])
+                text = text[index + len(OPEN_TAG):]
+                self._inside = True
+
+        return "".join(out)
+
+    def flush(self):
+        """Visible text still held back at the end of the stream."""
+        text, self._pending = self._pending, ""
+        if self._inside:
+            # Unclosed block (cut off): all reasoning
+            self._reasoning.append(text)
+            return ""
+        return text
+
+    def add_reasoning(self, text):
+        """Count reasoning delivered separately (Ollama's "thinking" field)."""
+        if text:
+            self._reasoning.append(text)
+
+    @property
+    def reasoning(self):
+        return "".join(self._reasoning)
+
+    @property
+    def reasoning_tokens(self):
+        return estimate_tokens(self.reasoning.strip())
+
+
+def strip_think(text):
+    """
+    Remove reasoning blocks from a complete reply.
+
+    Returns:
+        (visible_text, reasoning_tokens)
+    """
+    think = ThinkFilter()
+    visible = think.feed(text) + think.flush()
+    return visible, think.reasoning_tokens
@@ -0,0 +1,60 @@
+# Token Estimation
+# Fast local token estimate for budgeting prompts, without loading a
+# tokenizer. Tuned to slightly over-count BPE tokens (Qwen/Llama style) for
+# English and code, so prompts assembled to a budget stay under num_ctx.
+
+import re
+
+# Words, numbers, and single punctuation/symbol characters
+_PIECES = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+TRUNCATION_MARKER = " …[truncated]"
+
+
+def estimate_tokens(text):
+    """
+    Estimate the token count of text.
+
+    Short words are ~1 token, long words ~1 per 4 letters, digits ~1 per 3,
+    and each symbol or non-ASCII character about one token.
+    """
+    if not text:
+        return 0
+    tokens = 0
+    for piece in _PIECES.findall(text):
+        n = len(piece)
+        if piece[0].isdigit():
+            tokens += (n + 2) // 3
+        elif n <= 6:
+            tokens += 1
+        else:
+            tokens += (n + 3) // 4
+    # Newlines are tokens of their own
+    return tokens + text.count("\n")
+
+
+def truncate_to_tokens(text, budget, marker=TRUNCATION_MARKER):
+    """
+    Cut text so it fits in budget tokens, marking the cut.
+
+    Returns:
+        text unchanged if it fits, otherwise a prefix plus marker
+    """
+    if budget <= 0:
+        return ""
+    if estimate_tokens(text) <= budget:
+        return text
+
+    # No token covers more than ~7 characters, so longer prefixes can't fit
+    text = text[:budget * 8]
+
+    # Binary search on length; estimate_tokens is monotonic enough for this
+    limit = budget - estimate_tokens(marker)
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if estimate_tokens(text[:mid]) <= limit:
+            lo = mid
+        else:
+            hi = mid - 1
+    return text[:lo].rstrip() + marker
@@ -0,0 +1,234 @@
+# Tool Call Format
+# Structured replies: with TOOL_CALL_FORMAT on, every reply is constrained
+# (Ollama's "format" JSON schema) to either a tool call
+#   {"tool": "<name>", "args": {...}}
+# or plain text wrapped as
+#   {"reply": "<text>"}
+# The schema is built from the tool registry, so tool names and argument
+# names are always valid JSON the router can execute. ToolCallStream reads
+# the stream as it arrives: it knows from the first key whether this is a
+# tool call, and forwards only the decoded reply text to listeners.
+
+import re
+import json
+import inspect
+import threading
+
+from config import TOOL_CALL_FORMAT
+from core.tool_router import router
+
+# "name (type): ..." argument lines in tool docstrings
+_DOC_ARG = re.compile(r"^\s*(\w+)\s*\((\w+)")
+_JSON_TYPES = {"str": "string", "int": "integer", "float": "number", "bool": "boolean",
+               "list": "array", "dict": "object"}
+
+_schema_cache = {"version": None, "schema": None}
+_schema_lock = threading.Lock()
+
+
+def _args_schema(func):
+    """JSON schema for one tool's keyword arguments."""
+    doc_types = {}
+    for line in (func.__doc__ or "").splitlines():
+        match = _DOC_ARG.match(line)
+        if match and match.group(2) in _JSON_TYPES:
+            doc_types[match.group(1)] = _JSON_TYPES[match.group(2)]
+
+    properties = {}
+    required = []
+    for name, param in inspect.signature(func).parameters.items():
+        if param.kind is param.VAR_KEYWORD:
+            # Free-form tool (e.g. start_coding(**kwargs))
+            return {"type": "object"}
+        if param.kind is param.VAR_POSITIONAL:
+            continue
+        default = param.default
+        if name in doc_types:
+            kind = doc_types[name]
+        elif isinstance(default, bool):
+            kind = "boolean"
+        elif isinstance(default, int):
+            kind = "integer"
+        else:
+            kind = "string"
+        properties[name] = {"type": kind}
+        if default is param.empty:
+            required.append(name)
+
+    schema = {"type": "object", "properties": properties}
+    if required:
+        schema["required"] = required
+    return schema
+
+
+def reply_schema():
+    """
+    JSON schema for a reply: a call to any registered tool, or {"reply": text}.
+
+    Rebuilt only when the tool registry changes.
+    """
+    if _schema_cache["version"] == router.version:
+        return _schema_cache["schema"]
+
+    with _schema_lock:
+        if _schema_cache["version"] != router.version:
+            branches = [{
+                "type": "object",
+                "properties": {"tool": {"const": name}, "args": _args_schema(func)},
+                "required": ["tool", "args"],
+            } for name, func in router.tools.items()]
+            branches.append({
+                "type": "object",
+                "properties": {"reply": {"type": "string"}},
+                "required": ["reply"],
+            })
+            _schema_cache["schema"] = {"anyOf": branches}
+            _schema_cache["version"] = router.version
+        return _schema_cache["schema"]
+
+
+def request_format():
+    """The "format" value for generate requests that may call tools, or None."""
+    return reply_schema() if TOOL_CALL_FORMAT else None
+
+
+class ToolCallStream:
+    """
+    Incremental reader for a streamed reply.
+
+    kind becomes "tool" or "reply" as soon as the first key has streamed
+    (or "text" for an unstructured reply); only reply text is passed to
+    on_text, decoded from its JSON string form.
+    """
+
+    def __init__(self, on_text=None):
+        self.on_text = on_text
+        self.kind = None
+        self._state = "start"
+        self._buffer = ""
+        self._escape = ""
+        self._high = ""
+
+    def feed(self, chunk):
+        """Consume one streamed piece of the raw reply."""
+        if not chunk or self._state == "done":
+            return
+        if self._state == "text":
+            self._emit(chunk)
+            return
+        self._buffer += chunk
+
+        if self._state == "start":
+            stripped = self._buffer.lstrip()
+            if not stripped:
+                return
+            if not stripped.startswith("{"):
+                # Model ignored the format (or it is off): pass text through
+                self.kind = "text"
+                self._state = "text"
+                self._emit(stripped)
+                return
+            self._state = "key"
+
+        if self._state == "key":
+            match = re.match(r'\s*\{\s*"((?:[^"\\]|\\.)*)"\s*:\s*', self._buffer)
+            if not match:
+                return
+            if match.group(1) != "reply":
+                self.kind = "tool"
+                self._state = "done"
+                return
+            self.kind = "reply"
+            rest = self._buffer[match.end():]
+            if not rest:
+                return
+            if not rest.startswith('"'):
+                self._state = "done"
+                return
+            self._state = "string"
+            self._buffer = rest[1:]
+
+        if self._state == "string":
+            text, self._buffer = self._buffer, ""
+            self._decode(text)
+
+    def _decode(self, text):
+        """Emit string content up to the closing quote, resolving escapes."""
+        out = []
+        for char in text:
+            if self._escape:
+                self._escape += char
+                if self._escape[1] != "u" or len(self._escape) == 6:
+                    out.append(self._resolve_escape())
+                continue
+            if char == "\\":
+                self._escape = char
+                continue
+            if self._high:
+                # Lone high surrogate; emit it as is
+                out.append(self._high)
+                self._high = ""
+            if char == '"':
+                self._state = "done"
+                break
+            else:
+                out.append(char)
+        if out:
+            self._emit("".join(out))
+
+    def _resolve_escape(self):
+        esc, self._escape = self._escape, ""
+        try:
+            value = json.loads(f'"{esc}"')
+        except ValueError:
+            return ""
+        if "\ud800" <= value <= "\udbff":
+            # First half of a surrogate pair (e.g. an emoji): wait for the second
+            pending, self._high = self._high, value
+            return pending
+        if self._high and "\udc00" <= value <= "\udfff":
+            pair, self._high = self._high + value, ""
+            return pair.encode("utf-16", "surrogatepass").decode("utf-16")
+        pending, self._high = self._high, ""
+        return pending + value
+
+    def _emit(self, text):
+        if self.on_text and text:
+            self.on_text(text)
+
+
+def parse_reply(text):
+    """
+    Split a complete raw reply into a tool call and the text to show.
+
+    Handles structured replies ({"tool": ...} / {"reply": ...}) and, for an
+    unconstrained model, a bare or ```json-fenced tool call.
+
+    Returns:
+        (tool_call, text): tool_call is {"tool": name, "args": dict} or None;
+        text is the reply text (the raw reply for tool calls)
+    """
+    stripped = text.strip()
+    body = stripped
+    if body.startswith("```"):
+        body = re.sub(r"^```(?:json)?\s*|\s*```$", "", body)
+    if not body.startswith("{"):
+        return None, text
+
+    try:
+        data = json.loads(body)
+    except json.JSONDecodeError:
+        # Tolerate trailing chatter after the object
+        try:
+            data, _ = json.JSONDecoder().raw_decode(body)
+        except json.JSONDecodeError:
+            return None, text
+    if not isinstance(data, dict):
+        return None, text
+
+    if data.get("tool"):
+        args = data.get("args")
+        return {"tool": data["tool"], "args": args if isinstance(args, dict) else {}}, stripped
+    if isinstance(data.get("reply"), str):
+        return None, data["reply"]
+    return None, text
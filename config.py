@@ -5,3 +5,110 @@ OLLAMA_HOST = "http://localhost:11434"
 
 CONVERSATION_TIMEOUT = 10
 MAX_FACTS_IN_PROMPT = 10
+
+# Text-to-speech backend: "pyttsx3" (system voices) or "piper" (needs piper-tts)
+TTS_BACKEND = "pyttsx3"
+TTS_RATE = 180
+PIPER_MODEL_PATH = "models/piper/en_US-ryan-medium.onnx"
+
+# Local API server (python main.py --serve)
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8765
+SERVER_LLM_WORKERS = 2
+SERVER_MAX_PENDING = 16
+# Bearer token clients must send; None generates one on first run and keeps
+# it in server_token (readable only by you)
+SERVER_TOKEN = None
+
+# Concurrent requests sent to Ollama (match OLLAMA_NUM_PARALLEL); the rest
+# wait in a priority queue: voice, then console/API, then background work
+LLM_MAX_IN_FLIGHT = 1
+
+# Per-turn latency traces (logs/trace.jsonl); summarize with python -m utils.tracing
+TRACE_ENABLED = True
+TRACE_MAX_BYTES = 5 * 1024 * 1024
+TRACE_BACKUPS = 3
+
+# Metrics in Prometheus text format, written to logs/metrics.prom; set
+# METRICS_PORT (e.g. 9464) to also serve http://127.0.0.1:<port>/metrics
+METRICS_ENABLED = True
+METRICS_EXPORT_INTERVAL = 15
+METRICS_PORT = None
+
+# Log level for console and logs/atlas.log ("DEBUG", "INFO", "WARNING", "ERROR").
+# DEBUG records reach the console only while Logger.DEBUG is on (it is off
+# in manual and replay modes); they always go to the log file
+LOG_LEVEL = "INFO"
+
+# Context window (tokens). Prompts are assembled to fit NUM_CTX minus a reserve
+# for the reply; NUM_CTX is also sent to Ollama as options.num_ctx
+NUM_CTX = 4096
+RESPONSE_RESERVE_TOKENS = 512
+FACTS_TOKEN_BUDGET = 300
+TOOLS_TOKEN_BUDGET = 1500
+HISTORY_TOKEN_BUDGET = 1200
+SUMMARY_TOKEN_BUDGET = 200
+HISTORY_MESSAGE_MAX_TOKENS = 400
+
+# Tool selection: describe only the tools relevant to each input in the prompt.
+# TOOLS_CORE are always offered; TOOL_EMBED_MODEL (e.g. "nomic-embed-text",
+# pulled in Ollama) adds embedding similarity to keyword matching
+TOOL_SELECTION_ENABLED = True
+TOOLS_TOP_N = 5
+TOOLS_MIN_SCORE = 0.2
+TOOLS_CORE = ["get_time", "get_fact", "list_memories"]
+TOOL_EMBED_MODEL = None
+
+# Constrain replies to JSON (a tool call or {"reply": ...}) with Ollama's
+# "format" schema, built from the tool registry
+TOOL_CALL_FORMAT = True
+
+# Model routing (cascade): a small, fast model handles tool dispatch and quick
+# chat; MODEL_NAME answers open-ended and coding requests. A route whose model
+# isn't pulled in Ollama falls back to MODEL_NAME
+MODEL_ROUTING_ENABLED = True
+ROUTER_MODEL = "qwen3:0.6b"
+MODEL_ROUTES = {
+    "tool": ROUTER_MODEL,
+    "chat": ROUTER_MODEL,
+    "complex": MODEL_NAME,
+}
+# Tool-selector score above which an input is treated as a command
+ROUTE_TOOL_MIN_SCORE = 0.5
+# Inputs at least this long go to the complex route
+ROUTE_COMPLEX_MIN_WORDS = 30
+
+# Thinking mode per route for reasoning models (qwen3): False skips the hidden
+# <think> pass (seconds per turn on CPU), True enables it, None leaves the
+# model default. Reasoning is never shown, spoken or kept in history
+THINK_ROUTES = {
+    "tool": False,
+    "chat": False,
+    "complex": False,   # set True for better coding answers at extra latency
+}
+
+# Cache of LLM replies for exactly repeated prompts (response_cache.db),
+# scoped to the current facts and tools; TTL in seconds. Only turns on
+# RESPONSE_CACHE_ROUTES use it: tool dispatch is deterministic, while chat
+# and complex answers should not be replayed (add "chat"/"complex" to opt in)
+RESPONSE_CACHE_ENABLED = True
+RESPONSE_CACHE_ROUTES = ["tool"]
+RESPONSE_CACHE_TTL = 24 * 3600
+RESPONSE_CACHE_MAX_ENTRIES = 500
+
+# edit_file patches: minimum similarity (0..1) for a hunk whose context
+# doesn't match the file exactly (even ignoring whitespace) to still apply
+PATCH_FUZZ_THRESHOLD = 0.8
+
+# read_file output caps: bytes returned per call (the rest is paged with
+# start_line / tail) and lines listed in pattern mode
+READ_FILE_MAX_BYTES = 8000
+READ_FILE_MAX_MATCHES = 50
+
+# Index of ATLAS_FILES (file_index.db) behind find_files / search_files:
+# rescanned by mtime every FILE_INDEX_INTERVAL seconds and before each query.
+# Content of files larger than FILE_INDEX_MAX_FILE_BYTES isn't indexed
+FILE_INDEX_ENABLED = True
+FILE_INDEX_INTERVAL = 60
+FILE_INDEX_MAX_FILE_BYTES = 1_000_000
+FILE_SEARCH_MAX_RESULTS = 20
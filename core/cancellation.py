@@ -0,0 +1,85 @@
+# Cancellation
+# Per-turn token shared by the LLM request, tool execution and TTS so a
+# barge-in can abandon the whole turn at once.
+
+import time
+import threading
+
+
+class TurnCancelled(Exception):
+    """Raised when work is abandoned because its turn was cancelled."""
+    pass
+
+
+class CancellationToken:
+    """Thread-safe, one-shot cancellation signal with callbacks."""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+        self.reason = None
+        self.cancelled_at = None
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self, reason=None):
+        """Cancel the turn and run registered callbacks. Returns False if already cancelled."""
+        with self._lock:
+            if self._event.is_set():
+                return False
+            self.reason = reason
+            self.cancelled_at = time.perf_counter()
+            self._event.set()
+            callbacks = list(self._callbacks)
+            self._callbacks.clear()
+
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+        return True
+
+    def on_cancel(self, callback):
+        """
+        Register a callback to run on cancellation (immediately if already cancelled).
+
+        Returns:
+            Function that unregisters the callback
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+
+                def unregister():
+                    with self._lock:
+                        if callback in self._callbacks:
+                            self._callbacks.remove(callback)
+                return unregister
+
+        callback()
+        return lambda: None
+
+    def child(self):
+        """
+        New token cancelled together with this one, but cancellable on its own
+        (e.g. to abandon one LLM request without ending the turn).
+
+        Returns:
+            (token, unregister): call unregister once the child is done
+        """
+        token = CancellationToken()
+        unregister = self.on_cancel(lambda: token.cancel(self.reason))
+        return token, unregister
+
+    def raise_if_cancelled(self):
+        """Raise TurnCancelled if the turn has been cancelled."""
+        if self._event.is_set():
+            raise TurnCancelled(self.reason)
+
+    def wait(self, timeout=None):
+        """Block until cancelled or timeout. Returns True if cancelled."""
+        return self._event.wait(timeout)
@@ -0,0 +1,183 @@
+# Code Index
+# Extracts functions, classes and imports with their line spans from source
+# files, for the find_symbol and get_symbol_source tools. Python is parsed
+# with ast; other languages use line-based regexes, with brace matching (or
+# the next symbol) for the end line. Symbols are stored by the file index
+# (core/file_index.py), so they are refreshed whenever a file changes.
+
+import os
+import re
+import ast
+
+PYTHON_EXTENSIONS = {".py", ".pyw"}
+REGEX_EXTENSIONS = {".js", ".jsx", ".mjs", ".ts", ".tsx", ".java", ".kt", ".cs", ".c", ".h", ".cc", ".cpp",
+                    ".hpp", ".go", ".rs", ".php", ".swift", ".rb", ".scala", ".dart"}
+
+# (kind, pattern); group 1 is the name
+_PATTERNS = [
+    ("class", re.compile(r"^\s*(?:export\s+)?(?:default\s+)?(?:public\s+|private\s+|protected\s+|internal\s+)?"
+                         r"(?:abstract\s+|final\s+|static\s+|sealed\s+|data\s+|open\s+)*"
+                         r"(?:class|interface|struct|enum|trait|protocol|record)\s+(\w+)")),
+    ("class", re.compile(r"^\s*(?:pub(?:\([\w:]+\))?\s+)?(?:struct|enum|trait|impl(?:<[^>]*>)?)\s+(\w+)")),
+    ("class", re.compile(r"^\s*type\s+(\w+)\s+(?:struct|interface)\b")),
+    ("function", re.compile(r"^\s*(?:export\s+)?(?:default\s+)?(?:async\s+)?function\s*\*?\s*(\w+)\s*[(<]")),
+    ("function", re.compile(r"^\s*(?:export\s+)?(?:const|let|var)\s+(\w+)\s*(?::[^=]+)?=\s*"
+                            r"(?:async\s+)?(?:function\b|\([^)]*\)\s*(?::[^=]+)?=>|\w+\s*=>)")),
+    ("function", re.compile(r"^\s*(?:pub(?:\([\w:]+\))?\s+)?(?:const\s+)?(?:async\s+)?(?:unsafe\s+)?fn\s+(\w+)")),
+    ("function", re.compile(r"^\s*func\s+(?:\([^)]*\)\s*)?(\w+)\s*[(\[]")),
+    ("function", re.compile(r"^\s*(?:public\s+|private\s+|protected\s+|static\s+)*function\s+(\w+)")),
+    ("function", re.compile(r"^\s*(?:(?:public|private|protected|internal|static|final|abstract|virtual|override|"
+                            r"async|inline|extern|unsafe|synchronized)\s+)*"
+                            r"[\w:<>\[\],.*&?]+\s+[*&]*(\w+)\s*\([^;]*$")),
+    # JS/TS class members: "  async render(props): string {"
+    ("function", re.compile(r"^\s+(?:(?:public|private|protected|static|async|readonly|get|set|override)\s+)*"
+                            r"(\w+)\s*\([^;]*\)\s*(?::\s*[^{;=]+)?\{\s*$")),
+    ("function", re.compile(r"^\s*def\s+(?:self\.)?(\w+[?!]?)")),
+    ("import", re.compile(r"^\s*import\b.*\bfrom\s*[\"']([^\"']+)")),
+    ("import", re.compile(r"^\s*(?:import|from|#include|using|require|use)\b\s*[<\"']?([\w./:\-]+)")),
+]
+
+# Words the generic "type name(" pattern mistakes for definitions
+_NOT_NAMES = {"if", "for", "while", "switch", "catch", "return", "sizeof", "else", "new", "delete", "throw",
+              "case", "do", "await", "typeof", "using", "lock", "foreach", "elif", "when"}
+
+
+class Symbol:
+    """One definition or import in a file."""
+
+    __slots__ = ("name", "kind", "start", "end", "signature")
+
+    def __init__(self, name, kind, start, end, signature):
+        self.name = name            # qualified for members, e.g. "Parser.parse"
+        self.kind = kind            # "class", "function", "method" or "import"
+        self.start = start          # 1-based, inclusive
+        self.end = end
+        self.signature = signature
+
+
+def is_code(path):
+    """Whether symbols can be extracted from this file type."""
+    extension = os.path.splitext(path)[1].lower()
+    return extension in PYTHON_EXTENSIONS or extension in REGEX_EXTENSIONS
+
+
+def extract_symbols(path, text):
+    """
+    Symbols defined or imported in a source file.
+
+    Args:
+        path: File name (the extension selects the parser)
+        text: File content
+
+    Returns:
+        List of Symbol, in file order (empty for unsupported types)
+    """
+    extension = os.path.splitext(path)[1].lower()
+    lines = text.splitlines()
+    if extension in PYTHON_EXTENSIONS:
+        try:
+            return _python_symbols(ast.parse(text), lines)
+        except (SyntaxError, ValueError):
+            # Half-edited file: the regexes still find most definitions
+            pass
+    if extension in PYTHON_EXTENSIONS or extension in REGEX_EXTENSIONS:
+        return _regex_symbols(lines)
+    return []
+
+
+def _python_symbols(tree, lines):
+    symbols = []
+
+    def signature(node):
+        return lines[node.lineno - 1].strip()[:200] if node.lineno <= len(lines) else ""
+
+    def visit(body, prefix, in_class):
+        for node in body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                start = min([node.lineno] + [d.lineno for d in node.decorator_list])
+                name = prefix + node.name
+                if isinstance(node, ast.ClassDef):
+                    kind = "class"
+                else:
+                    kind = "method" if in_class else "function"
+                symbols.append(Symbol(name, kind, start, node.end_lineno, signature(node)))
+                visit(node.body, name + ".", isinstance(node, ast.ClassDef))
+            elif isinstance(node, (ast.Import, ast.ImportFrom)) and not prefix:
+                if isinstance(node, ast.ImportFrom):
+                    module = "." * node.level + (node.module or "")
+                    names = [f"{module}.{alias.name}" if module else alias.name for alias in node.names]
+                else:
+                    names = [alias.name for alias in node.names]
+                for name in names:
+                    symbols.append(Symbol(name, "import", node.lineno, node.end_lineno, signature(node)))
+            elif isinstance(node, (ast.If, ast.Try, ast.With)) and not prefix:
+                # Definitions guarded by "if TYPE_CHECKING:", "try: import ..." etc.
+                for block in (node.body, getattr(node, "orelse", []), getattr(node, "finalbody", [])):
+                    visit(block, prefix, in_class)
+                for handler in getattr(node, "handlers", []):
+                    visit(handler.body, prefix, in_class)
+
+    visit(tree.body, "", False)
+    return symbols
+
+
+def _regex_symbols(lines):
+    found = []
+    for number, line in enumerate(lines, 1):
+        stripped = line.strip()
+        if not stripped or stripped.startswith(("//", "/*", "*", "#!")):
+            continue
+        for kind, pattern in _PATTERNS:
+            match = pattern.match(line)
+            if match and match.group(1) not in _NOT_NAMES:
+                found.append((number, kind, match.group(1), len(line) - len(line.lstrip())))
+                break
+
+    symbols = []
+    for i, (number, kind, name, indent) in enumerate(found):
+        if kind == "import":
+            end = number
+        else:
+            end = _brace_end(lines, number)
+            if end is None:
+                # No braces (Ruby, Python fallback): up to the next symbol at the same or lower indent
+                end = len(lines)
+                for later, _, _, later_indent in found[i + 1:]:
+                    if later_indent <= indent:
+                        end = later - 1
+                        break
+                while end > number and not lines[end - 1].strip():
+                    end -= 1
+        symbols.append(Symbol(name, kind, number, end, lines[number - 1].strip()[:200]))
+
+    # Members: definitions nested inside a class span get "Class." prefixes
+    classes = [s for s in symbols if s.kind == "class"]
+    for symbol in symbols:
+        if symbol.kind == "function":
+            owner = [c for c in classes if c.start < symbol.start and symbol.end <= c.end]
+            if owner:
+                symbol.name = f"{owner[-1].name}.{symbol.name}"
+                symbol.kind = "method"
+    return symbols
+
+
+def _brace_end(lines, start, lookahead=3):
+    """Line closing the block opened at (or just after) start, or None without braces."""
+    depth = 0
+    opened = False
+    for number in range(start, len(lines) + 1):
+        # Drop string literals and line comments so their braces don't count
+        code = re.sub(r"\"(?:\\.|[^\"\\])*\"|'(?:\\.|[^'\\])*'|//.*", "", lines[number - 1])
+        if not opened and ';' in code and '{' not in code:
+            return start     # declaration only (prototype, abstract method)
+        for char in code:
+            if char == '{':
+                depth += 1
+                opened = True
+            elif char == '}':
+                depth -= 1
+        if opened and depth <= 0:
+            return number
+        if not opened and number - start >= lookahead:
+            return None
+    return len(lines) if opened else None
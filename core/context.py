@@ -1,49 +1,239 @@
 # Context Manager
-# Handles conversation history and prompt building
+# Handles conversation history and prompt building.
+#
+# History is kept within a token budget: recent exchanges verbatim (long
+# messages truncated), older ones folded into a running summary that is
+# computed on a background thread, so building a prompt never waits on it.
 
-from config import MAX_HISTORY
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from config import (MAX_HISTORY, NUM_CTX, RESPONSE_RESERVE_TOKENS, HISTORY_TOKEN_BUDGET,
+                    SUMMARY_TOKEN_BUDGET, HISTORY_MESSAGE_MAX_TOKENS)
+from brain.tokens import estimate_tokens, truncate_to_tokens
+
+SUMMARY_PROMPT = """Update the running summary of a conversation between a user and the assistant Atlas.
+Keep names, file paths, decisions, preferences and open tasks; drop greetings and filler.
+Reply with the summary only, at most {words} words.
+
+Current summary:
+{summary}
+
+New messages:
+{messages}
+
+Updated summary:"""
+
+# One background worker for all sessions; summaries are never on the critical path
+_summary_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="atlas-summary")
+
+
+def summarize_exchanges(summary, messages):
+    """
+    Fold messages into the running summary with the LLM.
+
+    Returns:
+        New summary text, or None if the model call failed
+    """
+    from brain.llm import generate_response
+    from brain.llm_queue import PRIORITY_BACKGROUND
+
+    lines = [f"{'User' if m['role'] == 'user' else 'Atlas'}: {m['content']}" for m in messages]
+    prompt = SUMMARY_PROMPT.format(
+        words=int(SUMMARY_TOKEN_BUDGET * 0.7),
+        summary=summary or "(none)",
+        messages="\n".join(lines),
+    )
+    result = generate_response("", prompt, think=False, priority=PRIORITY_BACKGROUND).strip()
+    if not result or result.startswith("[Error]"):
+        return None
+    return result
+
+
+def _extractive_summary(summary, messages):
+    """Cheap fallback when the model is unavailable: keep what the user asked."""
+    asked = [truncate_to_tokens(m["content"], 25, "…") for m in messages if m["role"] == "user"]
+    parts = ([summary] if summary else []) + [f"User asked: {text}" for text in asked]
+    return " ".join(parts)
 
 
 class ContextManager:
     """Manages conversation history and context building."""
-    
-    def __init__(self):
+
+    def __init__(self, summarizer=summarize_exchanges):
         self.history = []
-    
+        self.summary = ""
+        self.summarizer = summarizer
+
+        # Messages evicted from history, waiting to be summarized
+        self._pending = []
+        self._summarizing = False
+        # Bumped by clear() so an in-flight summary of old history is discarded
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+        # Incremental prompt pieces: each message is rendered and counted once,
+        # the joined history is cached until it changes, and the system prefix
+        # is cached per (memoized) system prompt object
+        self._history_tokens = 0
+        self._history_text = None
+        self._summary_line = ""
+        self._summary_tokens = 0
+        self._system = (None, 0, "")
+
+        # Token accounting for the last build_context() call
+        self.last_build = {}
+
+    def _message(self, role, content):
+        content = truncate_to_tokens(content or "", HISTORY_MESSAGE_MAX_TOKENS)
+        line = f"{'User' if role == 'user' else 'Atlas'}: {content}"
+        return {"role": role, "content": content, "line": line, "tokens": estimate_tokens(line) + 1}
+
     def add_exchange(self, user_msg, assistant_msg):
         """Add a user-assistant exchange to history."""
-        self.history.append({"role": "user", "content": user_msg})
-        self.history.append({"role": "assistant", "content": assistant_msg})
-        
-        # Trim history if too long (keep last MAX_HISTORY exchanges)
-        max_messages = MAX_HISTORY * 2
-        if len(self.history) > max_messages:
-            self.history = self.history[-max_messages:]
-    
+        messages = [self._message("user", user_msg), self._message("assistant", assistant_msg)]
+        with self._lock:
+            self.history.extend(messages)
+            self._history_tokens += sum(m["tokens"] for m in messages)
+
+            # Evict the oldest exchanges past MAX_HISTORY or the token budget,
+            # always keeping the latest exchange
+            evicted = []
+            while len(self.history) > 2 and (
+                len(self.history) > MAX_HISTORY * 2
+                or self._history_tokens > HISTORY_TOKEN_BUDGET
+            ):
+                evicted.extend(self.history[:2])
+                self._history_tokens -= sum(m["tokens"] for m in self.history[:2])
+                self.history = self.history[2:]
+
+            self._history_text = None
+
+            if evicted:
+                self._pending.extend(evicted)
+                self._schedule_summary()
+
+    # ==================== SUMMARY ====================
+
+    def _schedule_summary(self):
+        """Start the background summarizer if it isn't already running (lock held)."""
+        if self._summarizing or not self._pending:
+            return
+        self._summarizing = True
+        _summary_executor.submit(self._summarize)
+
+    def _summarize(self):
+        """Background: fold pending messages into the summary until none are left."""
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._summarizing = False
+                    return
+                batch, self._pending = self._pending, []
+                previous, epoch = self.summary, self._epoch
+
+            try:
+                summary = self.summarizer(previous, batch)
+            except Exception:
+                summary = None
+            if not summary:
+                summary = _extractive_summary(previous, batch)
+
+            summary = truncate_to_tokens(summary, SUMMARY_TOKEN_BUDGET)
+            summary_line = f"Earlier in this conversation (summary): {summary}"
+            with self._lock:
+                if epoch == self._epoch:
+                    self.summary = summary
+                    self._summary_line = summary_line
+                    self._summary_tokens = estimate_tokens(summary_line) + 1
+
+    # ==================== PROMPT ====================
+
     def build_context(self, system_prompt, current_input):
         """
         Build full context for LLM.
-        
+
+        Sections are added in priority order: system prompt, current input,
+        summary, then history newest-first until the NUM_CTX budget
+        (less RESPONSE_RESERVE_TOKENS for the reply) is used up.
+
         Args:
             system_prompt: System instructions
             current_input: Current user message
-            
+
         Returns:
             Formatted context string
         """
-        context_parts = [f"System: {system_prompt}\n"]
-        
-        # Add history
-        for msg in self.history:
-            role = "User" if msg["role"] == "user" else "Atlas"
-            context_parts.append(f"{role}: {msg['content']}")
-        
+        budget = NUM_CTX - RESPONSE_RESERVE_TOKENS
+        system_prompt, system_tokens, system_prefix = self._system_prefix(system_prompt)
+
+        # The current input may use whatever the system prompt leaves
+        current_input = truncate_to_tokens(current_input, max(64, budget - system_tokens - 8))
+        input_tokens = estimate_tokens(current_input) + 4
+        remaining = budget - system_tokens - input_tokens
+
+        with self._lock:
+            summary_line, summary_tokens = self._summary_line, self._summary_tokens
+            if summary_tokens > remaining:
+                summary_line, summary_tokens = "", 0
+            remaining -= summary_tokens
+
+            total = len(self.history)
+            if self._history_tokens <= remaining:
+                # Common case: all history fits, reuse the joined text
+                if self._history_text is None:
+                    self._history_text = "\n".join(m["line"] for m in self.history)
+                history_text = self._history_text
+                included = total
+                remaining -= self._history_tokens
+            else:
+                lines = []
+                for msg in reversed(self.history):
+                    if msg["tokens"] > remaining:
+                        break
+                    lines.append(msg["line"])
+                    remaining -= msg["tokens"]
+                lines.reverse()
+                history_text = "\n".join(lines)
+                included = len(lines)
+
+        context_parts = [system_prefix]
+        if summary_line:
+            context_parts.append(summary_line)
+        if history_text:
+            context_parts.append(history_text)
+
         # Add current input
         context_parts.append(f"User: {current_input}")
         context_parts.append("Atlas:")
-        
+
+        self.last_build = {
+            "estimated_tokens": budget - remaining,
+            "system_tokens": system_tokens,
+            "summary_tokens": summary_tokens,
+            "history_messages": included,
+            "history_dropped": total - included,
+        }
         return "\n".join(context_parts)
-    
+
+    def _system_prefix(self, system_prompt):
+        """(prompt, tokens, rendered prefix), recomputed only for a new prompt object."""
+        if self._system[0] is not system_prompt:
+            self._system = (system_prompt, estimate_tokens(system_prompt) + 2, f"System: {system_prompt}\n")
+        return self._system
+
+    def remaining_tokens(self, context):
+        """Tokens still free under NUM_CTX (less the reply reserve) after context."""
+        return NUM_CTX - RESPONSE_RESERVE_TOKENS - estimate_tokens(context)
+
     def clear(self):
         """Clear conversation history."""
-        self.history = []
+        with self._lock:
+            self.history = []
+            self.summary = ""
+            self._pending = []
+            self._epoch += 1
+            self._history_tokens = 0
+            self._history_text = None
+            self._summary_line = ""
+            self._summary_tokens = 0
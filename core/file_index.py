@@ -0,0 +1,386 @@
+# File Index
+# Persistent index of ATLAS_FILES_DIR (file_index.db next to memory.db) behind
+# the find_files and search_files tools: path, size and mtime per file, plus a
+# full-text (SQLite FTS5 inverted) index of text content. Kept current by
+# mtime scanning, so only new or changed files are re-read: once at startup,
+# every FILE_INDEX_INTERVAL seconds on a daemon thread, and before each query.
+# Without FTS5 in the local SQLite build, content search falls back to
+# scanning the indexed files. Source files also get a symbol table
+# (core/code_index.py) for the find_symbol and get_symbol_source tools.
+
+import os
+import re
+import time
+import fnmatch
+import sqlite3
+import difflib
+import threading
+
+from config import (FILE_INDEX_ENABLED, FILE_INDEX_INTERVAL, FILE_INDEX_MAX_FILE_BYTES, FILE_SEARCH_MAX_RESULTS,
+                    READ_FILE_MAX_BYTES)
+from core import code_index
+from tools import file_tools
+from utils import metrics
+from utils.logger import get_logger
+
+log = get_logger("file_index")
+
+INDEX_PATH = os.path.join(os.path.dirname(__file__), '..', 'file_index.db')
+
+# Bump when the tables change; older indexes are rebuilt from scratch
+SCHEMA_VERSION = 2
+
+SCAN_SECONDS = metrics.histogram("atlas_file_index_scan_seconds", "Incremental file index scan time")
+FILES_REINDEXED = metrics.counter("atlas_file_index_updates_total", "Files added, changed or removed in the index")
+
+# Lines shown per file in search results
+LINES_PER_FILE = 5
+
+_WORD = re.compile(r"\w+")
+
+
+def _is_text(head):
+    return b'\0' not in head
+
+
+class FileIndex:
+    """Incrementally updated path and content index of the ATLAS_FILES sandbox."""
+
+    def __init__(self, path=INDEX_PATH, interval=FILE_INDEX_INTERVAL, enabled=FILE_INDEX_ENABLED):
+        self.path = path
+        self.interval = interval
+        self.enabled = enabled
+        self.fts = None             # FTS5 available; set on first connect
+        self.running = False
+        self.thread = None
+        self.last_scan = 0.0
+        self._scan_lock = threading.Lock()
+
+    @property
+    def root(self):
+        return file_tools.ATLAS_FILES_DIR
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        if self.fts is None:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS files (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime REAL NOT NULL,
+                    text INTEGER NOT NULL
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS symbols (
+                    path TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    start_line INTEGER NOT NULL,
+                    end_line INTEGER NOT NULL,
+                    signature TEXT NOT NULL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS symbols_path ON symbols (path)')
+            try:
+                conn.execute('CREATE VIRTUAL TABLE IF NOT EXISTS contents USING fts5(path UNINDEXED, body)')
+                self.fts = True
+            except sqlite3.OperationalError:
+                self.fts = False
+            if conn.execute('PRAGMA user_version').fetchone()[0] < SCHEMA_VERSION:
+                # Forget everything so every file is re-read into the new tables
+                conn.execute('DELETE FROM files')
+                conn.execute('DELETE FROM symbols')
+                if self.fts:
+                    conn.execute('DELETE FROM contents')
+                conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+            conn.commit()
+        return conn
+
+    def start(self):
+        """Build/refresh the index now and keep it current in the background."""
+        if not self.enabled or self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._loop, daemon=True, name="atlas-file-index")
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+
+    def _loop(self):
+        while self.running:
+            try:
+                self.scan()
+            except Exception as e:
+                log.warning(f"[FileIndex] Scan failed: {e}")
+            time.sleep(self.interval)
+
+    def _walk(self):
+        """Yield (relative_path, size, mtime) for every file under root."""
+        stack = [self.root]
+        while stack:
+            directory = stack.pop()
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                # Skip hidden files/dirs and edit_file's temporary files
+                if entry.name.startswith('.'):
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        stat = entry.stat()
+                        rel = os.path.relpath(entry.path, self.root).replace(os.sep, '/')
+                        yield rel, stat.st_size, stat.st_mtime
+                except OSError:
+                    continue
+
+    def scan(self):
+        """
+        Bring the index up to date with the files on disk.
+
+        Only files whose size or mtime changed are re-read.
+
+        Returns:
+            Number of files added, changed or removed
+        """
+        if not os.path.isdir(self.root):
+            return 0
+        with self._scan_lock:
+            start = time.perf_counter()
+            conn = self._connect()
+            try:
+                known = {path: (size, mtime) for path, size, mtime in
+                         conn.execute('SELECT path, size, mtime FROM files')}
+                changed = 0
+                for rel, size, mtime in self._walk():
+                    if known.pop(rel, None) == (size, mtime):
+                        continue
+                    self._index_file(conn, rel, size, mtime)
+                    changed += 1
+                for rel in known:
+                    conn.execute('DELETE FROM files WHERE path = ?', (rel,))
+                    conn.execute('DELETE FROM symbols WHERE path = ?', (rel,))
+                    if self.fts:
+                        conn.execute('DELETE FROM contents WHERE path = ?', (rel,))
+                    changed += 1
+                conn.commit()
+            finally:
+                conn.close()
+            self.last_scan = time.time()
+            SCAN_SECONDS.observe(time.perf_counter() - start)
+            if changed:
+                FILES_REINDEXED.inc(changed)
+                log.debug(f"File index: {changed} file(s) updated", changed=changed)
+            return changed
+
+    def _index_file(self, conn, rel, size, mtime):
+        body = None
+        if size <= FILE_INDEX_MAX_FILE_BYTES:
+            try:
+                with open(os.path.join(self.root, rel), 'rb') as f:
+                    raw = f.read()
+                if _is_text(raw[:8192]):
+                    body = raw.decode('utf-8', errors='replace')
+            except OSError:
+                pass
+        conn.execute('INSERT OR REPLACE INTO files (path, size, mtime, text) VALUES (?, ?, ?, ?)',
+                     (rel, size, mtime, body is not None))
+        if self.fts:
+            conn.execute('DELETE FROM contents WHERE path = ?', (rel,))
+            if body is not None:
+                conn.execute('INSERT INTO contents (path, body) VALUES (?, ?)', (rel, body))
+        conn.execute('DELETE FROM symbols WHERE path = ?', (rel,))
+        if body is not None and code_index.is_code(rel):
+            conn.executemany('''
+                INSERT INTO symbols (path, name, kind, start_line, end_line, signature)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', [(rel, s.name, s.kind, s.start, s.end, s.signature)
+                  for s in code_index.extract_symbols(rel, body)])
+
+    def find(self, name, limit=FILE_SEARCH_MAX_RESULTS):
+        """
+        Files whose path matches name (glob like "*.py", or part of a name).
+
+        Returns:
+            List of (path, size, mtime), best match first
+        """
+        self.scan()
+        conn = self._connect()
+        try:
+            rows = conn.execute('SELECT path, size, mtime FROM files').fetchall()
+        finally:
+            conn.close()
+
+        query = name.strip().lower().replace('\\', '/')
+        scored = []
+        for row in rows:
+            path = row[0].lower()
+            base = path.rsplit('/', 1)[-1]
+            if any(c in query for c in '*?['):
+                score = 1.0 if fnmatch.fnmatch(base, query) or fnmatch.fnmatch(path, query) else 0.0
+            elif base == query or path == query:
+                score = 1.0
+            elif base.startswith(query):
+                score = 0.9
+            elif query in base:
+                score = 0.8
+            elif query in path:
+                score = 0.7
+            else:
+                # Misspelt names: compare with the name, with and without extension
+                stem = base.rsplit('.', 1)[0]
+                score = 0.6 * max(difflib.SequenceMatcher(None, query, base).ratio(),
+                                  difflib.SequenceMatcher(None, query, stem).ratio())
+            if score >= 0.4:
+                scored.append((score, row))
+        scored.sort(key=lambda item: (-item[0], len(item[1][0]), item[1][0]))
+        return [row for _, row in scored[:limit]]
+
+    def search(self, query, limit=FILE_SEARCH_MAX_RESULTS):
+        """
+        Lines containing the query's words, from the best-matching files.
+
+        Files are ranked by full-text relevance (bm25); lines within a file by
+        how many distinct query words they contain.
+
+        Returns:
+            List of (path, line_number, line)
+        """
+        words = [word.lower() for word in _WORD.findall(query)]
+        if not words:
+            return []
+        self.scan()
+
+        conn = self._connect()
+        try:
+            if self.fts:
+                paths = self._rank_fts(conn, words, limit)
+            else:
+                paths = [row[0] for row in conn.execute('SELECT path FROM files WHERE text = 1 ORDER BY path')]
+        finally:
+            conn.close()
+
+        results = []
+        for rel in paths:
+            hits = self._matching_lines(rel, words)
+            results.extend((rel, number, line) for _, number, line in hits[:LINES_PER_FILE])
+            if len(results) >= limit:
+                break
+        return results[:limit]
+
+    def _rank_fts(self, conn, words, limit):
+        terms = ['"' + word.replace('"', '') + '"*' for word in words]
+        sql = 'SELECT path FROM contents WHERE contents MATCH ? ORDER BY bm25(contents) LIMIT ?'
+        # All words first; if nothing has every word, any of them
+        for joiner in (' AND ', ' OR '):
+            try:
+                paths = [row[0] for row in conn.execute(sql, (joiner.join(terms), limit))]
+            except sqlite3.OperationalError:
+                paths = []
+            if paths or len(terms) == 1:
+                return paths
+        return []
+
+    def find_symbols(self, name, path=None, limit=FILE_SEARCH_MAX_RESULTS):
+        """
+        Functions, classes and imports whose name matches name.
+
+        Ranked: exact qualified name ("Parser.parse"), exact short name,
+        prefix, then substring; definitions before imports.
+
+        Returns:
+            List of (path, name, kind, start_line, end_line, signature)
+        """
+        query = name.strip().lower()
+        if not query:
+            return []
+        self.scan()
+        conn = self._connect()
+        try:
+            like = '%' + query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            sql = ("SELECT path, name, kind, start_line, end_line, signature FROM symbols "
+                   "WHERE lower(name) LIKE ? ESCAPE '\\'")
+            params = [like]
+            if path:
+                sql += ' AND path LIKE ?'
+                params.append('%' + path.replace('\\', '/').strip('/'))
+            rows = conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+        def rank(row):
+            full = row[1].lower()
+            short = full.rsplit('.', 1)[-1]
+            if full == query:
+                score = 0
+            elif short == query or full.endswith('.' + query):
+                score = 1
+            elif short.startswith(query):
+                score = 2
+            else:
+                score = 3
+            return (score + (4 if row[2] == "import" else 0), row[0], row[3])
+
+        rows.sort(key=rank)
+        return rows[:limit]
+
+    def symbol_source(self, name, path=None):
+        """
+        Source lines of the best definition of name.
+
+        Returns:
+            (symbol_row, source, other_rows), or None if nothing matches.
+            Source is capped at READ_FILE_MAX_BYTES with a truncation marker.
+        """
+        rows = self.find_symbols(name, path)
+        definitions = [row for row in rows if row[2] != "import"]
+        if definitions:
+            rows = definitions
+        if not rows:
+            return None
+
+        best = rows[0]
+        rel, _, _, start, end = best[:5]
+        try:
+            with open(os.path.join(self.root, rel), 'r', encoding='utf-8', errors='replace') as f:
+                lines = f.read().splitlines()[start - 1:end]
+        except OSError:
+            return None
+
+        out, size = [], 0
+        for offset, line in enumerate(lines):
+            if size + len(line) + 1 > READ_FILE_MAX_BYTES and out:
+                out.append(f"[truncated: showing lines {start}-{start + offset - 1} of {start}-{end}; "
+                           f"read_file {rel} start_line={start + offset} end_line={end} for the rest]")
+                break
+            out.append(line)
+            size += len(line) + 1
+
+        # Only the other matches that are as good as the chosen one
+        others = [row for row in rows[1:] if row[1].lower() == best[1].lower()]
+        return best, "\n".join(out), others
+
+    def _matching_lines(self, rel, words):
+        """(distinct words matched, line number, line) for matching lines, best first."""
+        try:
+            with open(os.path.join(self.root, rel), 'r', encoding='utf-8', errors='replace') as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return []
+        hits = []
+        for number, line in enumerate(lines, 1):
+            lower = line.lower()
+            matched = sum(1 for word in set(words) if word in lower)
+            if matched:
+                hits.append((matched, number, line.strip()[:200]))
+        hits.sort(key=lambda hit: (-hit[0], hit[1]))
+        return hits
+
+
+# Singleton instance
+file_index = FileIndex()
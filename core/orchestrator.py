@@ -0,0 +1,329 @@
+# Voice Orchestrator
+# asyncio core for wake mode. Wake events, console lines, STT results, LLM
+# tokens and scheduler notifications arrive on queues; blocking libraries
+# (Vosk callbacks, Whisper, Ollama, pyttsx3) run in an executor so the loop
+# stays responsive and stages can overlap.
+
+import sys
+import asyncio
+import threading
+from enum import Enum
+from concurrent.futures import ThreadPoolExecutor
+
+from config import ASSISTANT_NAME
+from speech.tts import speak
+from speech.stt import listen_once
+from utils.logger import Logger, get_logger, flush as flush_log
+from utils import tracing
+from brain.llm_queue import PRIORITY_VOICE, PRIORITY_CONSOLE
+
+# Bounded queues: producers block (backpressure) instead of piling up work
+EVENT_QUEUE_SIZE = 16
+TOKEN_QUEUE_SIZE = 256
+
+EXIT_COMMANDS = ['exit', 'quit']
+
+log = get_logger("voice")
+
+
+class State(Enum):
+    IDLE = "idle"
+    LISTENING = "listening"
+    THINKING = "thinking"
+    SPEAKING = "speaking"
+
+
+# Allowed state transitions; anything else is a bug worth logging
+TRANSITIONS = {
+    State.IDLE: {State.LISTENING, State.THINKING, State.SPEAKING},
+    State.LISTENING: {State.IDLE, State.THINKING, State.SPEAKING},
+    State.THINKING: {State.IDLE, State.SPEAKING, State.LISTENING},
+    State.SPEAKING: {State.IDLE, State.LISTENING, State.THINKING},
+}
+
+
+class VoiceOrchestrator:
+    """Event-driven main loop for wake-word mode."""
+
+    def __init__(self, assistant, wake):
+        self.assistant = assistant
+        self.wake = wake
+        self.state = State.IDLE
+        self.loop = None
+        self.events = None
+        self.tokens = None
+        self.executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="atlas")
+        self.turn_task = None
+        self.pending_notifications = []
+        self._streamed = False
+        self._wake_detection = None
+        # The listen_once call that owns the microphone, if any
+        self._listening = None
+
+    # ==================== THREAD BRIDGES ====================
+
+    def post(self, kind, payload=None):
+        """Post an event from any non-loop thread; blocks while the queue is full."""
+        future = asyncio.run_coroutine_threadsafe(self.events.put((kind, payload)), self.loop)
+        future.result()
+
+    def _on_token(self, chunk):
+        """LLM stream callback (executor thread); blocks while the printer is behind."""
+        if self.loop.is_closed():
+            return
+        future = asyncio.run_coroutine_threadsafe(self.tokens.put(chunk), self.loop)
+        try:
+            future.result(timeout=5)
+        except Exception:
+            # Printer gone or stalled (shutdown); the stream itself keeps going
+            future.cancel()
+
+    def _console_loop(self):
+        """Read console lines on a daemon thread."""
+        print("\nType a command at any time:")
+        while self.assistant.running:
+            try:
+                text = input("> ").strip()
+            except EOFError:
+                self.post("console", "exit")
+                break
+            if text:
+                self.post("console", text)
+
+    def _submit_blocking(self, func, *args, **kwargs):
+        # Carry the current trace span into the executor thread
+        run = tracing.bind(func)
+        return self.loop.run_in_executor(self.executor, lambda: run(*args, **kwargs))
+
+    async def _run_blocking(self, func, *args, **kwargs):
+        return await self._submit_blocking(func, *args, **kwargs)
+
+    async def _listen(self, timeout):
+        """
+        Record a command with the wake listener paused.
+
+        The recording can't be interrupted, so a cancelled turn leaves it
+        running and the wake listener is resumed only once it has returned
+        and released the microphone (unless a newer recording took over).
+        """
+        if self._listening:
+            # A cancelled turn's recording still holds the microphone
+            await asyncio.wait({self._listening})
+        self.wake.pause()
+        future = self._submit_blocking(listen_once, timeout)
+        self._listening = future
+
+        def release(_):
+            if self._listening is future:
+                self._listening = None
+                self.wake.resume()
+
+        future.add_done_callback(release)
+        return await asyncio.shield(future)
+
+    # ==================== STATE ====================
+
+    def set_state(self, new_state):
+        """Transition to a new state."""
+        if new_state == self.state:
+            return
+        if new_state not in TRANSITIONS[self.state]:
+            Logger.warning(f"Unexpected state transition {self.state.value} -> {new_state.value}")
+        Logger.debug(f"State: {self.state.value} -> {new_state.value}")
+        self.state = new_state
+
+        if new_state == State.IDLE:
+            # Handled by the main loop so it can't race a new turn starting
+            try:
+                self.events.put_nowait(("idle", None))
+            except asyncio.QueueFull:
+                pass
+
+    # ==================== MAIN LOOP ====================
+
+    async def run(self):
+        """Run until exit is requested."""
+        self.loop = asyncio.get_running_loop()
+        self.events = asyncio.Queue(maxsize=EVENT_QUEUE_SIZE)
+        self.tokens = asyncio.Queue(maxsize=TOKEN_QUEUE_SIZE)
+
+        self.assistant.notification_sink = lambda message: self.post("notification", message)
+        self.wake.start(lambda: self.post("wake"))
+        threading.Thread(target=self._console_loop, daemon=True).start()
+        printer = asyncio.create_task(self._print_tokens())
+
+        try:
+            while self.assistant.running:
+                kind, payload = await self.events.get()
+                if kind == "wake":
+                    await self._on_wake()
+                elif kind == "console":
+                    if payload.lower() in EXIT_COMMANDS:
+                        break
+                    await self._on_console(payload)
+                elif kind == "notification":
+                    self.pending_notifications.append(payload)
+                    log.status(f"\n[Notification] {payload}")
+                    self._flush_notifications()
+                elif kind == "idle":
+                    self._flush_notifications()
+        finally:
+            await self._cancel_turn("shutdown")
+            printer.cancel()
+            self.assistant.notification_sink = None
+            self.wake.stop()
+            self.executor.shutdown(wait=False)
+
+    async def _cancel_turn(self, reason):
+        """Abandon the running turn: cancel its token, silence TTS, drop the task."""
+        await self._run_blocking(self.assistant.interrupt, reason)
+        if self.turn_task and not self.turn_task.done():
+            self.turn_task.cancel()
+            try:
+                await self.turn_task
+            except asyncio.CancelledError:
+                pass
+        self.turn_task = None
+
+    def _start_turn(self, coro):
+        self.turn_task = asyncio.create_task(coro)
+
+    # ==================== EVENT HANDLERS ====================
+
+    async def _on_wake(self):
+        await self._cancel_turn("wake")
+        self._wake_detection = self.wake.last_detection
+        log.status(f"\n✨ {ASSISTANT_NAME} activated!")
+        self._start_turn(self._conversation())
+
+    async def _on_console(self, text):
+        await self._cancel_turn("console")
+        self._start_turn(self._console_turn(text))
+
+    def _flush_notifications(self):
+        """Speak queued notifications, but never over an active turn."""
+        busy = self.turn_task is not None and not self.turn_task.done()
+        if busy or self.state != State.IDLE or not self.pending_notifications:
+            return
+        messages, self.pending_notifications = self.pending_notifications, []
+        self._start_turn(self._speak_notifications(messages))
+
+    # ==================== TURNS ====================
+
+    async def _say(self, text, short_only=False):
+        self.set_state(State.SPEAKING)
+        with tracing.span("tts", chars=len(text)):
+            await self._run_blocking(speak, text, short_only, True)
+
+    async def _speak_notifications(self, messages):
+        try:
+            for message in messages:
+                await self._say(message, short_only=True)
+        finally:
+            self.set_state(State.IDLE)
+
+    async def _respond(self, text, speak_reply=True):
+        """
+        Run one command through the assistant.
+
+        Returns:
+            False if the turn was cancelled
+        """
+        self.set_state(State.THINKING)
+        # Status lines queued so far must land before the streamed reply
+        await self._run_blocking(flush_log)
+        print(f"\n{ASSISTANT_NAME}: ", end="", flush=True)
+        self._streamed = False
+
+        token = self.assistant.begin_turn()
+        try:
+            response = await self._run_blocking(
+                self.assistant.process_command, text, token, on_token=self._on_token,
+                priority=PRIORITY_VOICE if speak_reply else PRIORITY_CONSOLE
+            )
+        finally:
+            self.assistant.end_turn()
+
+        # Let the printer (and status log) drain before the final line
+        await self.tokens.join()
+        await self._run_blocking(flush_log)
+        if response is None:
+            print("[Interrupted]")
+            return False
+
+        if self._streamed:
+            print()
+        else:
+            print(response)
+
+        if speak_reply:
+            await self._say(response)
+        else:
+            # Console replies are spoken in the background
+            speak(response, short_only=False, wait=False)
+        return True
+
+    async def _console_turn(self, text):
+        try:
+            with tracing.trace("turn", source="console"):
+                await self._respond(text, speak_reply=False)
+        finally:
+            self.set_state(State.IDLE)
+
+    async def _conversation(self):
+        """Voice conversation after wake: listen, respond, repeat until silence."""
+        try:
+            first_turn = True
+            while self.assistant.running:
+                # One trace per exchange; the first one starts at the wake word
+                with tracing.trace("turn", source="voice"):
+                    if first_turn:
+                        if self._wake_detection:
+                            tracing.record("wake", *self._wake_detection)
+                        log.status(f"{ASSISTANT_NAME}: Yes?")
+                        await self._say("Yes?")
+
+                    self.set_state(State.LISTENING)
+                    if first_turn:
+                        log.status("🎤 Listening for command...")
+                        first_turn = False
+                    else:
+                        log.status("\n🎤 Listening for follow-up (10s timeout)...")
+
+                    # Wake listener is paused while recording (avoid mic conflict)
+                    command = await self._listen(10)
+
+                    if not command:
+                        log.status("   (Conversation timeout)")
+                        await self._say("Closing conversation.", short_only=True)
+                        break
+
+                    log.status(f"   Heard: \"{command}\"", text=command)
+                    if not await self._respond(command):
+                        break
+        finally:
+            self.set_state(State.IDLE)
+
+    async def _print_tokens(self):
+        """Print streamed LLM text as it arrives, hiding raw tool-call JSON."""
+        buffer = ""
+        while True:
+            chunk = await self.tokens.get()
+            try:
+                # None marks the start of a new generation within the turn
+                if chunk is None or self.state != State.THINKING:
+                    buffer = ""
+                    continue
+
+                if not self._streamed:
+                    buffer += chunk
+                    head = buffer.lstrip()
+                    if not head or head.startswith('{') or head.startswith('```'):
+                        continue
+                    self._streamed = True
+                    chunk, buffer = buffer, ""
+
+                sys.stdout.write(chunk)
+                sys.stdout.flush()
+            finally:
+                self.tokens.task_done()
@@ -0,0 +1,195 @@
+# Replay Mode
+# Pushes a scripted corpus through AtlasAssistant.process_command without
+# microphone or speech, and writes per-turn measurements as JSONL.
+#
+# Usage:
+#   python main.py --replay turns.jsonl [--out results.jsonl]
+#                  [--fake-ollama canned.json] [--ollama-host URL] [--cache]
+#
+# Input lines:
+#   {"input": "create a file notes.txt saying hi", "expect_tool": "create_file"}
+#   {"input": "yes"}                                   # confirmation turn
+#   {"input": "what time is it", "session": "b"}       # separate conversation
+#
+# "expect_tool" is optional; use "none" to assert a plain chat reply.
+#
+# The run uses a fresh memory database, file index, response cache and
+# ATLAS_FILES directory in a temp dir, so replays neither see nor change the
+# user's data.
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import contextlib
+
+from brain import llm
+from brain.fake_ollama import FakeOllamaServer, load_canned
+from brain.response_cache import response_cache
+from core.file_index import file_index
+from core.session import Session
+from memory import db
+from memory.memory_manager import memory
+from tools import file_tools
+from utils import logger
+
+
+def load_turns(path):
+    """Read scripted turns from a JSONL file."""
+    turns = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            try:
+                turn = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{line_no}: {e}")
+            if "input" not in turn:
+                raise ValueError(f"{path}:{line_no}: missing 'input'")
+            turns.append(turn)
+    return turns
+
+
+def run_turn(assistant, session, index, scripted):
+    """Run one scripted turn and return its result record."""
+    start = time.perf_counter()
+    # Keep status chatter off stdout, which may carry the JSONL records
+    with contextlib.redirect_stdout(sys.stderr):
+        response = assistant.process_command(scripted["input"], session=session)
+    wall = time.perf_counter() - start
+
+    turn = session.last_turn or {"llm_calls": [], "tool_calls": []}
+    calls = turn["llm_calls"]
+    prompt_bytes = sum(c["prompt_bytes"] for c in calls)
+
+    record = {
+        "turn": index,
+        "session": session.id,
+        "input": scripted["input"],
+        "response": response,
+        "wall_seconds": round(wall, 4),
+        "prompt_build_seconds": turn.get("prompt_build_seconds"),
+        "prompt_estimated_tokens": turn.get("prompt", {}).get("estimated_tokens"),
+        "prompt_tools": turn.get("prompt", {}).get("tools"),
+        "route": turn.get("route"),
+        "escalated": turn.get("escalated", False),
+        "llm_calls": len(calls),
+        "cached_calls": sum(1 for c in calls if c.get("cache") == "hit"),
+        "llm_seconds": round(sum(c["seconds"] for c in calls), 4),
+        "queue_wait_seconds": round(sum(c.get("queue_wait", 0) for c in calls), 4),
+        "prompt_bytes": prompt_bytes,
+        "prompt_tokens": sum(c.get("prompt_eval_count", c["prompt_tokens"]) for c in calls),
+        "eval_tokens": sum(c.get("eval_count", 0) for c in calls),
+        "reasoning_tokens": turn.get("reasoning_tokens", 0),
+        "tool_calls": turn["tool_calls"],
+    }
+
+    expected = scripted.get("expect_tool")
+    if expected is not None:
+        called = turn["tool_calls"][0]["tool"] if turn["tool_calls"] else "none"
+        record["expect_tool"] = expected
+        record["tool_match"] = called == expected
+    return record
+
+
+def replay(assistant, turns, out):
+    """
+    Run all turns, writing one JSON record per line to out.
+
+    Returns:
+        Summary dict
+    """
+    sessions = {}
+    records = []
+    start = time.perf_counter()
+
+    for index, scripted in enumerate(turns):
+        sid = scripted.get("session", "replay")
+        if sid not in sessions:
+            sessions[sid] = Session(sid)
+        record = run_turn(assistant, sessions[sid], index, scripted)
+        records.append(record)
+        out.write(json.dumps(record) + "\n")
+        out.flush()
+
+    elapsed = time.perf_counter() - start
+    routed = [r for r in records if "tool_match" in r]
+    walls = sorted(r["wall_seconds"] for r in records)
+
+    return {
+        "turns": len(records),
+        "seconds": round(elapsed, 3),
+        "turns_per_second": round(len(records) / elapsed, 3) if elapsed else None,
+        "median_turn_seconds": walls[len(walls) // 2] if walls else None,
+        "mean_prompt_bytes": round(sum(r["prompt_bytes"] for r in records) / len(records), 1) if records else None,
+        "tool_routing_accuracy": round(sum(r["tool_match"] for r in routed) / len(routed), 4) if routed else None,
+    }
+
+
+@contextlib.contextmanager
+def isolated_state():
+    """Point the memory DB, file index, response cache and ATLAS_FILES at a temp dir."""
+    saved = (db.DB_PATH, file_index.path, file_index.fts, response_cache.path, file_tools.ATLAS_FILES_DIR)
+    with tempfile.TemporaryDirectory(prefix="atlas-replay-") as tmp:
+        db.DB_PATH = os.path.join(tmp, "memory.db")
+        db.initialize_database()
+        # Facts changed: drop the memoized system prompt
+        memory.facts_version += 1
+        file_index.path = os.path.join(tmp, "file_index.db")
+        file_index.fts = None       # create the tables on first connect
+        response_cache.path = os.path.join(tmp, "response_cache.db")
+        file_tools.ATLAS_FILES_DIR = os.path.join(tmp, "files")
+        try:
+            yield tmp
+        finally:
+            (db.DB_PATH, file_index.path, file_index.fts, response_cache.path,
+             file_tools.ATLAS_FILES_DIR) = saved
+            memory.facts_version += 1
+
+
+def run_replay(assistant, argv):
+    """Entry point for `main.py --replay`."""
+    parser = argparse.ArgumentParser(prog="main.py --replay", description="Replay scripted turns for benchmarking.")
+    parser.add_argument('turns', help="JSONL file of scripted inputs")
+    parser.add_argument('--out', help="Write per-turn JSONL here (default: stdout)")
+    parser.add_argument('--fake-ollama', metavar='CANNED', nargs='?', const='',
+                        help="Serve canned responses from a local fake Ollama (optional canned JSON file)")
+    parser.add_argument('--ollama-host', help="Use a different Ollama URL")
+    parser.add_argument('--cache', action='store_true',
+                        help="Use the response cache (off by default so timings measure the model)")
+    args = parser.parse_args(argv)
+    response_cache.enabled = response_cache.enabled and args.cache
+
+    # No speech in replay: notifications are dropped instead of spoken
+    assistant.notification_sink = lambda message: None
+    
+    # Status logging goes to stderr so stdout carries only JSONL
+    logger.set_console_stream(sys.stderr)
+
+    fake = None
+    if args.fake_ollama is not None:
+        fake = FakeOllamaServer(load_canned(args.fake_ollama or None))
+        llm.OLLAMA_HOST = fake.start()
+    elif args.ollama_host:
+        llm.OLLAMA_HOST = args.ollama_host
+
+    try:
+        turns = load_turns(args.turns)
+        out = open(args.out, 'w', encoding='utf-8') if args.out else sys.stdout
+        try:
+            with isolated_state():
+                summary = replay(assistant, turns, out)
+        finally:
+            if args.out:
+                out.close()
+    finally:
+        if fake:
+            fake.stop()
+
+    logger.flush()
+    print(json.dumps({"summary": summary}), file=sys.stderr)
+    return summary
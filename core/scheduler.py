@@ -2,6 +2,18 @@ import time
 import threading
 import datetime
 from memory.memory_manager import memory
+from utils import metrics
+
+# Seconds between reminder checks
+POLL_INTERVAL = 5
+
+SCHEDULER_LAG_SECONDS = metrics.histogram("atlas_scheduler_lag_seconds", "How late each scheduler tick woke up",
+                                          buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0))
+SCHEDULER_TICK_SECONDS = metrics.histogram("atlas_scheduler_tick_seconds", "Time spent checking reminders per tick")
+REMINDER_DELAY_SECONDS = metrics.histogram("atlas_reminder_delay_seconds", "Due time to first announcement",
+                                           buckets=(1, 2.5, 5, 10, 30, 60, 300, 3600))
+SCHEDULER_NOTIFICATIONS = metrics.counter("atlas_scheduler_notifications_total", "Reminder announcements sent")
+SCHEDULER_ACTIVE_ALERTS = metrics.gauge("atlas_scheduler_active_alerts", "Reminders due and awaiting confirmation")
 
 
 class Scheduler:
@@ -11,6 +23,7 @@ class Scheduler:
         self.notification_callback = notification_callback
         self.active_alerts = {}
         self.lock = threading.Lock()
+        SCHEDULER_ACTIVE_ALERTS.set_function(lambda: len(self.active_alerts))
         
     def start(self):
         self.running = True
@@ -35,13 +48,20 @@ class Scheduler:
             return True
 
     def _loop(self):
+        expected = None
         while self.running:
+            tick_start = time.perf_counter()
+            if expected is not None:
+                SCHEDULER_LAG_SECONDS.observe(max(0.0, tick_start - expected))
             try:
                 self._check_reminders()
                 self._process_active_alerts()
             except Exception as e:
                 print(f"[Scheduler Error] {e}")
-            time.sleep(5)
+            tick_end = time.perf_counter()
+            SCHEDULER_TICK_SECONDS.observe(tick_end - tick_start)
+            expected = tick_end + POLL_INTERVAL
+            time.sleep(POLL_INTERVAL)
 
     def _check_reminders(self):
         try:
@@ -55,6 +75,7 @@ class Scheduler:
                         
                     due = datetime.datetime.fromisoformat(r['due_at'])
                     if now >= due:
+                        REMINDER_DELAY_SECONDS.observe((now - due).total_seconds())
                         self.active_alerts[r['id']] = {
                             'message': r['message'],
                             'last_announced': 0 
@@ -71,6 +92,7 @@ class Scheduler:
                     msg = f"Reminder: {alert['message']}. Please confirm."
                     print(f"\n[ALERT] {msg}")
                     
+                    SCHEDULER_NOTIFICATIONS.inc()
                     if self.notification_callback:
                         self.notification_callback(msg)
                     
@@ -0,0 +1,356 @@
+# API Server
+# Local HTTP + WebSocket API (`python main.py --serve`) so editor plugins and
+# widgets can drive Atlas concurrently. Each client gets its own Session; all
+# sessions share one warm model through a bounded worker pool.
+#
+# Every request except /health needs "Authorization: Bearer <token>" (WebSocket
+# clients may pass ?token= instead). The token comes from SERVER_TOKEN or is
+# generated once and kept in server_token. POSTs must be application/json and
+# WebSocket upgrades from another Origin are refused, so web pages the user
+# visits can't drive the assistant.
+#
+# HTTP:
+#   GET    /health
+#   POST   /sessions                    -> {"session_id": ...}
+#   DELETE /sessions/{id}
+#   POST   /chat  {"text", "session_id"?, "stream"?, "cache"?}
+#          cache=false bypasses the response cache for this turn
+#          stream=false -> {"session_id", "response"}
+#          stream=true  -> NDJSON lines: {"type": "token"|"response"|"error", ...}
+#   POST   /sessions/{id}/cancel
+#   GET    /metrics                     -> Prometheus text format
+#
+# WebSocket (/ws), JSON messages:
+#   client: {"type": "command", "text": ..., "cache"?} | {"type": "cancel"}
+#   server: {"type": "session", "session_id"} | {"type": "token", "text"}
+#           {"type": "response", "text"} | {"type": "cancelled"}
+#           {"type": "notification", "text"} | {"type": "error", "message"}
+
+import os
+import hmac
+import json
+import time
+import asyncio
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from aiohttp import web, WSMsgType
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+from config import SERVER_HOST, SERVER_PORT, SERVER_LLM_WORKERS, SERVER_MAX_PENDING, SERVER_TOKEN
+from core.session import Session
+from utils import metrics, tracing
+
+# Idle sessions are dropped after this many seconds
+SESSION_TTL = 3600
+
+TOKEN_PATH = os.path.join(os.path.dirname(__file__), '..', 'server_token')
+
+# Reachable without a token (liveness checks)
+PUBLIC_PATHS = {"/health"}
+
+
+def load_token(path=TOKEN_PATH):
+    """
+    The API token: SERVER_TOKEN if set, else the one stored at path
+    (generated on first use, readable only by the owner).
+
+    Returns:
+        Token string
+    """
+    if SERVER_TOKEN:
+        return SERVER_TOKEN
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            token = f.read().strip()
+        if token:
+            return token
+    except FileNotFoundError:
+        pass
+    token = secrets.token_urlsafe(32)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(token + "\n")
+    return token
+
+
+class AtlasServer:
+    """Serves one AtlasAssistant to many local clients."""
+
+    def __init__(self, assistant, workers=SERVER_LLM_WORKERS, max_pending=SERVER_MAX_PENDING, token=None):
+        self.assistant = assistant
+        self.token = token or load_token()
+        self.sessions = {}
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="atlas-llm")
+        self.max_pending = max_pending
+        self.pending = 0
+        self.websockets = set()
+        self.loop = None
+
+    # ==================== SESSIONS ====================
+
+    def get_session(self, session_id=None):
+        """Look up a session, creating it if needed."""
+        if session_id and session_id in self.sessions:
+            return self.sessions[session_id]
+        self._prune_sessions()
+        session = Session(session_id)
+        self.sessions[session.id] = session
+        return session
+
+    def _prune_sessions(self):
+        """Forget sessions that have been idle longer than SESSION_TTL."""
+        cutoff = time.time() - SESSION_TTL
+        for sid, session in list(self.sessions.items()):
+            if session.last_active < cutoff and session.current_turn is None:
+                del self.sessions[sid]
+
+    def cancel_session(self, session):
+        """Cancel the session's running turn, if any."""
+        if session.current_turn:
+            session.current_turn.cancel("client")
+
+    # ==================== TURNS ====================
+
+    async def run_turn(self, session, text, on_token=None, cache=True):
+        """
+        Run one command for a session on the worker pool.
+
+        A new command on a busy session supersedes the running one.
+
+        Returns:
+            Response text, or None if cancelled
+        """
+        if self.pending >= self.max_pending:
+            raise OverflowError("Server busy, try again shortly.")
+
+        self.cancel_session(session)
+        self.pending += 1
+        try:
+            async with session.lock:
+                token = self.assistant.begin_turn(session)
+                try:
+                    with tracing.trace("turn", source="api", session=session.id):
+                        run = tracing.bind(self.assistant.process_command)
+                        return await self.loop.run_in_executor(
+                            self.executor,
+                            lambda: run(text, token, on_token=on_token, session=session, cache=cache)
+                        )
+                finally:
+                    if session.current_turn is token:
+                        self.assistant.end_turn(session)
+        finally:
+            self.pending -= 1
+
+    def _token_forwarder(self, queue):
+        """Callback that moves streamed text from the worker thread onto an asyncio queue."""
+        def on_token(chunk):
+            # None marks a new generation (after a tool call); clients just see text
+            if chunk:
+                self.loop.call_soon_threadsafe(queue.put_nowait, chunk)
+        return on_token
+
+    # ==================== ACCESS ====================
+
+    async def _guard(self, request, handler):
+        """Middleware: token, content type and WebSocket origin checks."""
+        if request.path not in PUBLIC_PATHS:
+            supplied = request.headers.get("Authorization", "")
+            supplied = supplied[7:] if supplied.startswith("Bearer ") else ""
+            if not supplied and request.path == "/ws":
+                supplied = request.query.get("token", "")
+            if not hmac.compare_digest(supplied.encode('utf-8'), self.token.encode('utf-8')):
+                return web.json_response({"error": "Missing or invalid token."}, status=401)
+
+        if request.method == "POST" and request.content_type != "application/json":
+            return web.json_response({"error": "Expected Content-Type: application/json."}, status=415)
+
+        if request.path == "/ws" and not self._same_origin(request):
+            return web.json_response({"error": "Cross-origin WebSocket refused."}, status=403)
+
+        return await handler(request)
+
+    def _same_origin(self, request):
+        """Whether a request's Origin (if any) is this server."""
+        origin = request.headers.get("Origin")
+        if origin is None:
+            # Editor plugins and scripts don't send one; browsers always do
+            return True
+        return origin in (f"http://{request.host}", f"https://{request.host}")
+
+    # ==================== HTTP ====================
+
+    async def handle_health(self, request):
+        return web.json_response({"status": "ok", "sessions": len(self.sessions), "pending": self.pending})
+
+    async def handle_metrics(self, request):
+        return web.Response(text=metrics.registry.render(), content_type="text/plain")
+
+    async def handle_create_session(self, request):
+        session = self.get_session()
+        return web.json_response({"session_id": session.id})
+
+    async def handle_delete_session(self, request):
+        session = self.sessions.pop(request.match_info['session_id'], None)
+        if not session:
+            return web.json_response({"error": "Unknown session."}, status=404)
+        self.cancel_session(session)
+        return web.json_response({"deleted": session.id})
+
+    async def handle_cancel(self, request):
+        session = self.sessions.get(request.match_info['session_id'])
+        if not session:
+            return web.json_response({"error": "Unknown session."}, status=404)
+        self.cancel_session(session)
+        return web.json_response({"cancelled": session.id})
+
+    async def handle_chat(self, request):
+        try:
+            body = await request.json()
+        except json.JSONDecodeError:
+            return web.json_response({"error": "Invalid JSON."}, status=400)
+
+        text = (body.get("text") or "").strip()
+        if not text:
+            return web.json_response({"error": "Missing 'text'."}, status=400)
+
+        session = self.get_session(body.get("session_id"))
+
+        if not body.get("stream"):
+            try:
+                response = await self.run_turn(session, text, cache=body.get("cache", True) is not False)
+            except OverflowError as e:
+                return web.json_response({"error": str(e)}, status=503)
+            return web.json_response({"session_id": session.id, "response": response, "cancelled": response is None})
+
+        stream = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        await stream.prepare(request)
+
+        async def send(message):
+            await stream.write((json.dumps(message) + "\n").encode('utf-8'))
+
+        await send({"type": "session", "session_id": session.id})
+        await self._stream_turn(session, text, send, cache=body.get("cache", True) is not False)
+        await stream.write_eof()
+        return stream
+
+    async def _stream_turn(self, session, text, send, cache=True):
+        """Run a turn, sending tokens as they arrive and the final response."""
+        tokens = asyncio.Queue()
+        turn = asyncio.ensure_future(self.run_turn(session, text, self._token_forwarder(tokens), cache))
+
+        while not (turn.done() and tokens.empty()):
+            getter = asyncio.ensure_future(tokens.get())
+            done, _ = await asyncio.wait({getter, turn}, return_when=asyncio.FIRST_COMPLETED)
+            if getter in done:
+                await send({"type": "token", "text": getter.result()})
+            else:
+                getter.cancel()
+
+        try:
+            response = turn.result()
+        except OverflowError as e:
+            await send({"type": "error", "message": str(e)})
+            return
+        except Exception as e:
+            await send({"type": "error", "message": f"{e}"})
+            return
+
+        if response is None:
+            await send({"type": "cancelled"})
+        else:
+            await send({"type": "response", "text": response})
+
+    # ==================== WEBSOCKET ====================
+
+    async def handle_ws(self, request):
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+        session = self.get_session(request.query.get("session_id"))
+        self.websockets.add(ws)
+
+        async def send(message):
+            if not ws.closed:
+                await ws.send_json(message)
+
+        await send({"type": "session", "session_id": session.id})
+        turn_task = None
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                try:
+                    data = json.loads(msg.data)
+                except json.JSONDecodeError:
+                    await send({"type": "error", "message": "Invalid JSON."})
+                    continue
+
+                if data.get("type") == "cancel":
+                    self.cancel_session(session)
+                elif data.get("type") == "command" and (data.get("text") or "").strip():
+                    # Commands run concurrently with reading, so "cancel" stays responsive
+                    turn_task = asyncio.ensure_future(self._stream_turn(session, data["text"].strip(), send,
+                                                                        cache=data.get("cache", True) is not False))
+                else:
+                    await send({"type": "error", "message": "Expected a 'command' or 'cancel' message."})
+        finally:
+            self.websockets.discard(ws)
+            self.cancel_session(session)
+            if turn_task:
+                turn_task.cancel()
+        return ws
+
+    def broadcast_notification(self, message):
+        """Scheduler callback (background thread): push to every WebSocket client."""
+        async def push():
+            for ws in list(self.websockets):
+                if not ws.closed:
+                    await ws.send_json({"type": "notification", "text": message})
+        if self.loop:
+            asyncio.run_coroutine_threadsafe(push(), self.loop)
+
+    # ==================== APP ====================
+
+    async def _on_startup(self, app):
+        self.loop = asyncio.get_running_loop()
+        self.assistant.notification_sink = self.broadcast_notification
+
+    async def _on_cleanup(self, app):
+        self.assistant.notification_sink = None
+        for session in self.sessions.values():
+            self.cancel_session(session)
+        self.executor.shutdown(wait=False)
+
+    def build_app(self):
+        @web.middleware
+        async def guard(request, handler):
+            return await self._guard(request, handler)
+
+        app = web.Application(middlewares=[guard])
+        app.router.add_get('/health', self.handle_health)
+        app.router.add_get('/metrics', self.handle_metrics)
+        app.router.add_post('/sessions', self.handle_create_session)
+        app.router.add_delete('/sessions/{session_id}', self.handle_delete_session)
+        app.router.add_post('/sessions/{session_id}/cancel', self.handle_cancel)
+        app.router.add_post('/chat', self.handle_chat)
+        app.router.add_get('/ws', self.handle_ws)
+        app.on_startup.append(self._on_startup)
+        app.on_cleanup.append(self._on_cleanup)
+        return app
+
+
+def run_server(assistant, host=SERVER_HOST, port=SERVER_PORT):
+    """Run the API server until interrupted."""
+    if not AIOHTTP_AVAILABLE:
+        print("[Server] aiohttp is not installed. Run: pip install aiohttp")
+        return
+    server = AtlasServer(assistant)
+    print(f"[Server] Listening on http://{host}:{port} (WebSocket: /ws)")
+    if SERVER_TOKEN:
+        print("[Server] Token: SERVER_TOKEN from config.py")
+    else:
+        print(f"[Server] Token: {os.path.normpath(TOKEN_PATH)}")
+    web.run_app(server.build_app(), host=host, port=port, print=None)
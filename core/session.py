@@ -0,0 +1,27 @@
+# Session
+# Per-client conversation state, so several clients can share one assistant
+
+import time
+import uuid
+import asyncio
+
+from core.context import ContextManager
+
+
+class Session:
+    """Conversation history, pending confirmations and active turn for one client."""
+    
+    def __init__(self, session_id=None):
+        self.id = session_id or uuid.uuid4().hex
+        self.context = ContextManager()
+        self.pending_memory = None
+        self.pending_tool_call = None
+        self.current_turn = None
+        self.last_turn = None
+        self.last_active = time.time()
+        # Serializes this session's turns on the API server's event loop
+        self.lock = asyncio.Lock()
+    
+    def touch(self):
+        """Mark the session as used now."""
+        self.last_active = time.time()
@@ -1,12 +1,16 @@
 import inspect
-from tools import file_tools, system_tools, memory_tools, task_tools, workflow_tools
+from tools import file_tools, search_tools, code_tools, system_tools, memory_tools, task_tools, workflow_tools
 
 class ToolRouter:
     """Manages tool registration, execution, and safety checks."""
     
     def __init__(self):
         self.tools = {}
+        # Bumped whenever the tool set changes (prompt caches key on it)
+        self.version = 0
         self.register_module(file_tools)
+        self.register_module(search_tools)
+        self.register_module(code_tools)
         self.register_module(system_tools)
         self.register_module(memory_tools)
         self.register_module(task_tools)
@@ -22,12 +26,18 @@ class ToolRouter:
             'delete_fact',
             'update_fact'
         }
+        
+        # Dry runs shown before confirming a destructive tool
+        self.previewers = {
+            'edit_file': file_tools._preview_edit,
+        }
 
     def register_module(self, module):
         """Register all functions in a module as tools."""
         for name, func in inspect.getmembers(module, inspect.isfunction):
             if not name.startswith('_'):
                 self.tools[name] = func
+        self.version += 1
 
     def get_tool(self, name):
         """Get a tool function by name."""
@@ -37,6 +47,16 @@ class ToolRouter:
         """Check if a tool is destructive."""
         return tool_name in self.destructive_tools
 
+    def preview(self, tool_name, args):
+        """
+        What a destructive tool would change, or None if it has no previewer.
+        Raises if the call would fail (e.g. a patch that doesn't match).
+        """
+        previewer = self.previewers.get(tool_name)
+        if not previewer:
+            return None
+        return previewer(**args)
+
     def execute_tool(self, tool_name, args):
         """Execute a tool."""
         func = self.get_tool(tool_name)
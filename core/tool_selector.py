@@ -0,0 +1,197 @@
+# Tool Selector
+# Picks the tools worth describing in the prompt for one input, so a chat
+# turn doesn't pay prefill for every tool docstring. Tools are scored by
+# keyword overlap (name, docstring summary and a few synonyms, IDF-weighted),
+# plus cosine similarity against precomputed tool embeddings when
+# TOOL_EMBED_MODEL is set. The TOOLS_CORE set is always offered.
+
+import re
+import math
+import threading
+
+from config import TOOL_SELECTION_ENABLED, TOOLS_TOP_N, TOOLS_MIN_SCORE, TOOLS_CORE, TOOL_EMBED_MODEL
+from core.tool_router import router
+from utils import metrics
+from utils.logger import get_logger
+
+log = get_logger("tools")
+
+TOOL_SELECTIONS = metrics.counter("atlas_tool_selections_total", "Tool subsets chosen for prompts, by outcome")
+TOOLS_OFFERED = metrics.histogram("atlas_tools_offered", "Tools described in the prompt per turn",
+                                  buckets=(1, 2, 3, 4, 5, 6, 8, 10, 15, 20, 30))
+
+# Words users say for a tool that its name and docstring don't contain
+TOOL_KEYWORDS = {
+    "create_file": "new make write save script",
+    "edit_file": "change modify update fix rewrite replace",
+    "list_files": "files show folder directory",
+    "read_file": "show open view contents look cat",
+    "find_files": "find locate where which file named folder",
+    "search_files": "search grep find mention mentions contains containing text where",
+    "find_symbol": "where defined definition function class method symbol code",
+    "get_symbol_source": "explain show code source function class method implementation works",
+    "get_time": "clock date day today hour now",
+    "open_app": "launch start run program browser chrome spotify",
+    "open_file": "show launch",
+    "open_folder": "directory explorer show",
+    "delete_fact": "forget remove erase",
+    "get_fact": "remember recall know",
+    "list_memories": "remember know about me",
+    "store_fact": "remember save note",
+    "update_fact": "change correct remember",
+    "add_task": "todo to-do need must remember",
+    "complete_task": "done finish finished check todo",
+    "list_tasks": "todo to-do pending",
+    "set_reminder": "remind alarm alert later minutes tomorrow",
+    "start_coding": "code vscode programming develop",
+}
+
+_STOPWORDS = frozenset(
+    "a an the to of in on for and or i me my you your it its is are be was this that "
+    "please can could would will with from at by about do does did so just hey atlas sir".split()
+)
+
+# Cosine similarity at or below this counts as unrelated (typical for
+# sentence embedding models); the rest is scaled to 0..1
+_EMBED_FLOOR = 0.45
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _stem(word):
+    for suffix in ("ing", "ed", "es", "s"):
+        if len(word) > len(suffix) + 3 and word.endswith(suffix):
+            return word[:-len(suffix)]
+    return word
+
+
+def _terms(text):
+    """Normalized content words of text."""
+    return {_stem(w) for w in _WORD.findall(text.lower().replace("_", " ")) if w not in _STOPWORDS}
+
+
+def _cosine(a, b):
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class ToolSelector:
+    """Scores registered tools against user input."""
+
+    def __init__(self, top_n=TOOLS_TOP_N, min_score=TOOLS_MIN_SCORE, core=TOOLS_CORE,
+                 embed_model=TOOL_EMBED_MODEL):
+        self.top_n = top_n
+        self.min_score = min_score
+        self.core = list(core)
+        self.embed_model = embed_model
+
+        self._version = None
+        self._keywords = {}     # tool -> set of terms
+        self._idf = {}          # term -> weight
+        self._vectors = None    # tool -> embedding, once computed
+        self._lock = threading.Lock()
+
+    # ==================== INDEX ====================
+
+    def _ensure_index(self):
+        """(Re)build the keyword index when the tool registry changes."""
+        if self._version == router.version:
+            return
+        with self._lock:
+            if self._version == router.version:
+                return
+            keywords = {}
+            for name, func in router.tools.items():
+                summary = func.__doc__.strip().splitlines()[0] if func.__doc__ else ""
+                keywords[name] = _terms(f"{name} {summary} {TOOL_KEYWORDS.get(name, '')}")
+
+            count = len(keywords) or 1
+            df = {}
+            for terms in keywords.values():
+                for term in terms:
+                    df[term] = df.get(term, 0) + 1
+            self._idf = {term: math.log(1 + count / n) for term, n in df.items()}
+            self._keywords = keywords
+            self._vectors = None
+            self._version = router.version
+
+        if self.embed_model:
+            threading.Thread(target=self._embed_tools, args=(router.version,),
+                             daemon=True, name="atlas-tool-embed").start()
+
+    def _embed_tools(self, version):
+        """Background: embed every tool description once per registry version."""
+        from brain.llm import embed
+
+        names = list(router.tools)
+        docs = [f"{name}: {(router.tools[name].__doc__ or '').strip()}" for name in names]
+        vectors = embed(docs, self.embed_model)
+        if not vectors or len(vectors) != len(names):
+            log.warning(f"[Tools] Embedding model '{self.embed_model}' unavailable; using keywords only")
+            self.embed_model = None
+            return
+        with self._lock:
+            if self._version == version:
+                self._vectors = dict(zip(names, vectors))
+
+    # ==================== SCORING ====================
+
+    def scores(self, text):
+        """Relevance of each tool to text, 0..1."""
+        self._ensure_index()
+        terms = _terms(text)
+        scores = {}
+        for name, keywords in self._keywords.items():
+            weight = sum(self._idf[t] for t in terms & keywords)
+            # Saturating: one distinctive word ~0.75, a common one ~0.5
+            scores[name] = 1 - math.exp(-weight / 2)
+
+        vectors = self._vectors
+        if vectors and self.embed_model:
+            from brain.llm import embed
+
+            query = embed([text], self.embed_model, timeout=2)
+            if query:
+                for name, vector in vectors.items():
+                    similarity = (_cosine(query[0], vector) - _EMBED_FLOOR) / (1 - _EMBED_FLOOR)
+                    scores[name] = max(scores.get(name, 0.0), similarity)
+        return scores
+
+    def select(self, text, scores=None):
+        """
+        Tools to describe for this input.
+
+        Args:
+            text: User input
+            scores: Result of scores(text), if already computed
+
+        Returns:
+            Tool names in registry order (core set plus the top matches), or
+            None when every tool should be offered
+        """
+        if not TOOL_SELECTION_ENABLED:
+            return None
+
+        if scores is None:
+            scores = self.scores(text)
+        ranked = sorted((s, name) for name, s in scores.items() if s >= self.min_score)
+        chosen = {name for _, name in ranked[::-1][:self.top_n]}
+        chosen.update(name for name in self.core if name in router.tools)
+
+        if len(chosen) >= len(router.tools):
+            TOOL_SELECTIONS.inc(result="all")
+            TOOLS_OFFERED.observe(len(router.tools))
+            return None
+        TOOL_SELECTIONS.inc(result="subset")
+        TOOLS_OFFERED.observe(len(chosen))
+        return [name for name in router.tools if name in chosen]
+
+    def record_miss(self):
+        """The model named a tool outside the subset; the caller retries with all tools."""
+        TOOL_SELECTIONS.inc(result="miss")
+        TOOLS_OFFERED.observe(len(router.tools))
+
+
+# Singleton instance
+selector = ToolSelector()
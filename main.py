@@ -5,21 +5,26 @@ import sys
 import os
 import re
 import time
+import asyncio
 import threading
-import queue
+from collections import deque
 
 # Add atlas directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from config import ASSISTANT_NAME
+from config import ASSISTANT_NAME, MODEL_NAME, THINK_ROUTES, RESPONSE_CACHE_ROUTES
 from brain.llm import initialize_model, generate_response
-from brain.prompt import get_prompt_with_memory
-from core.context import ContextManager
+from brain.prompt import get_system_prompt
+from brain.tokens import estimate_tokens, truncate_to_tokens
+from brain.tool_format import ToolCallStream, parse_reply, request_format
+from brain.model_router import model_router, ROUTE_COMPLEX
+from brain.llm_queue import PRIORITY_CONSOLE
+from core.session import Session
 from memory.memory_manager import memory
 from speech.tts import speak, stop_speaking, get_tts
 from speech.stt import listen_once, is_available as stt_available
-from utils.logger import Logger
-import json
+from utils.logger import Logger, get_logger, flush as flush_log
+from utils import metrics, tracing
 from skills.registry import registry
 
 
@@ -46,6 +51,11 @@ RECALL_TRIGGERS = [
 # Wake words
 WAKE_WORDS = ["atlas", "at less", "at lass", "at last", "address"]
 
+log = get_logger("main")
+
+# Tool results always get at least this many tokens of the prompt
+MIN_TOOL_RESULT_TOKENS = 256
+
 
 def should_ask_to_remember(text):
     """Check if the message contains memory-worthy information."""
@@ -115,32 +125,121 @@ def format_facts_for_display(facts):
 
 
 from core.tool_router import router
+from core.tool_selector import selector
 from core.scheduler import Scheduler
+from core.file_index import file_index
+from core.cancellation import CancellationToken
+from core.orchestrator import VoiceOrchestrator
 
 class AtlasAssistant:
     """Main Atlas assistant."""
     
-    def __init__(self):
-        self.context = ContextManager()
-        self.pending_memory = None
-        self.pending_tool_call = None
+    def __init__(self, background=True):
+        """
+        Args:
+            background: Start the reminder scheduler, file index and metrics
+                exporter (off for replay, which must not touch user state)
+        """
+        # Conversation state for the local terminal/microphone user;
+        # server clients get their own Session objects
+        self.session = Session("local")
         self.running = True
         
+        # Recent interrupt-to-silence times
+        self.interrupt_latencies = deque(maxlen=50)
+        
+        # Set by the voice orchestrator to route notifications through its loop
+        self.notification_sink = None
+        
         # Start Scheduler for background tasks (reminders)
         self.scheduler = Scheduler(notification_callback=self.on_notification)
-        self.scheduler.start()
+        if background:
+            self.scheduler.start()
+            
+            # Keep the ATLAS_FILES index (find_files / search_files) current
+            file_index.start()
+            
+            # Periodic Prometheus text export (logs/metrics.prom)
+            metrics.start_exporter()
         
     def on_notification(self, message):
         """Handle background notifications."""
-        print(f"\n[Notification] {message}")
+        if self.notification_sink:
+            self.notification_sink(message)
+            return
+        log.status(f"\n[Notification] {message}")
         # Ideally, we should speak this if idle, or queue it.
         # For now, just print to avoid interrupting active conversation logic too much.
         # But user wants "voice alerts".
         # We can try to speak it.
         speak(message)
     
-    def process_command(self, user_input):
-        """Process a user command and return response."""
+    def begin_turn(self, session=None):
+        """Start a new cancellable turn."""
+        session = session or self.session
+        session.current_turn = CancellationToken()
+        return session.current_turn
+    
+    def end_turn(self, session=None):
+        """Mark the LLM/tool part of the turn as finished."""
+        session = session or self.session
+        session.current_turn = None
+    
+    def interrupt(self, reason):
+        """
+        Cancel the local session's active turn (LLM stream, pending tools,
+        speech) and record how long it took until the speakers went silent.
+        """
+        start = time.perf_counter()
+        turn = self.session.current_turn
+        tts = get_tts()
+        was_active = (turn is not None and not turn.cancelled) or tts.is_speaking()
+        
+        if turn:
+            turn.cancel(reason)
+        stop_speaking()
+        
+        if not was_active:
+            return None
+        
+        tts.wait_silent(timeout=1.0)
+        latency = time.perf_counter() - start
+        self.interrupt_latencies.append(latency)
+        Logger.debug(f"Interrupted by {reason}: silent after {latency * 1000:.0f} ms")
+        return latency
+    
+    def process_command(self, user_input, cancel_token=None, on_token=None, session=None, cache=True,
+                        priority=PRIORITY_CONSOLE):
+        """
+        Process a user command and return response.
+        
+        Args:
+            user_input: User message
+            cancel_token: Optional CancellationToken for this turn
+            on_token: Optional callback for streamed LLM text; called with
+                None before each follow-up generation in the same turn
+            session: Session to use (defaults to the local session)
+            cache: False to bypass the response cache for this turn
+            priority: LLM queue priority (voice turns jump ahead of console/API)
+        
+        Returns None if the turn was cancelled before a response was ready.
+        """
+        session = session or self.session
+        with tracing.span("process_command", session=session.id) as span:
+            response = self._process_command(user_input, cancel_token, on_token, session, cache, priority)
+            span.set(cancelled=response is None)
+            return response
+    
+    def _process_command(self, user_input, cancel_token, on_token, session, cache, priority):
+        token = cancel_token or CancellationToken()
+        session.touch()
+        
+        # Per-turn measurements, read by replay/benchmark tooling
+        turn = {"llm_calls": [], "tool_calls": [], "cache": cache, "priority": priority, "session": session.id}
+        current = tracing.current_span()
+        if current:
+            turn["trace_id"] = current.trace_id
+        session.last_turn = turn
         
         # Handle shutdown command
         if 'shutdown' in user_input.lower():
@@ -156,21 +255,21 @@ class AtlasAssistant:
 
         # Handle pending memory confirmation
         # Handle pending memory confirmation
-        if self.pending_memory:
+        if session.pending_memory:
             cleaned_input = re.sub(r'[^\w\s]', '', user_input.lower())
             affirmative = ['yes', 'y', 'sure', 'ok', 'okay', 'yeah', 'correct', 'right', 'please', 'absolutely', 'definitely']
             negative = ['no', 'n', 'nope', 'dont', 'do not', 'cancel', 'stop']
             
             if any(word in cleaned_input.split() for word in affirmative):
-                key, value, category = self.pending_memory
+                key, value, category = session.pending_memory
                 memory.store_fact(key, value, category)
-                self.pending_memory = None
+                session.pending_memory = None
                 return f"Noted. I'll remember that your {key} is {value}."
             elif any(word in cleaned_input.split() for word in negative):
-                self.pending_memory = None
+                session.pending_memory = None
                 return "Understood. I won't store that."
             else:
-                self.pending_memory = None
+                session.pending_memory = None
                 return "I didn't get a clear confirmation, so I won't store that."
         
         # Check for memory recall requests
@@ -182,85 +281,251 @@ class AtlasAssistant:
         if should_ask_to_remember(user_input):
             key, value, category = extract_fact_from_input(user_input)
             if key and value:
-                self.pending_memory = (key, value, category)
+                session.pending_memory = (key, value, category)
                 return f"Should I remember that your {key} is \"{value}\"?"
         
-        # Load current facts for context
-        facts = memory.list_facts()
-        system_prompt = get_prompt_with_memory(facts)
-        
-        # Build context with history
-        full_context = self.context.build_context(system_prompt, user_input)
-        
-        # Generate response
-        response = generate_response(user_input, full_context)
-        
         # Check for pending tool execution (confirmation received)
-        if self.pending_tool_call:
-            tool_name, tool_args = self.pending_tool_call
+        if session.pending_tool_call:
+            tool_name, tool_args = session.pending_tool_call
             
             cleaned_input = re.sub(r'[^\w\s]', '', user_input.lower())
             affirmative = ['yes', 'y', 'sure', 'proceed', 'go ahead', 'okay', 'ok', 'please', 'absolutely', 'definitely']
             
             if any(word in cleaned_input.split() for word in affirmative):
-                print(f"[Tool] User confirmed '{tool_name}'...")
-                result = router.execute_tool(tool_name, tool_args)
-                self.pending_tool_call = None
+                if token.cancelled:
+                    return None
+                log.status(f"[Tool] User confirmed '{tool_name}'...", tool=tool_name)
+                result = self._execute_tool(tool_name, tool_args, turn)
+                session.pending_tool_call = None
                 return f"Executed '{tool_name}'. Result: {result}"
             else:
-                self.pending_tool_call = None
+                session.pending_tool_call = None
                 return "Action cancelled."
 
+        # Describe only the tools relevant to this input, and pick the model
+        scores = selector.scores(user_input)
+        tool_names = selector.select(user_input, scores)
+        route = model_router.classify(user_input, scores)
+        model = model_router.model_for(route)
+        turn["route"] = route
+        full_context = self._build_prompt(user_input, tool_names, session, turn)
+        
+        # Generate response. On the tool route the small model only has to
+        # dispatch: its request is dropped as soon as it starts a text answer
+        escalate = model_router.should_escalate(route)
+        tool_call, response = self._generate(user_input, full_context, token, on_token, turn,
+                                             model, route, abort_on_reply=escalate)
+        if token.cancelled:
+            return None
+        model_router.record_outcome(route, tool_call is not None)
+        
+        # Cascade: no tool call, so the larger model answers
+        if escalate and tool_call is None:
+            model = model_router.model_for(ROUTE_COMPLEX)
+            turn["escalated"] = True
+            log.debug(f"Route '{route}' escalated to {model}", route=route, model=model)
+            tool_call, response = self._generate(user_input, full_context, token, on_token, turn, model, route)
+            if token.cancelled:
+                return None
+        
+        # Selection miss: the model asked for a tool it wasn't shown (a real
+        # one left out of the subset - the reply schema allows every tool -
+        # or an unknown name), so retry once with every tool described
+        if tool_names is not None and tool_call and tool_call["tool"] not in tool_names:
+            selector.record_miss()
+            log.debug(f"Tool selection miss: '{tool_call['tool']}' not in {tool_names}")
+            full_context = self._build_prompt(user_input, None, session, turn)
+            if on_token:
+                on_token(None)
+            tool_call, response = self._generate(user_input, full_context, token, on_token, turn, model, route)
+            if token.cancelled:
+                return None
+        
         # Check for tool call in response
         try:
-            if response.strip().startswith('{') and '"tool":' in response:
-                print(f"[Tool] LLM requested tool execution...")
-                try:
-                    # Clean response if it has markdown header/footer
-                    json_str = response.strip()
-                    if json_str.startswith('```json'):
-                        json_str = json_str[7:]
-                    if json_str.endswith('```'):
-                        json_str = json_str[:-3]
-                    
-                    tool_data = json.loads(json_str.strip())
-                    tool_name = tool_data.get('tool')
-                    args = tool_data.get('args', {})
-                    
-                    # Check safety
-                    if router.is_destructive(tool_name):
-                         print(f"[Tool] Safety check: '{tool_name}' requires confirmation.")
+            if tool_call:
+                log.status("[Tool] LLM requested tool execution...")
+                tool_name = tool_call["tool"]
+                args = tool_call["args"]
+                
+                # Check safety
+                if router.is_destructive(tool_name):
+                     log.status(f"[Tool] Safety check: '{tool_name}' requires confirmation.", tool=tool_name)
+                     
+                     # Preview content for file operations (only the changed hunks for edits)
+                     try:
+                         preview = router.preview(tool_name, args)
+                     except Exception as e:
+                         turn["tool_calls"].append({"tool": tool_name, "args": args, "executed": False, "error": str(e)})
+                         return f"I couldn't apply that edit to '{args.get('path', 'unknown')}': {e}"
+                     if preview is None and tool_name == 'create_file' and 'content' in args:
+                         preview = args['content']
+                     if preview is not None:
+                         log.status(f"\n--- Preview ({args.get('path', 'unknown')}) ---\n"
+                                    f"{preview}\n"
+                                    "------------------------------------------\n")
                          
-                         # Preview content for file operations
-                         if tool_name in ['create_file', 'edit_file'] and 'content' in args:
-                             print(f"\n--- Preview ({args.get('path', 'unknown')}) ---")
-                             print(args['content'])
-                             print("------------------------------------------\n")
-                             
-                         self.pending_tool_call = (tool_name, args)
-                         return f"I need to execute '{tool_name}' with arguments {args}. Should I proceed?"
-                    
-                    # Execute safe tool immediately
-                    print(f"[Tool] Executing '{tool_name}'...")
-                    result = router.execute_tool(tool_name, args)
-                    print(f"[Tool] Output: {result}")
-                    
-                    # Feed result back to LLM for final response
-                    tool_msg = f"\nSystem: Tool '{tool_name}' returned: {result}"
-                    full_context += tool_msg
-                    response = generate_response(user_input, full_context)
-                    
-                except json.JSONDecodeError:
-                    print("[Tool] Error: Invalid JSON parsing")
+                     turn["tool_calls"].append({"tool": tool_name, "args": args, "executed": False})
+                     session.pending_tool_call = (tool_name, args)
+                     if tool_name == 'edit_file':
+                         return f"I need to edit '{args.get('path', 'unknown')}' with the changes shown. Should I proceed?"
+                     return f"I need to execute '{tool_name}' with arguments {args}. Should I proceed?"
+                
+                # Execute safe tool immediately
+                if token.cancelled:
+                    return None
+                log.status(f"[Tool] Executing '{tool_name}'...", tool=tool_name)
+                result = self._execute_tool(tool_name, args, turn)
+                log.status(f"[Tool] Output: {result}", tool=tool_name)
+                
+                # Feed result back to LLM for final response
+                if token.cancelled:
+                    return None
+                # Cap the result (e.g. a large read_file) to what's left of the window
+                budget = max(MIN_TOOL_RESULT_TOKENS, session.context.remaining_tokens(full_context) - 32)
+                tool_msg = f"\nSystem: Tool '{tool_name}' returned: {truncate_to_tokens(str(result), budget)}"
+                full_context += tool_msg
+                if on_token:
+                    on_token(None)
+                _, response = self._generate(user_input, full_context, token, on_token, turn, model, route)
+                if token.cancelled:
+                    return None
+            
+            elif response.lstrip().startswith('{') and '"tool":' in response:
+                # Unparseable tool call (unconstrained model): don't hand raw JSON to the user
+                log.error("[Tool] Error: Invalid JSON parsing", reply=response)
+                response = "Sorry, I couldn't work out how to do that. Could you rephrase?"
         except Exception as e:
-            print(f"[Tool] Error: {e}")
+            log.error(f"[Tool] Error: {e}")
         
         # Store conversation
         memory.store_conversation(user_input, response)
-        self.context.add_exchange(user_input, response)
+        session.context.add_exchange(user_input, response)
         
         return response
     
+    def _build_prompt(self, user_input, tool_names, session, turn):
+        """Assemble the full prompt and record its size for this turn."""
+        # System prompt (facts + tools) is memoized until either changes
+        build_start = time.perf_counter()
+        with tracing.span("prompt.build") as span:
+            system_prompt = get_system_prompt(tool_names)
+            
+            # Build context with history
+            full_context = session.context.build_context(system_prompt, user_input)
+            turn["prompt"] = {"bytes": len(full_context.encode('utf-8')),
+                              "tools": len(tool_names) if tool_names is not None else len(router.tools),
+                              **session.context.last_build}
+            span.set(prompt_bytes=turn["prompt"]["bytes"], tools=turn["prompt"]["tools"],
+                     **session.context.last_build)
+        turn["prompt_build_seconds"] = round(time.perf_counter() - build_start, 4)
+        log.debug(f"Prompt: {turn['prompt']['bytes']} bytes, ~{turn['prompt']['estimated_tokens']} tokens, "
+                  f"{turn['prompt']['tools']} tools in {turn['prompt_build_seconds'] * 1000:.1f} ms",
+                  **turn["prompt"])
+        return full_context
+    
+    def _use_cache(self, turn, route):
+        """Response cache only for deterministic turns: cacheable routes, not escalated answers."""
+        return turn["cache"] and route in RESPONSE_CACHE_ROUTES and not turn.get("escalated")
+    
+    def _generate(self, user_input, full_context, token, on_token, turn, model=None, route=None,
+                  abort_on_reply=False):
+        """
+        Call the LLM and record prompt size and timings for this turn.
+        
+        Args:
+            model: Ollama model (default MODEL_NAME)
+            route: Model route this call was made for
+            abort_on_reply: Stop the request as soon as the reply turns out
+                not to be a tool call (nothing is streamed to on_token)
+        
+        Returns:
+            (tool_call, text) as from parse_reply; only reply text is streamed
+            to on_token, never a tool call's JSON
+        """
+        model = model or MODEL_NAME
+        stats = {}
+        first_token = []
+        detected = []
+        reader = ToolCallStream(None if abort_on_reply else on_token)
+        call_token, unregister = token.child() if abort_on_reply else (token, None)
+        
+        def on_chunk(chunk):
+            if chunk and not first_token:
+                first_token.append(time.perf_counter())
+            reader.feed(chunk)
+            if reader.kind and not detected:
+                detected.append(time.perf_counter())
+                if abort_on_reply and reader.kind != "tool":
+                    call_token.cancel("not a tool call")
+        
+        with tracing.span("llm", prompt_bytes=len(full_context.encode('utf-8')), model=model, route=route) as span:
+            start = span.start
+            try:
+                response = generate_response(user_input, full_context, cancel_token=call_token,
+                                             on_token=on_chunk if on_token or abort_on_reply else None,
+                                             stats=stats, format=request_format(), model=model,
+                                             think=THINK_ROUTES.get(route), cache=self._use_cache(turn, route),
+                                             priority=turn["priority"], session=turn["session"])
+            finally:
+                if unregister:
+                    unregister()
+            end = time.perf_counter()
+            if first_token:
+                span.set(first_token_ms=round((first_token[0] - start) * 1000, 1))
+            if detected:
+                # How soon the reply was known to be a tool call or text
+                span.set(reply_kind=reader.kind, kind_ms=round((detected[0] - start) * 1000, 1))
+            if stats.get("reasoning_tokens"):
+                span.set(reasoning_tokens=stats["reasoning_tokens"])
+            self._trace_llm_stages(start, stats)
+        call = {
+            "prompt_bytes": span.attrs["prompt_bytes"],
+            "prompt_tokens": estimate_tokens(full_context),
+            "seconds": round(end - start, 4),
+            "model": model,
+            "route": route,
+        }
+        call.update(stats)
+        turn["llm_calls"].append(call)
+        if stats.get("reasoning_tokens"):
+            turn["reasoning_tokens"] = turn.get("reasoning_tokens", 0) + stats["reasoning_tokens"]
+            log.debug(f"{model} spent ~{stats['reasoning_tokens']} reasoning tokens", route=route,
+                      model=model, reasoning_tokens=stats["reasoning_tokens"])
+        if route:
+            model_router.record_call(route, model, end - start)
+        
+        if call_token.cancelled and not token.cancelled:
+            # Abandoned on purpose: the caller escalates
+            call["aborted"] = True
+            return None, ""
+        return parse_reply(response)
+    
+    def _trace_llm_stages(self, start, stats):
+        """Record Ollama's own load/prefill/decode durations as child spans."""
+        at = start
+        for name, duration_key, count_key in (("llm.load", "load_duration", None),
+                                              ("llm.prefill", "prompt_eval_duration", "prompt_eval_count"),
+                                              ("llm.decode", "eval_duration", "eval_count")):
+            if duration_key not in stats:
+                continue
+            seconds = stats[duration_key] / 1e9
+            attrs = {"tokens": stats[count_key]} if count_key in stats else {}
+            tracing.record(name, at, at + seconds, **attrs)
+            at += seconds
+    
+    def _execute_tool(self, tool_name, args, turn):
+        """Run a tool and record it for this turn."""
+        with tracing.span("tool", tool=tool_name) as span:
+            result = router.execute_tool(tool_name, args)
+        turn["tool_calls"].append({
+            "tool": tool_name,
+            "args": args,
+            "executed": True,
+            "seconds": round(time.perf_counter() - span.start, 4),
+        })
+        return result
+    
     def speak_async(self, text):
         """Speak text without blocking."""
         def _speak():
@@ -281,25 +546,26 @@ class AtlasAssistant:
         
         # Initialize model
         if not initialize_model():
-            print("\n[!] Failed to connect to Ollama.")
+            log.error("[!] Failed to connect to Ollama.")
             return
             
         if not stt_available():
-            print("[!] Speech recognition not available")
+            log.error("[!] Speech recognition not available")
             return
             
         # Check wake listener
         wake = get_wake_listener()
         if not wake._initialized:
-            print("[!] Vosk wake detection not available. Falling back to simple mode.")
+            log.warning("[!] Vosk wake detection not available. Falling back to simple mode.")
             self.run_simple_wake_mode()
             return
 
         # Show facts count
         facts = memory.list_facts()
         if facts:
-            print(f"[Memory] Loaded {len(facts)} stored fact(s)")
+            log.status(f"[Memory] Loaded {len(facts)} stored fact(s)", facts=len(facts))
         
+        flush_log()
         print(f"\n{ASSISTANT_NAME} ready.")
         print(f"Say '{ASSISTANT_NAME}' to activate.")
         print("Or type 'exit' to quit.\n")
@@ -308,116 +574,16 @@ class AtlasAssistant:
         
         speak(f"{ASSISTANT_NAME} is ready, sir.", wait=True)
         
-        # Wake detection event
-        wake_event = threading.Event()
-        console_queue = queue.Queue()
-        
-        def on_wake():
-            stop_speaking()
-            wake_event.set()
-        
-        # Start wake listener
-        wake.start(on_wake)
-        
-        # Start console listener
-        def console_input_loop():
-            print("\nType a command at any time:")
-            while self.running:
-                try:
-                    text = input("> ").strip()
-                    if text:
-                        console_queue.put(text)
-                        wake_event.set()
-                except EOFError:
-                    break
-        
-        console_thread = threading.Thread(target=console_input_loop, daemon=True)
-        console_thread.start()
-        
+        orchestrator = VoiceOrchestrator(self, wake)
         try:
-            while self.running:
-                # Wait for wake word OR console input
-                wake_event.wait()
-                wake_event.clear()
-                
-                # Check if it was console input
-                if not console_queue.empty():
-                    command = console_queue.get()
-                    if command.lower() in ['exit', 'quit']:
-                        break
-                    
-                    print(f"\n{ASSISTANT_NAME}: ", end="", flush=True)
-                    response = self.process_command(command)
-                    print(response)
-                    speak(response, short_only=False, wait=False) # Non-blocking speech for text
-                    continue
-
-                # Voice Activation
-                print(f"\n✨ {ASSISTANT_NAME} activated!")
-                
-                # Stop any ongoing speech immediately (redundant but safe)
-                stop_speaking()
-                
-                # Confirmation
-                print(f"{ASSISTANT_NAME}: Yes?")
-                speak("Yes?", short_only=False, wait=True)
-                
-                # Start conversation loop
-                first_turn = True
-                while True:
-                    # Check console queue inside conversation loop too!
-                    if not console_queue.empty():
-                        command = console_queue.get()
-                        print(f"   (Text Input): \"{command}\"")
-                    else:
-                        # Pause wake listener before listening for command (avoid mic conflict)
-                        wake.pause()
-                        
-                        if first_turn:
-                             print("🎤 Listening for command...")
-                             command = listen_once(timeout=10)
-                             first_turn = False
-                        else:
-                             # Follow-up listen
-                             print(f"\n🎤 Listening for follow-up (10s timeout)...")
-                             command = listen_once(timeout=10)
-                        
-                        wake.resume()
-                    
-                    if command:
-                        print(f"   Heard: \"{command}\"")
-                        
-                        # Process
-                        print(f"\n{ASSISTANT_NAME}: ", end="", flush=True)
-                        response = self.process_command(command)
-                        print(response)
-                        
-                        # Speak response
-                        speak(response, short_only=False, wait=True)
-                        
-                        # Check if wake event happened during speech (Voice Barge-in)
-                        if wake_event.is_set() and console_queue.empty():
-                             print("\n[Interrupted]")
-                             wake_event.clear()
-                             first_turn = True 
-                             continue
-                        
-                        # Loop continues to listen again...
-                    else:
-                        print("   (Conversation timeout)")
-                        speak("Closing conversation.", short_only=True, wait=True)
-                        break # Exit conversation loop
-                
-                # Resume wake listener for next activation (redundant but safe)
-                wake.resume()
-                
+            asyncio.run(orchestrator.run())
         except KeyboardInterrupt:
             wake.stop()
             print(f"\n\n{ASSISTANT_NAME}: Goodbye.")
             speak("Goodbye.", wait=True)
         except Exception as e:
             wake.stop()
-            print(f"\n[Error] {e}")
+            log.error(f"[Error] {e}")
 
     def run_simple_wake_mode(self):
         """Fallback: uses STT for both wake detection and commands."""
@@ -440,17 +606,18 @@ class AtlasAssistant:
         print("Initializing...\n")
         
         if not initialize_model():
-            print("\n[!] Failed to connect to Ollama.")
+            log.error("[!] Failed to connect to Ollama.")
             return
         
         voice_enabled = stt_available()
         if voice_enabled:
-            print("[Voice] Speech-to-text ready")
+            log.status("[Voice] Speech-to-text ready")
         
         facts = memory.list_facts()
         if facts:
-            print(f"[Memory] Loaded {len(facts)} stored fact(s)")
+            log.status(f"[Memory] Loaded {len(facts)} stored fact(s)", facts=len(facts))
         
+        flush_log()
         print(f"\n{ASSISTANT_NAME} ready. Type 'exit' to quit.")
         if voice_enabled:
             print("Press ENTER to use voice input.\n")
@@ -471,12 +638,12 @@ class AtlasAssistant:
                 
                 # Voice input on empty ENTER
                 if not user_input and voice_enabled:
-                    print("🎤 Listening...")
+                    log.status("🎤 Listening...")
                     user_input = listen_once(timeout=10)
                     if user_input:
-                        print(f"   Heard: \"{user_input}\"")
+                        log.status(f"   Heard: \"{user_input}\"", text=user_input)
                     else:
-                        print("   (No speech detected)")
+                        log.status("   (No speech detected)")
                         continue
                 
                 if not user_input:
@@ -488,8 +655,10 @@ class AtlasAssistant:
                     speak(goodbye, wait=True)
                     break
                 
+                flush_log()
                 print(f"\n{ASSISTANT_NAME}: ", end="", flush=True)
                 response = self.process_command(user_input)
+                flush_log()
                 print(response)
                 speak(response, wait=True)
                 
@@ -497,14 +666,37 @@ class AtlasAssistant:
                 print(f"\n\n{ASSISTANT_NAME}: Goodbye.")
                 break
 
+    def run_server_mode(self):
+        """Serve the local HTTP/WebSocket API."""
+        from core.server import run_server
+        
+        print(f"\n{'='*50}")
+        print(f"  {ASSISTANT_NAME} - AI Assistant")
+        print(f"  Server Mode")
+        print(f"{'='*50}")
+        print("Initializing...\n")
+        
+        if not initialize_model():
+            log.error("[!] Failed to connect to Ollama.")
+            return
+        
+        run_server(self)
+
 
 def main():
     """Main entry point."""
-    atlas = AtlasAssistant()
+    # Replay is a headless benchmark: no reminders, indexing or metrics export
+    atlas = AtlasAssistant(background=sys.argv[1:2] != ['--replay'])
     
     # Check for command line args
     if len(sys.argv) > 1 and sys.argv[1] == '--manual':
         atlas.run_manual_mode()
+    elif len(sys.argv) > 1 and sys.argv[1] == '--serve':
+        atlas.run_server_mode()
+    elif len(sys.argv) > 1 and sys.argv[1] == '--replay':
+        from core.replay import run_replay
+        Logger.DEBUG = False
+        run_replay(atlas, sys.argv[2:])
     else:
         # Default to wake mode
         atlas.run_wake_mode()
@@ -2,13 +2,28 @@
 # Provides CRUD operations for persistent memory
 
 from memory.db import get_connection, get_timestamp
+from utils import metrics
+
+DB_CALL_SECONDS = metrics.histogram("atlas_db_call_seconds", "Memory database call latency by operation",
+                                    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0))
+
+
+def _timed(func):
+    """Record the call's latency under its method name."""
+    return metrics.timed(DB_CALL_SECONDS, op=func.__name__)(func)
 
 
 class MemoryManager:
     """Manages persistent memory operations."""
     
+    def __init__(self):
+        # Bumped on every fact change in this process, so callers can cache
+        # fact-derived text (the system prompt) until it changes
+        self.facts_version = 0
+    
     # ==================== FACTS ====================
     
+    @_timed
     def store_fact(self, key, value, category=None):
         """Store a new fact or update if exists."""
         conn = get_connection()
@@ -19,8 +34,10 @@ class MemoryManager:
         ''', (key.lower(), value, category, get_timestamp()))
         conn.commit()
         conn.close()
+        self.facts_version += 1
         return True
     
+    @_timed
     def update_fact(self, key, value):
         """Update an existing fact."""
         conn = get_connection()
@@ -31,8 +48,11 @@ class MemoryManager:
         affected = cursor.rowcount
         conn.commit()
         conn.close()
+        if affected:
+            self.facts_version += 1
         return affected > 0
     
+    @_timed
     def delete_fact(self, key):
         """Delete a fact by key."""
         conn = get_connection()
@@ -41,8 +61,11 @@ class MemoryManager:
         affected = cursor.rowcount
         conn.commit()
         conn.close()
+        if affected:
+            self.facts_version += 1
         return affected > 0
     
+    @_timed
     def get_fact(self, key):
         """Get a specific fact by key."""
         conn = get_connection()
@@ -52,6 +75,7 @@ class MemoryManager:
         conn.close()
         return {'value': result[0], 'category': result[1]} if result else None
     
+    @_timed
     def list_facts(self):
         """List all stored facts."""
         conn = get_connection()
@@ -63,6 +87,7 @@ class MemoryManager:
     
     # ==================== CONVERSATIONS ====================
     
+    @_timed
     def store_conversation(self, user_text, assistant_text):
         """Store a conversation exchange."""
         conn = get_connection()
@@ -75,6 +100,7 @@ class MemoryManager:
         conn.close()
         return True
     
+    @_timed
     def get_recent_conversations(self, limit=10):
         """Get recent conversations."""
         conn = get_connection()
@@ -89,6 +115,7 @@ class MemoryManager:
     
     # ==================== TASKS ====================
     
+    @_timed
     def add_task(self, task):
         """Add a new task."""
         conn = get_connection()
@@ -101,6 +128,7 @@ class MemoryManager:
         conn.close()
         return True
     
+    @_timed
     def list_tasks(self, status=None):
         """List tasks, optionally filtered by status."""
         conn = get_connection()
@@ -113,6 +141,7 @@ class MemoryManager:
         conn.close()
         return [{'id': r[0], 'task': r[1], 'status': r[2]} for r in results]
     
+    @_timed
     def complete_task(self, task_id):
         """Mark a task as complete."""
         conn = get_connection()
@@ -127,6 +156,7 @@ class MemoryManager:
     
     # ==================== NOTES ====================
     
+    @_timed
     def add_note(self, content):
         """Add a note."""
         conn = get_connection()
@@ -139,6 +169,7 @@ class MemoryManager:
         conn.close()
         return True
     
+    @_timed
     def list_notes(self, limit=20):
         """List recent notes."""
         conn = get_connection()
@@ -151,6 +182,7 @@ class MemoryManager:
 
     # ==================== REMINDERS ====================
     
+    @_timed
     def add_reminder(self, message, due_at):
         """Add a new reminder."""
         conn = get_connection()
@@ -164,6 +196,7 @@ class MemoryManager:
         conn.close()
         return rid
     
+    @_timed
     def list_pending_reminders(self):
         """List reminders that are pending."""
         conn = get_connection()
@@ -173,6 +206,7 @@ class MemoryManager:
         conn.close()
         return [{'id': r[0], 'message': r[1], 'due_at': r[2]} for r in results]
     
+    @_timed
     def complete_reminder(self, reminder_id):
         """Mark a reminder as triggered/completed."""
         conn = get_connection()
@@ -0,0 +1,296 @@
+# STT Calibration
+# Benchmarks Faster-Whisper settings on reference clips and saves the best
+# profile for this machine.
+#
+# Usage:
+#   python -m speech.calibrate --record      # first run: record reference clips
+#   python -m speech.calibrate
+#   python -m speech.calibrate --models tiny.en base.en --max-rtf 0.3
+#
+# Reference clips are 16 kHz mono WAV files in CALIBRATION_DIR, each with a
+# same-named .txt file holding the expected transcript. None are shipped (they
+# should be in the user's own voice and microphone); --record prompts for
+# RECORD_SENTENCES and saves them.
+
+import os
+import sys
+import json
+import time
+import wave
+import argparse
+import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from speech.stt import FasterWhisperSTT, WHISPER_AVAILABLE, SAMPLE_RATE, PROFILE_PATH
+
+if WHISPER_AVAILABLE:
+    import numpy as np
+
+try:
+    import sounddevice as sd
+    RECORDING_AVAILABLE = True
+except ImportError:
+    RECORDING_AVAILABLE = False
+
+CALIBRATION_DIR = os.path.join(os.path.dirname(__file__), '..', 'models', 'calibration')
+
+DEFAULT_MODELS = ["tiny.en", "base.en", "small.en"]
+DEFAULT_COMPUTE_TYPES = ["int8", "float32"]
+DEFAULT_BEAM_SIZES = [1, 5]
+
+# Read aloud by --record: typical commands, a mix of short and long
+RECORD_SENTENCES = [
+    "What time is it?",
+    "Create a file called notes dot txt and write buy milk and eggs.",
+    "Remind me to call the dentist tomorrow at ten in the morning.",
+    "Open Spotify and play my focus playlist.",
+    "Explain what the load config function does in the settings module.",
+    "Add a task to review the pull request before Friday.",
+]
+RECORD_SECONDS = 6.0
+
+
+def default_thread_counts():
+    """Candidate thread counts, leaving headroom for Ollama on the same CPU."""
+    cores = os.cpu_count() or 4
+    candidates = {2, 4, cores // 2, cores - 2}
+    return sorted(n for n in candidates if 0 < n <= cores)
+
+
+def load_clips(directory=CALIBRATION_DIR):
+    """
+    Load reference clips and transcripts.
+
+    Returns:
+        List of (name, float32 audio, duration seconds, reference text)
+    """
+    clips = []
+    if not os.path.isdir(directory):
+        return clips
+
+    for name in sorted(os.listdir(directory)):
+        if not name.lower().endswith('.wav'):
+            continue
+
+        wav_path = os.path.join(directory, name)
+        txt_path = os.path.splitext(wav_path)[0] + '.txt'
+        if not os.path.exists(txt_path):
+            print(f"[Calibrate] Skipping {name}: no transcript")
+            continue
+
+        try:
+            with wave.open(wav_path, 'rb') as wf:
+                if wf.getframerate() != SAMPLE_RATE or wf.getnchannels() != 1 or wf.getsampwidth() != 2:
+                    print(f"[Calibrate] Skipping {name}: expected 16 kHz mono 16-bit")
+                    continue
+                frames = wf.readframes(wf.getnframes())
+        except (wave.Error, EOFError) as e:
+            print(f"[Calibrate] Skipping {name}: not a valid WAV file ({e})")
+            continue
+
+        with open(txt_path, 'r', encoding='utf-8') as f:
+            reference = f.read().strip()
+
+        audio = np.frombuffer(frames, dtype=np.int16).astype(np.float32) / 32768.0
+        clips.append((name, audio, len(audio) / SAMPLE_RATE, reference))
+
+    return clips
+
+
+def record_clips(directory=CALIBRATION_DIR, sentences=RECORD_SENTENCES, seconds=RECORD_SECONDS):
+    """
+    Record reference clips from the microphone.
+
+    Each sentence is saved as clip_NN.wav (16 kHz mono 16-bit) with its
+    transcript in clip_NN.txt; existing clips with those names are replaced.
+
+    Returns:
+        Number of clips written
+    """
+    os.makedirs(directory, exist_ok=True)
+    print(f"[Calibrate] Recording {len(sentences)} clip(s) into {directory}")
+    print(f"[Calibrate] Read each sentence normally; recording lasts {seconds:.0f}s.\n")
+
+    written = 0
+    for index, sentence in enumerate(sentences, 1):
+        input(f'  {index}/{len(sentences)}  "{sentence}"\n  Press Enter and speak...')
+        audio = sd.rec(int(seconds * SAMPLE_RATE), samplerate=SAMPLE_RATE, channels=1, dtype='int16')
+        sd.wait()
+        audio = audio.reshape(-1)
+
+        # Trim leading/trailing silence, keeping a little padding
+        loud = np.flatnonzero(np.abs(audio.astype(np.int32)) > 500)
+        if not len(loud):
+            print("  (Nothing heard; skipped)\n")
+            continue
+        pad = SAMPLE_RATE // 5
+        audio = audio[max(0, loud[0] - pad):loud[-1] + pad]
+
+        base = os.path.join(directory, f"clip_{index:02d}")
+        with wave.open(base + '.wav', 'wb') as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(SAMPLE_RATE)
+            wf.writeframes(audio.tobytes())
+        with open(base + '.txt', 'w', encoding='utf-8') as f:
+            f.write(sentence + "\n")
+        written += 1
+        print(f"  Saved {os.path.basename(base)}.wav ({len(audio) / SAMPLE_RATE:.1f}s)\n")
+    return written
+
+
+def _normalize_words(text):
+    """Lowercase and strip punctuation for WER scoring."""
+    cleaned = ''.join(c if c.isalnum() or c.isspace() or c == "'" else ' ' for c in text.lower())
+    return cleaned.split()
+
+
+def word_error_rate(reference, hypothesis):
+    """Word-level Levenshtein distance divided by reference length."""
+    ref = _normalize_words(reference)
+    hyp = _normalize_words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, 1):
+            cost = 0 if ref_word == hyp_word else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+        previous = current
+
+    return previous[-1] / len(ref)
+
+
+def benchmark(profile, clips):
+    """
+    Run one profile over all clips.
+
+    Returns:
+        Result dict with real-time factor and mean WER, or None if the model failed to load
+    """
+    stt = FasterWhisperSTT(profile=profile)
+    stt._initialize()
+    if not stt._initialized:
+        return None
+
+    # Warm-up so one-time allocation doesn't skew the first clip
+    stt.transcribe(clips[0][1][:SAMPLE_RATE])
+
+    total_audio = 0.0
+    total_time = 0.0
+    errors = []
+    for name, audio, duration, reference in clips:
+        start = time.perf_counter()
+        text = stt.transcribe(audio)
+        total_time += time.perf_counter() - start
+        total_audio += duration
+        errors.append(word_error_rate(reference, text))
+
+    result = dict(profile)
+    result["rtf"] = round(total_time / total_audio, 4)
+    result["wer"] = round(sum(errors) / len(errors), 4)
+    return result
+
+
+def choose_profile(results, max_rtf, wer_tolerance):
+    """
+    Pick the fastest profile whose WER is within tolerance of the best and
+    whose RTF is within max_rtf. If no accurate profile is fast enough, falls
+    back to the fastest accurate one (never a less accurate profile).
+    """
+    best_wer = min(r["wer"] for r in results)
+    accurate = [r for r in results if r["wer"] <= best_wer + wer_tolerance]
+    fast_enough = [r for r in accurate if r["rtf"] <= max_rtf]
+    pool = fast_enough or accurate
+    return min(pool, key=lambda r: (r["rtf"], r["wer"]))
+
+
+def save_profile(chosen, results, path=PROFILE_PATH):
+    """Write the chosen profile and the full result table."""
+    profile = {
+        "model_size": chosen["model_size"],
+        "compute_type": chosen["compute_type"],
+        "cpu_threads": chosen["cpu_threads"],
+        "beam_size": chosen["beam_size"],
+        "rtf": chosen["rtf"],
+        "wer": chosen["wer"],
+        "cpu_count": os.cpu_count(),
+        "calibrated_at": datetime.datetime.now().isoformat(timespec='seconds'),
+        "results": results,
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(profile, f, indent=2)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calibrate Faster-Whisper settings for this machine.")
+    parser.add_argument('--clips', default=CALIBRATION_DIR, help="Directory of reference WAV/TXT pairs")
+    parser.add_argument('--models', nargs='+', default=DEFAULT_MODELS)
+    parser.add_argument('--compute-types', nargs='+', default=DEFAULT_COMPUTE_TYPES)
+    parser.add_argument('--threads', nargs='+', type=int, default=default_thread_counts())
+    parser.add_argument('--beams', nargs='+', type=int, default=DEFAULT_BEAM_SIZES)
+    parser.add_argument('--max-rtf', type=float, default=0.5, help="Real-time factor budget")
+    parser.add_argument('--wer-tolerance', type=float, default=0.02, help="Allowed WER above the best run")
+    parser.add_argument('--output', default=PROFILE_PATH)
+    parser.add_argument('--record', action='store_true',
+                        help="Record reference clips from the microphone first")
+    args = parser.parse_args(argv)
+
+    if not WHISPER_AVAILABLE:
+        print("[Calibrate] Faster-Whisper not available")
+        return 1
+
+    if args.record:
+        if not RECORDING_AVAILABLE:
+            print("[Calibrate] sounddevice not available; cannot record")
+            return 1
+        if not record_clips(args.clips):
+            print("[Calibrate] No clips recorded")
+            return 1
+
+    clips = load_clips(args.clips)
+    if not clips:
+        print(f"[Calibrate] No reference clips found in {args.clips}")
+        print("[Calibrate] Record some with: python -m speech.calibrate --record")
+        return 1
+
+    audio_seconds = sum(c[2] for c in clips)
+    print(f"[Calibrate] {len(clips)} clip(s), {audio_seconds:.1f}s of audio")
+
+    results = []
+    for model_size in args.models:
+        for compute_type in args.compute_types:
+            for threads in args.threads:
+                for beam in args.beams:
+                    profile = {
+                        "model_size": model_size,
+                        "compute_type": compute_type,
+                        "cpu_threads": threads,
+                        "beam_size": beam,
+                    }
+                    result = benchmark(profile, clips)
+                    if result is None:
+                        continue
+                    results.append(result)
+                    print(f"  {model_size:<10} {compute_type:<8} threads={threads:<3} beam={beam}  "
+                          f"RTF={result['rtf']:.3f}  WER={result['wer']:.3f}")
+
+    if not results:
+        print("[Calibrate] No configuration could be benchmarked")
+        return 1
+
+    chosen = choose_profile(results, args.max_rtf, args.wer_tolerance)
+    path = save_profile(chosen, results, args.output)
+    print(f"\n[Calibrate] Selected {chosen['model_size']} / {chosen['compute_type']} / "
+          f"{chosen['cpu_threads']} threads / beam {chosen['beam_size']} "
+          f"(RTF {chosen['rtf']:.3f}, WER {chosen['wer']:.3f})")
+    print(f"[Calibrate] Profile saved to {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+# Phrase Cache
+# Pre-rendered audio for short phrases the assistant says constantly,
+# so they skip live synthesis on the critical path after wake detection.
+
+import os
+import wave
+import hashlib
+import threading
+from collections import OrderedDict
+
+from config import ASSISTANT_NAME
+from speech.playback import PLAYBACK_AVAILABLE
+from speech.tts_backends import read_wav
+
+CACHE_DIR = os.path.join(os.path.dirname(__file__), '..', 'cache', 'tts')
+
+# Rendered once and never evicted
+PRESET_PHRASES = [
+    "Yes?",
+    "Closing conversation.",
+    "Reminder confirmed.",
+    f"{ASSISTANT_NAME} is ready, sir.",
+    "Goodbye.",
+    "Action cancelled.",
+]
+
+# Dynamically added phrases kept before least-recently-used eviction
+MAX_DYNAMIC_PHRASES = 32
+
+
+class PhraseCache:
+    """PCM cache keyed by voice settings and text, backed by WAV files on disk."""
+
+    def __init__(self, cache_dir=CACHE_DIR, max_dynamic=MAX_DYNAMIC_PHRASES):
+        self.cache_dir = cache_dir
+        self.max_dynamic = max_dynamic
+        self.voice_key = ""
+        self.pinned = {}
+        self.dynamic = OrderedDict()
+        self.failed = set()
+        self._lock = threading.Lock()
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def set_voice(self, voice_key):
+        """Switch voice settings; in-memory entries for the old voice are dropped."""
+        with self._lock:
+            if voice_key != self.voice_key:
+                self.voice_key = voice_key
+                self.pinned.clear()
+                self.dynamic.clear()
+                self.failed.clear()
+
+    def _path(self, text):
+        key = hashlib.sha1(f"{self.voice_key}|{text}".encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.wav")
+
+    def _store(self, text, entry, pinned):
+        if pinned:
+            self.pinned[text] = entry
+            return
+
+        self.dynamic[text] = entry
+        self.dynamic.move_to_end(text)
+        while len(self.dynamic) > self.max_dynamic:
+            old_text, _ = self.dynamic.popitem(last=False)
+            try:
+                os.remove(self._path(old_text))
+            except OSError:
+                pass
+
+    def get(self, text):
+        """Return (pcm, samplerate) for a cached phrase, or None."""
+        if not PLAYBACK_AVAILABLE:
+            return None
+
+        with self._lock:
+            if text in self.pinned:
+                return self.pinned[text]
+            if text in self.dynamic:
+                self.dynamic.move_to_end(text)
+                return self.dynamic[text]
+            return None
+
+    def needs_render(self, text):
+        """True if the phrase has no usable audio yet."""
+        with self._lock:
+            return text not in self.pinned and text not in self.dynamic and text not in self.failed
+
+    def _write(self, path, pcm, samplerate):
+        """Atomically write int16 samples as a WAV file."""
+        tmp_path = path + ".tmp"
+        with wave.open(tmp_path, 'wb') as wf:
+            wf.setnchannels(1 if pcm.ndim == 1 else pcm.shape[1])
+            wf.setsampwidth(2)
+            wf.setframerate(samplerate)
+            wf.writeframes(pcm.tobytes())
+        os.replace(tmp_path, path)
+
+    def render(self, backend, text, pinned=False):
+        """
+        Synthesize a phrase with the backend, or load it from disk if already
+        rendered for this voice. Must be called on the thread that owns the
+        backend.
+
+        Returns:
+            True if the phrase is now cached
+        """
+        if not PLAYBACK_AVAILABLE:
+            return False
+
+        path = self._path(text)
+        try:
+            if not os.path.exists(path):
+                pcm, samplerate = backend.synthesize(text)
+                self._write(path, pcm, samplerate)
+
+            entry = read_wav(path)
+        except Exception as e:
+            # Some drivers write formats we can't decode (e.g. AIFF); speak those live
+            print(f"[TTS Cache] Could not cache '{text}': {e}")
+            with self._lock:
+                self.failed.add(text)
+            return False
+
+        with self._lock:
+            self._store(text, entry, pinned)
+        return True
+
@@ -0,0 +1,93 @@
+# Audio Playback
+# Plays PCM buffers in short blocks so speech can be cut off mid-utterance.
+
+import time
+import threading
+
+try:
+    import sounddevice as sd
+    PLAYBACK_AVAILABLE = True
+except ImportError:
+    PLAYBACK_AVAILABLE = False
+
+# Playback granularity; also the upper bound on stop latency
+BLOCK_MS = 20
+
+
+class AudioPlayer:
+    """Blocking, interruptible PCM player with a reusable output stream."""
+
+    def __init__(self, block_ms=BLOCK_MS):
+        self.block_ms = block_ms
+        self.stream = None
+        self._format = None
+        self._stop = threading.Event()
+        self._stop_requested_at = None
+        self.last_stop_latency = None
+
+    def _ensure_stream(self, samplerate, channels):
+        """Open (or reopen for a new format) the output stream."""
+        if self.stream and self._format == (samplerate, channels):
+            if not self.stream.active:
+                self.stream.start()
+            return
+
+        self.close()
+        self.stream = sd.OutputStream(samplerate=samplerate, channels=channels, dtype='int16', latency='low')
+        self.stream.start()
+        self._format = (samplerate, channels)
+
+    def play(self, pcm, samplerate, still_current=None):
+        """
+        Play int16 samples and block until finished or stopped.
+
+        Args:
+            pcm: int16 samples (mono, or frames x channels)
+            samplerate: Sample rate in Hz
+            still_current: Optional callable; False means the buffer was
+                superseded (e.g. by stop_speaking) and must not play
+
+        Returns:
+            True if played to the end, False if interrupted
+        """
+        if not PLAYBACK_AVAILABLE:
+            return False
+
+        self._stop.clear()
+        # A stop() that landed between the caller's check and the clear
+        # above is lost; the caller's state (bumped before stop()) isn't
+        if still_current is not None and not still_current():
+            self._stopped()
+            return False
+        channels = 1 if pcm.ndim == 1 else pcm.shape[1]
+        self._ensure_stream(samplerate, channels)
+
+        block = max(1, int(samplerate * self.block_ms / 1000))
+        for start in range(0, len(pcm), block):
+            if self._stop.is_set():
+                self.stream.abort()
+                self._stopped()
+                return False
+            self.stream.write(pcm[start:start + block])
+        return True
+
+    def _stopped(self):
+        if self._stop_requested_at is not None:
+            self.last_stop_latency = time.perf_counter() - self._stop_requested_at
+            self._stop_requested_at = None
+
+    def stop(self):
+        """Request playback to stop at the next block boundary."""
+        self._stop_requested_at = time.perf_counter()
+        self._stop.set()
+
+    def close(self):
+        """Close the output stream."""
+        if self.stream:
+            try:
+                self.stream.abort()
+                self.stream.close()
+            except Exception:
+                pass
+            self.stream = None
+            self._format = None
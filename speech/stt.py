@@ -1,53 +1,99 @@
 import os
+import json
 import time
-import wave
-import tempfile
 import struct
 import math
 import queue
 
+from utils import metrics, tracing
+from utils.logger import get_logger
+
+log = get_logger("stt")
+
 try:
+    import numpy as np
     import sounddevice as sd
     from faster_whisper import WhisperModel
     WHISPER_AVAILABLE = True
 except ImportError as e:
     WHISPER_AVAILABLE = False
-    print(f"[STT Warning] Could not import: {e}")
+    log.warning(f"[STT Warning] Could not import: {e}")
 
 SAMPLE_RATE = 16000
 BLOCK_SIZE = 1024
 CHANNELS = 1
 DTYPE = 'int16'
 
+# Written by `python -m speech.calibrate`, loaded at startup if present
+PROFILE_PATH = os.path.join(os.path.dirname(__file__), '..', 'stt_profile.json')
+
+STT_LISTENS = metrics.counter("atlas_stt_listens_total", "listen_once calls by result")
+STT_RECORD_SECONDS = metrics.histogram("atlas_stt_record_seconds", "Time spent recording a command")
+STT_TRANSCRIBE_SECONDS = metrics.histogram("atlas_stt_transcribe_seconds", "Whisper transcription time")
+STT_REAL_TIME_FACTOR = metrics.histogram("atlas_stt_real_time_factor", "Transcription time / audio duration",
+                                         buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0))
+
+DEFAULT_PROFILE = {
+    "model_size": "base.en",
+    "compute_type": "int8",
+    "cpu_threads": 4,
+    "beam_size": 5,
+}
+
+
+def load_profile(path=PROFILE_PATH):
+    """Load the calibrated STT profile, falling back to defaults."""
+    profile = dict(DEFAULT_PROFILE)
+    if not os.path.exists(path):
+        return profile
+    
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        for key in DEFAULT_PROFILE:
+            if key in saved:
+                profile[key] = saved[key]
+    except Exception as e:
+        log.warning(f"[STT Warning] Ignoring unreadable profile: {e}", path=path)
+    return profile
+
 
 class FasterWhisperSTT:
     """STT engine using Faster-Whisper."""
     
-    def __init__(self):
+    def __init__(self, profile=None):
+        if profile is None:
+            profile = load_profile()
+        
         self.model = None
-        self.model_size = "base.en"
+        self.model_size = profile["model_size"]
         self.device = "cpu"
-        self.compute_type = "int8"
+        self.compute_type = profile["compute_type"]
+        self.cpu_threads = profile["cpu_threads"]
+        self.beam_size = profile["beam_size"]
         self._initialized = False
         
     def _initialize(self):
         """Initialize Whisper model."""
         if not WHISPER_AVAILABLE:
-            print("[STT Error] Faster-Whisper not available")
+            log.error("[STT Error] Faster-Whisper not available")
             return
         
-        print(f"[STT] Loading Faster-Whisper model '{self.model_size}' on {self.device}...")
+        log.status(f"[STT] Loading Faster-Whisper model '{self.model_size}' "
+                   f"({self.compute_type}, {self.cpu_threads} threads, beam {self.beam_size}) on {self.device}...",
+                   model=self.model_size, compute_type=self.compute_type,
+                   cpu_threads=self.cpu_threads, beam_size=self.beam_size)
         try:
             self.model = WhisperModel(
                 self.model_size, 
                 device=self.device, 
                 compute_type=self.compute_type,
-                cpu_threads=4
+                cpu_threads=self.cpu_threads
             )
             self._initialized = True
-            print("[STT] Model loaded successfully")
+            log.status("[STT] Model loaded successfully")
         except Exception as e:
-            print(f"[STT Error] Failed to load model: {e}")
+            log.error(f"[STT Error] Failed to load model: {e}")
 
     def is_speech(self, data, threshold=1000):
         """Simple energy-based speech detection."""
@@ -77,8 +123,9 @@ class FasterWhisperSTT:
         silence_start = None
         has_speech = False
         start_time = time.time()
+        record_start = time.perf_counter()
         
-        print("   (Recording...)")
+        log.status("   (Recording...)")
         
         try:
             with sd.RawInputStream(
@@ -111,52 +158,69 @@ class FasterWhisperSTT:
                         pass
                         
         except Exception as e:
-            print(f"[STT Rec Error] {e}")
+            log.error(f"[STT Rec Error] {e}")
+            STT_LISTENS.inc(result="error")
             return ""
+        
+        record_end = time.perf_counter()
+        tracing.record("stt.record", record_start, record_end, speech=has_speech)
+        STT_RECORD_SECONDS.observe(record_end - record_start)
             
         if not recorded_frames or not has_speech:
+            STT_LISTENS.inc(result="no_speech")
             return ""
             
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
-            temp_filename = f.name
+        audio = np.frombuffer(b"".join(recorded_frames), dtype=np.int16)
+        with tracing.span("stt.transcribe", audio_seconds=round(len(audio) / SAMPLE_RATE, 2)):
+            text = self.transcribe(audio.astype(np.float32) / 32768.0)
+        
+        if not text or len(text) < 2:
+            STT_LISTENS.inc(result="empty")
+            return ""
             
-        try:
-            with wave.open(temp_filename, 'wb') as wf:
-                wf.setnchannels(CHANNELS)
-                wf.setsampwidth(2)
-                wf.setframerate(SAMPLE_RATE)
+        ignored_phrases = [
+            "subtitle", "subtitles", 
+            "thank you", "thanks for watching", 
+            "copyright", "all rights reserved"
+        ]
+        
+        if any(phrase in text.lower() for phrase in ignored_phrases):
+            log.status(f"[STT Filtered] Ignored noise: '{text}'", text=text)
+            STT_LISTENS.inc(result="filtered")
+            return ""
+        
+        STT_LISTENS.inc(result="ok")
+        return text
 
+    def transcribe(self, audio):
+        """
+        Transcribe 16 kHz mono float32 audio with the active profile.
+        
+        Args:
+            audio: numpy float32 array in [-1, 1]
+            
+        Returns:
+            Transcribed text, or "" on failure
+        """
+        start = time.perf_counter()
+        try:
             segments, info = self.model.transcribe(
-                temp_filename, 
-                beam_size=5,
+                audio, 
+                beam_size=self.beam_size,
                 language="en",
                 vad_filter=True
             )
-            
+            # Segments are decoded lazily, so time the join as well
             text = " ".join([segment.text for segment in segments]).strip()
-            
-            if not text or len(text) < 2:
-                return ""
-                
-            ignored_phrases = [
-                "subtitle", "subtitles", 
-                "thank you", "thanks for watching", 
-                "copyright", "all rights reserved"
-            ]
-            
-            if any(phrase in text.lower() for phrase in ignored_phrases):
-                print(f"[STT Filtered] Ignored noise: '{text}'")
-                return ""
-                
+            elapsed = time.perf_counter() - start
+            STT_TRANSCRIBE_SECONDS.observe(elapsed)
+            if len(audio):
+                STT_REAL_TIME_FACTOR.observe(elapsed / (len(audio) / SAMPLE_RATE))
             return text
             
         except Exception as e:
-            print(f"[STT Transcribe Error] {e}")
+            log.error(f"[STT Transcribe Error] {e}")
             return ""
-            
-        finally:
-            if os.path.exists(temp_filename):
-                os.remove(temp_filename)
 
 
 _stt = None
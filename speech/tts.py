@@ -1,12 +1,34 @@
-import pyttsx3
 import threading
 import queue
 import re
 import time
+from collections import deque
+
+from speech.phrase_cache import PhraseCache, PRESET_PHRASES
+from speech.playback import AudioPlayer
+from speech.tts_backends import create_backend
+from utils import metrics, tracing
+
+# Synthesized sentences waiting for playback; bounds look-ahead synthesis
+PLAYBACK_QUEUE_SIZE = 2
+
+TTS_UTTERANCES = metrics.counter("atlas_tts_utterances_total", "Texts queued for speaking")
+TTS_START_SECONDS = metrics.histogram("atlas_tts_start_seconds", "Queue to first audio per utterance")
+TTS_SYNTH_SECONDS = metrics.histogram("atlas_tts_synthesize_seconds", "Synthesis time per sentence (buffered backends)")
+TTS_PHRASE_CACHE = metrics.counter("atlas_tts_phrase_cache_total", "Phrase cache lookups by result")
+TTS_STOPS = metrics.counter("atlas_tts_stops_total", "stop_speaking() calls (barge-in, new turn)")
+TTS_QUEUE_DEPTH = metrics.gauge("atlas_tts_queue_depth", "Items waiting in the TTS queues")
 
 
 class TTSEngine:
-    """Thread-safe text-to-speech engine using a dedicated worker thread."""
+    """
+    Thread-safe text-to-speech engine.
+    
+    A synthesis worker turns queued text into audio with the configured
+    backend while a playback worker plays the previous sentence, so
+    multi-sentence responses are gapless. Backends without buffer support
+    (pyttsx3, the default) speak live on the synthesis worker instead.
+    """
     
     _instance = None
     _lock = threading.Lock()
@@ -23,68 +45,153 @@ class TTSEngine:
         if self._initialized:
             return
         
-        self.engine = None
+        self.backend = None
         self.speech_queue = queue.Queue()
+        self.playback_queue = queue.Queue(maxsize=PLAYBACK_QUEUE_SIZE)
+        self.player = AudioPlayer()
         self.worker_thread = None
+        self.playback_thread = None
         self.is_running = False
-        self._stop_current = False
         self._initialized = False
         
+        # Bumped by stop_speaking(); queued items from older generations are dropped
+        self._generation = 0
+        
+        # Set while audio is actually coming out of the speakers
+        self._audio_active = threading.Event()
+        
+        # Queue-to-audio latency of recent utterances (seconds)
+        self.latencies = deque(maxlen=50)
+        self._utterance_queued_at = None
+        
+        # Span of the turn that queued the current utterance (for tracing)
+        self._utterance_parent = None
+        self._started_utterance = None
+        
+        TTS_QUEUE_DEPTH.set_function(self.speech_queue.qsize, queue="speech")
+        TTS_QUEUE_DEPTH.set_function(self.playback_queue.qsize, queue="playback")
+        
+        # Frequent phrases are rendered to audio while idle and played directly
+        self.phrase_cache = PhraseCache()
+        self._pending_renders = deque((self._clean_text(p), True) for p in PRESET_PHRASES)
+        
         self._start_worker()
     
     def _start_worker(self):
-        """Start the TTS worker thread."""
+        """Start the TTS worker threads."""
         try:
             self.is_running = True
             self.worker_thread = threading.Thread(target=self._worker_loop, daemon=True)
             self.worker_thread.start()
+            if not self.playback_thread or not self.playback_thread.is_alive():
+                self.playback_thread = threading.Thread(target=self._playback_loop, daemon=True)
+                self.playback_thread.start()
             self._initialized = True
         except Exception as e:
             pass
 
+    def _init_backend(self):
+        """Create the synthesis backend (worker thread only)."""
+        try:
+            self.backend = create_backend(on_started=self._on_utterance_started)
+            self.phrase_cache.set_voice(self.backend.voice_key())
+        except Exception as e:
+            print(f"[TTS Error] Engine init failed: {e}")
+            self.backend = None
+
+    def _reset_backend(self):
+        """Drop a failed backend so the next utterance re-initializes it."""
+        if self.backend:
+            self.backend.close()
+        self.backend = None
+
+    def _on_utterance_started(self, name):
+        """Record how long the utterance waited between queueing and audio."""
+        if self._utterance_queued_at is not None:
+            self._mark_started(self._utterance_queued_at, self._utterance_parent)
+            self.latencies.append(time.perf_counter() - self._utterance_queued_at)
+            self._utterance_queued_at = None
+    
+    def _mark_started(self, queued_at, parent):
+        """Record queue-to-first-audio once per utterance (all its sentences share queued_at)."""
+        if self._started_utterance is queued_at:
+            return
+        self._started_utterance = queued_at
+        now = time.perf_counter()
+        TTS_START_SECONDS.observe(now - queued_at)
+        if parent:
+            tracing.record("tts.start", queued_at, now, parent=parent)
+
+    def _render_pending(self):
+        """Render one queued phrase into the cache while the worker is idle."""
+        while self._pending_renders and self.backend:
+            text, pinned = self._pending_renders.popleft()
+            if self.phrase_cache.needs_render(text):
+                self.phrase_cache.render(self.backend, text, pinned)
+                return
+
     def _worker_loop(self):
-        """Worker thread that processes speech requests."""
+        """Synthesis worker: turns queued text into audio or live speech."""
         try:
+            self._init_backend()
+            
             while self.is_running:
                 try:
-                    if self.engine:
-                        del self.engine
-                    self.engine = pyttsx3.init()
-                    self._configure_voice()
-                except Exception:
-                    pass
+                    item = self.speech_queue.get(timeout=0.5)
+                except queue.Empty:
+                    self._render_pending()
+                    continue
+                
+                if item is None:
+                    self.speech_queue.task_done()
+                    break
+                
+                text, queued_at, generation, parent = item
                 try:
-                    text = self.speech_queue.get(timeout=0.5)
-                    
-                    if text is None:
-                        break
+                    if generation != self._generation:
+                        continue
                     
-                    if self._stop_current:
-                        self._stop_current = False
-                        self.speech_queue.task_done()
+                    cached = self.phrase_cache.get(text)
+                    TTS_PHRASE_CACHE.inc(result="hit" if cached else "miss")
+                    if cached:
+                        self.playback_queue.put((cached, queued_at, generation, parent))
                         continue
                     
-                    time.sleep(0.2)
-                    safe_text = ". " + text
+                    if self.backend is None:
+                        self._init_backend()
+                    if not self.backend:
+                        continue
                     
-                    if self.engine:
-                        self.engine.say(safe_text)
-                        self.engine.runAndWait()
-
+                    if self.backend.buffered:
+                        synth_start = time.perf_counter()
+                        audio = self.backend.synthesize(text)
+                        synth_end = time.perf_counter()
+                        TTS_SYNTH_SECONDS.observe(synth_end - synth_start)
+                        if parent:
+                            tracing.record("tts.synthesize", synth_start, synth_end,
+                                           parent=parent, chars=len(text))
+                        if generation == self._generation:
+                            self.playback_queue.put((audio, queued_at, generation, parent))
+                    else:
+                        # Live speech must not overlap cached audio still playing
+                        self.playback_queue.join()
+                        if generation == self._generation:
+                            self._utterance_queued_at = queued_at
+                            self._utterance_parent = parent
+                            self._audio_active.set()
+                            speak_start = time.perf_counter()
+                            try:
+                                self.backend.speak(text)
+                            finally:
+                                self._audio_active.clear()
+                                if parent:
+                                    tracing.record("tts.speak", speak_start, time.perf_counter(),
+                                                   parent=parent, chars=len(text))
+                except Exception as e:
+                    print(f"[TTS Error] {e}")
+                    self._reset_backend()
+                finally:
                     self.speech_queue.task_done()
-
-                except queue.Empty:
-                    continue
-                except Exception:
-                    try:
-                        if self.engine:
-                            self.engine.endLoop()
-                    except:
-                        pass
-                    try:
-                        self.speech_queue.task_done()
-                    except ValueError:
-                        pass
                     
         except Exception:
             pass
@@ -92,27 +199,62 @@ class TTSEngine:
             self._initialized = False
             self.is_running = False
 
+    def _playback_loop(self):
+        """Playback worker: plays synthesized audio in order."""
+        while True:
+            (pcm, samplerate), queued_at, generation, parent = self.playback_queue.get()
+            try:
+                if generation == self._generation:
+                    started = time.perf_counter()
+                    self._mark_started(queued_at, parent)
+                    self.latencies.append(started - queued_at)
+                    self._audio_active.set()
+                    # Re-checked after the player resets its stop flag, so a
+                    # stop_speaking() racing this check can't be lost
+                    self.player.play(pcm, samplerate, lambda: generation == self._generation)
+                    if parent:
+                        tracing.record("tts.play", started, time.perf_counter(), parent=parent,
+                                       audio_seconds=round(len(pcm) / samplerate, 2))
+            except Exception as e:
+                print(f"[TTS Playback Error] {e}")
+            finally:
+                self._audio_active.clear()
+                self.playback_queue.task_done()
+
     def wait(self):
         """Wait for TTS to finish speaking."""
         self.speech_queue.join()
+        self.playback_queue.join()
 
-    def _configure_voice(self):
-        """Configure voice settings."""
-        if not self.engine:
-            return
+    def is_speaking(self):
+        """True while audio is playing."""
+        return self._audio_active.is_set()
+
+    def wait_silent(self, timeout=1.0, poll=0.005):
+        """
+        Block until no audio is playing.
         
-        try:
-            self.engine.setProperty('rate', 180)
-            self.engine.setProperty('volume', 1.0)
-            
-            voices = self.engine.getProperty('voices')
-            for voice in voices:
-                name_lower = voice.name.lower()
-                if 'david' in name_lower or ('male' in name_lower and 'female' not in name_lower):
-                    self.engine.setProperty('voice', voice.id)
-                    break
-        except Exception:
-            pass
+        Returns:
+            True if silent within the timeout
+        """
+        deadline = time.perf_counter() + timeout
+        while self._audio_active.is_set():
+            if time.perf_counter() >= deadline:
+                return False
+            time.sleep(poll)
+        return True
+
+    def add_phrase(self, text):
+        """Queue a phrase for pre-rendering; dynamic phrases are LRU-evicted."""
+        cleaned = self._clean_text(text)
+        if cleaned:
+            self._pending_renders.append((cleaned, False))
+
+    def get_latency_stats(self):
+        """Return (last, average) queue-to-audio latency in seconds, or None."""
+        if not self.latencies:
+            return None
+        return self.latencies[-1], sum(self.latencies) / len(self.latencies)
 
     def _clean_text(self, text):
         """Clean text for speaking."""
@@ -136,6 +278,11 @@ class TTSEngine:
             
         return short.strip()
     
+    def _split_sentences(self, text):
+        """Split text so each sentence can be synthesized while the previous one plays."""
+        sentences = re.split(r'(?<=[.!?])\s+', text.strip())
+        return [s for s in sentences if s]
+
     def speak(self, text, short_only=True):
         """Queue text for speaking."""
         if self.worker_thread and not self.worker_thread.is_alive():
@@ -155,27 +302,41 @@ class TTSEngine:
         cleaned_text = self._clean_text(text)
         speak_text = self._get_short_text(cleaned_text) if short_only else cleaned_text
         
-        if speak_text:
-            self._stop_current = False
-            self.speech_queue.put(speak_text)
+        if not speak_text:
+            return
+        
+        queued_at = time.perf_counter()
+        parent = tracing.current_span()
+        TTS_UTTERANCES.inc()
+        if self.backend and self.backend.buffered:
+            chunks = self._split_sentences(speak_text)
+        else:
+            chunks = [speak_text]
+        for chunk in chunks:
+            self.speech_queue.put((chunk, queued_at, self._generation, parent))
 
-    def _clear_queue(self):
-        """Clear the speech queue."""
-        while not self.speech_queue.empty():
+    def _clear_queue(self, q):
+        """Drain a queue, marking drained items done."""
+        while not q.empty():
             try:
-                self.speech_queue.get_nowait()
-                self.speech_queue.task_done()
+                q.get_nowait()
+                q.task_done()
             except:
                 break
     
     def stop_speaking(self):
         """Stop current speech immediately."""
-        self._stop_current = True
-        self._clear_queue()
+        TTS_STOPS.inc()
+        # Before player.stop(): AudioPlayer.play() re-checks the generation
+        # after clearing its stop flag
+        self._generation += 1
+        self._clear_queue(self.speech_queue)
+        self._clear_queue(self.playback_queue)
+        self.player.stop()
            
-        if self.engine:
+        if self.backend:
             try:
-                self.engine.stop()
+                self.backend.stop()
             except:
                 pass
 
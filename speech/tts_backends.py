@@ -0,0 +1,178 @@
+# TTS Backends
+# Synthesis adapters behind TTSEngine. Each backend turns text into PCM;
+# pyttsx3 can additionally speak live through the system driver.
+
+import os
+import io
+import wave
+import tempfile
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    import pyttsx3
+    PYTTSX3_AVAILABLE = True
+except ImportError:
+    PYTTSX3_AVAILABLE = False
+
+try:
+    from piper.voice import PiperVoice
+    PIPER_AVAILABLE = True
+except ImportError:
+    PIPER_AVAILABLE = False
+
+from config import TTS_BACKEND, TTS_RATE, PIPER_MODEL_PATH
+
+
+def read_wav(source):
+    """Read a 16-bit WAV file (path or file object) into (int16 samples, sample rate)."""
+    with wave.open(source, 'rb') as wf:
+        if wf.getsampwidth() != 2:
+            raise ValueError("unsupported sample width")
+        channels = wf.getnchannels()
+        samplerate = wf.getframerate()
+        frames = wf.readframes(wf.getnframes())
+    pcm = np.frombuffer(frames, dtype=np.int16)
+    if channels > 1:
+        pcm = pcm.reshape(-1, channels)
+    return pcm, samplerate
+
+
+class TTSBackend:
+    """Base synthesis backend."""
+
+    name = "base"
+
+    # True if speech should go through synthesize() + the playback stage.
+    # False means the backend speaks live via speak().
+    buffered = True
+
+    def voice_key(self):
+        """String identifying voice settings, used to key cached audio."""
+        return self.name
+
+    def synthesize(self, text):
+        """
+        Synthesize text to audio.
+
+        Returns:
+            (int16 numpy array, sample rate)
+        """
+        raise NotImplementedError
+
+    def speak(self, text):
+        """Speak text live and block until done (unbuffered backends only)."""
+        raise NotImplementedError(f"{self.name} only supports buffered playback")
+
+    def stop(self):
+        """Interrupt live speech."""
+        pass
+
+    def close(self):
+        """Release backend resources."""
+        pass
+
+
+class Pyttsx3Backend(TTSBackend):
+    """System-native voices via pyttsx3 (SAPI5 / NSSpeech / eSpeak)."""
+
+    name = "pyttsx3"
+    buffered = False
+
+    def __init__(self, rate=TTS_RATE, on_started=None):
+        self.engine = pyttsx3.init()
+        if on_started:
+            self.engine.connect('started-utterance', on_started)
+        self._configure_voice(rate)
+
+    def _configure_voice(self, rate):
+        """Configure voice settings."""
+        try:
+            self.engine.setProperty('rate', rate)
+            self.engine.setProperty('volume', 1.0)
+
+            voices = self.engine.getProperty('voices')
+            for voice in voices:
+                name_lower = voice.name.lower()
+                if 'david' in name_lower or ('male' in name_lower and 'female' not in name_lower):
+                    self.engine.setProperty('voice', voice.id)
+                    break
+        except Exception:
+            pass
+
+    def voice_key(self):
+        return f"pyttsx3|{self.engine.getProperty('voice')}|{self.engine.getProperty('rate')}"
+
+    def speak(self, text):
+        self.engine.say(". " + text)
+        self.engine.runAndWait()
+
+    def synthesize(self, text):
+        fd, path = tempfile.mkstemp(suffix=".wav")
+        os.close(fd)
+        try:
+            self.engine.save_to_file(". " + text, path)
+            self.engine.runAndWait()
+            return read_wav(path)
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def stop(self):
+        self.engine.stop()
+
+    def close(self):
+        try:
+            self.engine.endLoop()
+        except Exception:
+            pass
+
+
+class PiperBackend(TTSBackend):
+    """Offline neural voice via Piper (optional: pip install piper-tts)."""
+
+    name = "piper"
+
+    def __init__(self, model_path=PIPER_MODEL_PATH):
+        if not os.path.isabs(model_path):
+            model_path = os.path.join(os.path.dirname(__file__), '..', model_path)
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"Piper voice not found: {model_path}")
+        self.model_path = model_path
+        self.voice = PiperVoice.load(model_path)
+
+    def voice_key(self):
+        return f"piper|{os.path.basename(self.model_path)}"
+
+    def synthesize(self, text):
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as wf:
+            if hasattr(self.voice, 'synthesize_wav'):
+                self.voice.synthesize_wav(text, wf)
+            else:
+                self.voice.synthesize(text, wf)
+        buffer.seek(0)
+        return read_wav(buffer)
+
+
+def create_backend(name=TTS_BACKEND, on_started=None):
+    """
+    Create the configured backend, falling back to pyttsx3.
+    Must be called on the thread that will use it.
+    """
+    if name == "piper":
+        if PIPER_AVAILABLE and NUMPY_AVAILABLE:
+            try:
+                return PiperBackend()
+            except Exception as e:
+                print(f"[TTS Warning] Piper unavailable ({e}), using pyttsx3")
+        else:
+            print("[TTS Warning] piper-tts not installed, using pyttsx3")
+
+    if not PYTTSX3_AVAILABLE:
+        raise RuntimeError("No TTS backend available (pyttsx3 not installed)")
+    return Pyttsx3Backend(on_started=on_started)
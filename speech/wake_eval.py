@@ -0,0 +1,235 @@
+# Wake Word Evaluation
+# Streams labeled WAV files through WakeListener's detection logic without a
+# microphone and reports accuracy, latency and CPU cost.
+#
+# Usage:
+#   python -m speech.wake_eval path/to/dataset
+#   python -m speech.wake_eval path/to/dataset --wake-words atlas "at last"
+#
+# The dataset directory holds 16 kHz mono 16-bit WAV files plus labels.json,
+# mapping each file name to the keyword occurrences it contains (in seconds):
+#
+#   {
+#     "atlas_01.wav": [{"start": 1.20, "end": 1.74}],
+#     "kitchen_noise.wav": []
+#   }
+#
+# Files missing from labels.json are treated as negatives (no keyword).
+
+import os
+import sys
+import json
+import time
+import wave
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from speech import wake_listener
+from speech.wake_listener import WakeListener, SAMPLE_RATE, BLOCK_SIZE
+
+# A detection this long after a keyword ends still counts as a hit
+MATCH_TOLERANCE = 1.5
+
+
+class FakeAudioSource:
+    """Yields fixed-size int16 blocks from a WAV file, like the mic callback."""
+
+    def __init__(self, path, block_size=BLOCK_SIZE):
+        self.path = path
+        self.block_size = block_size
+
+        with wave.open(path, 'rb') as wf:
+            if wf.getframerate() != SAMPLE_RATE or wf.getnchannels() != 1 or wf.getsampwidth() != 2:
+                raise ValueError(f"{path}: expected 16 kHz mono 16-bit audio")
+            self.frames = wf.readframes(wf.getnframes())
+
+        self.duration = len(self.frames) / 2 / SAMPLE_RATE
+
+    def __iter__(self):
+        step = self.block_size * 2
+        for offset in range(0, len(self.frames), step):
+            block = self.frames[offset:offset + step]
+            if len(block) < step:
+                block = block + b'\x00' * (step - len(block))
+            yield offset // 2 / SAMPLE_RATE, block
+
+
+def load_labels(directory):
+    """Load labels.json from the dataset directory."""
+    path = os.path.join(directory, 'labels.json')
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def run_file(listener, source):
+    """
+    Feed one file through the detector.
+
+    Returns:
+        (detection times in seconds, CPU seconds spent)
+    """
+    listener._reset_recognizer()
+    block_seconds = source.block_size / SAMPLE_RATE
+    detections = []
+
+    cpu_start = time.process_time()
+    for start, block in source:
+        if listener._process_block(block):
+            detections.append(start + block_seconds)
+    cpu_used = time.process_time() - cpu_start
+
+    return detections, cpu_used
+
+
+def score_file(detections, keywords, tolerance=MATCH_TOLERANCE):
+    """
+    Match detections to labeled keywords.
+
+    Returns:
+        (hits, misses, false accepts, latencies from keyword end)
+    """
+    unmatched = sorted(keywords, key=lambda k: k['start'])
+    latencies = []
+    false_accepts = 0
+
+    for t in detections:
+        match = None
+        for kw in unmatched:
+            if kw['start'] <= t <= kw['end'] + tolerance:
+                match = kw
+                break
+        if match:
+            unmatched.remove(match)
+            latencies.append(t - match['end'])
+        else:
+            false_accepts += 1
+
+    hits = len(latencies)
+    return hits, len(unmatched), false_accepts, latencies
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def evaluate(directory, listener=None):
+    """
+    Evaluate every WAV file in a dataset directory.
+
+    Returns:
+        Report dict
+    """
+    listener = listener or WakeListener()
+    if not listener._initialized:
+        raise RuntimeError("Wake listener could not be initialized (Vosk model missing?)")
+
+    labels = load_labels(directory)
+    total_audio = 0.0
+    total_cpu = 0.0
+    total_keywords = 0
+    hits = misses = false_accepts = 0
+    latencies = []
+    per_file = []
+
+    for name in sorted(os.listdir(directory)):
+        if not name.lower().endswith('.wav'):
+            continue
+
+        source = FakeAudioSource(os.path.join(directory, name))
+        keywords = labels.get(name, [])
+        detections, cpu_used = run_file(listener, source)
+        h, m, fa, lat = score_file(detections, keywords)
+
+        total_audio += source.duration
+        total_cpu += cpu_used
+        total_keywords += len(keywords)
+        hits += h
+        misses += m
+        false_accepts += fa
+        latencies.extend(lat)
+        per_file.append({
+            "file": name,
+            "duration": round(source.duration, 2),
+            "keywords": len(keywords),
+            "hits": h,
+            "misses": m,
+            "false_accepts": fa,
+        })
+
+    hours = total_audio / 3600 if total_audio else 0.0
+    return {
+        "wake_words": list(wake_listener.WAKE_WORDS),
+        "grammar_mode": wake_listener.WAKE_GRAMMAR_MODE,
+        "energy_threshold": wake_listener.WAKE_ENERGY_THRESHOLD,
+        "audio_hours": round(hours, 4),
+        "keywords": total_keywords,
+        "hits": hits,
+        "misses": misses,
+        "false_accepts": false_accepts,
+        "false_accepts_per_hour": round(false_accepts / hours, 3) if hours else None,
+        "miss_rate": round(misses / total_keywords, 4) if total_keywords else None,
+        "latency_p50": _percentile(latencies, 50),
+        "latency_p95": _percentile(latencies, 95),
+        "cpu_seconds_per_audio_hour": round(total_cpu / hours, 2) if hours else None,
+        "files": per_file,
+    }
+
+
+def format_report(report):
+    """Human-readable summary of an evaluation report."""
+    def fmt(value, spec):
+        return "n/a" if value is None else format(value, spec)
+
+    lines = [
+        f"Wake words:         {', '.join(report['wake_words'])}",
+        f"Grammar mode:       {report['grammar_mode']}  (energy gate {report['energy_threshold']})",
+        f"Audio:              {report['audio_hours'] * 60:.1f} min",
+        f"Keywords:           {report['keywords']}  (hits {report['hits']}, misses {report['misses']})",
+        f"Miss rate:          {fmt(report['miss_rate'], '.2%')}",
+        f"False accepts/hour: {fmt(report['false_accepts_per_hour'], '.2f')}  ({report['false_accepts']} total)",
+        f"Latency p50 / p95:  {fmt(report['latency_p50'], '.3f')}s / {fmt(report['latency_p95'], '.3f')}s after keyword end",
+        f"CPU per audio hour: {fmt(report['cpu_seconds_per_audio_hour'], '.1f')}s",
+    ]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate wake word accuracy and latency on labeled audio.")
+    parser.add_argument('dataset', help="Directory of WAV files and labels.json")
+    parser.add_argument('--wake-words', nargs='+', help="Override WAKE_WORDS for this run")
+    parser.add_argument('--threshold', type=int, help="Override WAKE_ENERGY_THRESHOLD")
+    parser.add_argument('--no-grammar', action='store_true', help="Use the open-vocabulary recognizer")
+    parser.add_argument('--json', dest='json_path', help="Also write the full report to this file")
+    args = parser.parse_args(argv)
+
+    if args.wake_words:
+        wake_listener.WAKE_WORDS = [w.lower() for w in args.wake_words]
+    if args.threshold is not None:
+        wake_listener.WAKE_ENERGY_THRESHOLD = args.threshold
+    if args.no_grammar:
+        wake_listener.WAKE_GRAMMAR_MODE = False
+
+    try:
+        report = evaluate(args.dataset)
+    except RuntimeError as e:
+        print(f"[Wake Eval] {e}")
+        return 1
+
+    print(format_report(report))
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n[Wake Eval] Report written to {args.json_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,12 +5,18 @@ import threading
 import time
 
 try:
+    import numpy as np
     import sounddevice as sd
     from vosk import Model, KaldiRecognizer
     VOSK_AVAILABLE = True
 except ImportError:
     VOSK_AVAILABLE = False
 
+from utils import metrics
+from utils.logger import get_logger
+
+log = get_logger("wake")
+
 MODEL_PATH = os.path.join(os.path.dirname(__file__), '..', 'models', 'vosk', 'vosk-model-small-en-us-0.15')
 
 SAMPLE_RATE = 16000
@@ -18,6 +24,23 @@ BLOCK_SIZE = 4000
 
 WAKE_WORDS = ["atlas", "at less", "at lass", "at last", "address"]
 
+# Restrict Vosk to the wake phrases (plus [unk] for everything else) instead
+# of decoding open vocabulary on every block
+WAKE_GRAMMAR_MODE = True
+
+# Blocks quieter than this RMS are skipped before reaching the recognizer
+WAKE_ENERGY_THRESHOLD = 300
+
+# Keep feeding this many quiet blocks after speech so Vosk can finalize
+WAKE_HANGOVER_BLOCKS = 3
+
+WAKE_BLOCKS = metrics.counter("atlas_wake_blocks_total", "Audio blocks seen by the wake detector, by gate decision")
+WAKE_DECODE_SECONDS = metrics.histogram("atlas_wake_decode_seconds", "Vosk time per decoded block",
+                                        buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25))
+WAKE_DETECTIONS = metrics.counter("atlas_wake_detections_total", "Wake words detected")
+WAKE_DETECT_SECONDS = metrics.histogram("atlas_wake_detect_seconds", "Speech onset to wake detection")
+WAKE_QUEUE_DEPTH = metrics.gauge("atlas_wake_audio_queue_depth", "Audio blocks waiting for the wake detector")
+
 
 class WakeListener:
     """Continuous wake word listener running in background thread."""
@@ -25,6 +48,10 @@ class WakeListener:
     def __init__(self):
         self.model = None
         self.recognizer = None
+        self._hangover = 0
+        self._speech_started = None
+        # (speech start, detection) perf_counter times of the last wake word
+        self.last_detection = None
         self.audio_queue = queue.Queue()
         self.is_running = False
         self.is_paused = False
@@ -33,24 +60,94 @@ class WakeListener:
         self.callback = None
         self._initialized = False
         
+        WAKE_QUEUE_DEPTH.set_function(self.audio_queue.qsize)
         self._initialize()
     
     def _initialize(self):
         """Initialize Vosk model for wake detection."""
         if not VOSK_AVAILABLE:
-            print("[Wake] Vosk not available")
+            log.warning("[Wake] Vosk not available")
             return
         
         if not os.path.exists(MODEL_PATH):
-            print(f"[Wake] Model not found")
+            log.warning("[Wake] Model not found", path=MODEL_PATH)
             return
         
         try:
             self.model = Model(MODEL_PATH)
-            self.recognizer = KaldiRecognizer(self.model, SAMPLE_RATE)
+            self.recognizer = self._create_recognizer()
             self._initialized = True
         except Exception as e:
-            print(f"[Wake Error] {e}")
+            log.error(f"[Wake Error] {e}")
+    
+    def _create_recognizer(self):
+        """Build the recognizer, grammar-constrained in wake-word mode."""
+        if WAKE_GRAMMAR_MODE:
+            grammar = json.dumps(WAKE_WORDS + ["[unk]"])
+            return KaldiRecognizer(self.model, SAMPLE_RATE, grammar)
+        return KaldiRecognizer(self.model, SAMPLE_RATE)
+    
+    def _reset_recognizer(self):
+        """Clear recognizer state without rebuilding the decoding graph."""
+        self._hangover = 0
+        if self.recognizer:
+            self.recognizer.Reset()
+        elif self.model:
+            self.recognizer = self._create_recognizer()
+    
+    def _is_voiced(self, data):
+        """Energy gate: True if the block is loud enough to be speech."""
+        samples = np.frombuffer(data, dtype=np.int16).astype(np.float32)
+        if samples.size == 0:
+            return False
+        rms = float(np.sqrt(np.mean(samples * samples)))
+        return rms > WAKE_ENERGY_THRESHOLD
+    
+    def _process_block(self, data):
+        """
+        Run one audio block through the wake detector.
+        
+        Returns:
+            True if a wake word was detected in this block
+        """
+        if self._is_voiced(data):
+            if self._hangover == 0:
+                # Start of an utterance; wake latency is measured from here
+                self._speech_started = time.perf_counter()
+            self._hangover = WAKE_HANGOVER_BLOCKS
+            WAKE_BLOCKS.inc(gate="voiced")
+        elif self._hangover > 0:
+            self._hangover -= 1
+            WAKE_BLOCKS.inc(gate="hangover")
+        else:
+            WAKE_BLOCKS.inc(gate="skipped")
+            return False
+        
+        decode_start = time.perf_counter()
+        if self.recognizer.AcceptWaveform(data):
+            raw = self.recognizer.Result()
+            key = 'text'
+        else:
+            raw = self.recognizer.PartialResult()
+            key = 'partial'
+        WAKE_DECODE_SECONDS.observe(time.perf_counter() - decode_start)
+        
+        # Cheap substring check on the raw JSON; only parse on a likely hit
+        if self._contains_wake_word(raw):
+            text = json.loads(raw).get(key, '')
+            if text and self._contains_wake_word(text):
+                detected = time.perf_counter()
+                self.last_detection = (self._speech_started or detected, detected)
+                WAKE_DETECTIONS.inc()
+                WAKE_DETECT_SECONDS.observe(detected - self.last_detection[0])
+                self._reset_recognizer()
+                return True
+        
+        if self._hangover == 0:
+            # Utterance over without the wake word: the next one starts from a
+            # clean decoder instead of being stitched on across the gated gap
+            self._reset_recognizer()
+        return False
     
     def _audio_callback(self, indata, frames, time_info, status):
         """Callback for audio stream."""
@@ -77,7 +174,7 @@ class WakeListener:
     
     def _listener_loop(self):
         """Main listener loop running in background thread."""
-        print(f"\n🎧 Listening for 'Atlas'...")
+        log.status("\n🎧 Listening for 'Atlas'...")
         
         while self.is_running:
             if self.is_paused:
@@ -101,39 +198,23 @@ class WakeListener:
                         if self.is_paused:
                             break
                         
-                        if self.recognizer.AcceptWaveform(data):
-                            result = json.loads(self.recognizer.Result())
-                            text = result.get('text', '')
-                            
-                            if text:
-                                if self._contains_wake_word(text):
-                                    self._close_stream()
-                                    self._on_wake_detected()
-                                    break
-                        else:
-                            partial = json.loads(self.recognizer.PartialResult())
-                            partial_text = partial.get('partial', '')
-                            
-                            if partial_text and self._contains_wake_word(partial_text):
-                                self.recognizer = KaldiRecognizer(self.model, SAMPLE_RATE)
-                                self._close_stream()
-                                self._on_wake_detected()
-                                break
-                        
-                        time.sleep(0.05)
+                        if self._process_block(data):
+                            self._close_stream()
+                            self._on_wake_detected()
+                            break
                         
                     except queue.Empty:
                         continue
                     except Exception as e:
                         if self.is_running:
-                            print(f"[Wake Error] {e}")
+                            log.error(f"[Wake Error] {e}")
                         break
                 
                 self._close_stream()
                         
             except Exception as e:
                 if self.is_running:
-                    print(f"[Wake] Mic error: {e}")
+                    log.error(f"[Wake] Mic error: {e}")
                     time.sleep(2)
     
     def _on_wake_detected(self):
@@ -150,7 +231,7 @@ class WakeListener:
     def start(self, callback):
         """Start the wake word listener."""
         if not self._initialized:
-            print("[Wake] Not initialized")
+            log.warning("[Wake] Not initialized")
             return False
         
         if self.is_running:
@@ -166,7 +247,7 @@ class WakeListener:
             except:
                 break
         
-        self.recognizer = KaldiRecognizer(self.model, SAMPLE_RATE)
+        self._reset_recognizer()
         
         self.listener_thread = threading.Thread(target=self._listener_loop, daemon=True)
         self.listener_thread.start()
@@ -192,10 +273,11 @@ class WakeListener:
     
     def resume(self):
         """Resume listening after command processing."""
+        # Reset before unpausing, so the listener thread never decodes new
+        # audio on top of the utterance that was in progress
+        self._reset_recognizer()
         self.is_paused = False
-        if self.model:
-            self.recognizer = KaldiRecognizer(self.model, SAMPLE_RATE)
-        print(f"\n🎧 Listening for 'Atlas'...")
+        log.status("\n🎧 Listening for 'Atlas'...")
 
 
 _wake_listener = None
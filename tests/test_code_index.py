@@ -0,0 +1,118 @@
+# Tests for core/code_index.py (run with: python -m pytest tests)
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from core.code_index import extract_symbols, is_code
+
+PYTHON = '''import os
+from a.b import c as d
+
+@decorator
+def top(x):
+    """Doc."""
+    return x
+
+
+class Parser:
+    def parse(self, text):
+        if text:
+            return 1
+        return 0
+
+    async def close(self):
+        pass
+'''
+
+TYPESCRIPT = '''import { x } from "./util";
+
+export class Widget {
+  constructor(props) {
+    this.props = props;
+  }
+
+  async render(props): string {
+    if (props) { return "{"; }
+    return "}";
+  }
+}
+
+function helper(a) {
+  // } not counted
+  return a;
+}
+
+const arrow = (a) => {
+  return a * 2;
+};
+'''
+
+GO = '''package main
+
+import "fmt"
+
+type Server struct {
+\tport int
+}
+
+func (s *Server) Start() error {
+\tfmt.Println("start")
+\treturn nil
+}
+'''
+
+
+def _spans(path, text):
+    return [(s.name, s.kind, s.start, s.end) for s in extract_symbols(path, text)]
+
+
+def test_python_spans():
+    assert _spans("a.py", PYTHON) == [
+        ("os", "import", 1, 1),
+        ("a.b.c", "import", 2, 2),
+        ("top", "function", 4, 7),
+        ("Parser", "class", 10, 17),
+        ("Parser.parse", "method", 11, 14),
+        ("Parser.close", "method", 16, 17),
+    ]
+
+
+def test_python_syntax_error_falls_back_to_regexes():
+    broken = PYTHON.replace("return 0", "return 0 +")
+    assert _spans("a.py", broken)[2:] == [
+        ("top", "function", 5, 7),
+        ("Parser", "class", 10, 17),
+        ("Parser.parse", "method", 11, 14),
+        ("Parser.close", "method", 16, 17),
+    ]
+
+
+def test_typescript_spans_ignore_braces_in_strings_and_comments():
+    assert _spans("a.ts", TYPESCRIPT) == [
+        ("./util", "import", 1, 1),
+        ("Widget", "class", 3, 12),
+        ("Widget.constructor", "method", 4, 6),
+        ("Widget.render", "method", 8, 11),
+        ("helper", "function", 14, 17),
+        ("arrow", "function", 19, 21),
+    ]
+
+
+def test_go_spans():
+    assert _spans("main.go", GO) == [
+        ("fmt", "import", 3, 3),
+        ("Server", "class", 5, 7),
+        ("Start", "function", 9, 12),
+    ]
+
+
+def test_c_definition_not_prototype():
+    text = "int add(int a, int b);\n\nint add(int a, int b) {\n    return a + b;\n}\n"
+    assert _spans("m.c", text) == [("add", "function", 3, 5)]
+
+
+def test_unsupported_types():
+    assert not is_code("notes.txt")
+    assert extract_symbols("notes.txt", "def f():\n    pass\n") == []
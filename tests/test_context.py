@@ -0,0 +1,92 @@
+# Tests for core/context.py and brain/tokens.py (run with: python -m pytest tests)
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from brain.tokens import estimate_tokens, truncate_to_tokens, TRUNCATION_MARKER
+from core import context as context_module
+from core.context import ContextManager
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("hello world") == 2
+    assert estimate_tokens("internationalization") == 5
+    assert estimate_tokens("1234567") == 3
+    assert estimate_tokens("a.b\nc") == 5
+
+
+def test_truncate_to_tokens():
+    assert truncate_to_tokens("short text", 10) == "short text"
+    assert truncate_to_tokens("anything", 0) == ""
+    cut = truncate_to_tokens("word " * 500, 50)
+    assert cut.endswith(TRUNCATION_MARKER)
+    assert estimate_tokens(cut) <= 50
+    assert truncate_to_tokens("word " * 500, 50) == cut
+
+
+def test_prompt_fits_budget_and_keeps_newest_history(monkeypatch):
+    monkeypatch.setattr(context_module, "NUM_CTX", 300)
+    monkeypatch.setattr(context_module, "RESPONSE_RESERVE_TOKENS", 50)
+    ctx = ContextManager(summarizer=lambda summary, messages: "summary")
+    for i in range(3):
+        ctx.add_exchange(f"question {i} " + "about things " * 20, f"answer {i} " + "with details " * 20)
+
+    prompt = ctx.build_context("You are Atlas. " * 10, "latest question")
+    assert ctx.remaining_tokens(prompt) >= 0
+    assert ctx.last_build["history_dropped"] > 0
+    assert "answer 2" in prompt
+    assert "question 0" not in prompt
+    assert prompt.endswith("User: latest question\nAtlas:")
+
+
+def test_oversized_input_is_truncated_to_fit(monkeypatch):
+    monkeypatch.setattr(context_module, "NUM_CTX", 300)
+    monkeypatch.setattr(context_module, "RESPONSE_RESERVE_TOKENS", 50)
+    ctx = ContextManager(summarizer=lambda summary, messages: "summary")
+    prompt = ctx.build_context("System rules.", "paste " * 1000)
+    assert TRUNCATION_MARKER in prompt
+    assert ctx.remaining_tokens(prompt) >= 0
+
+
+def test_build_is_deterministic():
+    ctx = ContextManager(summarizer=lambda summary, messages: "summary")
+    ctx.add_exchange("hi", "hello")
+    system = "You are Atlas."
+    assert ctx.build_context(system, "again") == ctx.build_context(system, "again")
+
+
+def test_evicted_history_is_summarized(monkeypatch):
+    monkeypatch.setattr(context_module, "MAX_HISTORY", 2)
+    folded = []
+
+    def summarizer(summary, messages):
+        folded.extend(m["content"] for m in messages)
+        return "User greeted twice."
+
+    ctx = ContextManager(summarizer=summarizer)
+    for i in range(4):
+        ctx.add_exchange(f"hello {i}", f"hi {i}")
+    assert len(ctx.history) == 4
+    _wait_for(lambda: ctx.summary == "User greeted twice.")
+    assert folded == ["hello 0", "hi 0", "hello 1", "hi 1"]
+    assert "Earlier in this conversation (summary): User greeted twice." in ctx.build_context("S", "x")
+
+
+def test_failed_summary_falls_back_to_user_questions(monkeypatch):
+    monkeypatch.setattr(context_module, "MAX_HISTORY", 1)
+    ctx = ContextManager(summarizer=lambda summary, messages: None)
+    ctx.add_exchange("open the notes", "Done.")
+    ctx.add_exchange("thanks", "Any time.")
+    _wait_for(lambda: ctx.summary)
+    assert ctx.summary == "User asked: open the notes"
@@ -0,0 +1,91 @@
+# Tests for core/file_index.py (run with: python -m pytest tests)
+
+import os
+import sys
+import sqlite3
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+
+from core import file_index as file_index_module
+from core.file_index import FileIndex
+from tools import file_tools
+
+
+@pytest.fixture
+def root(tmp_path, monkeypatch):
+    files = tmp_path / "files"
+    files.mkdir()
+    monkeypatch.setattr(file_tools, "ATLAS_FILES_DIR", str(files))
+    return files
+
+
+@pytest.fixture
+def index(tmp_path, root):
+    return FileIndex(path=str(tmp_path / "index.db"), enabled=False)
+
+
+def _write(path, text, mtime=None):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding='utf-8')
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def _paths(rows):
+    return [row[0] for row in rows]
+
+
+def test_add_change_delete(index, root):
+    _write(root / "notes.txt", "buy milk\n", mtime=1000)
+    _write(root / "src" / "app.py", "def main():\n    return 1\n", mtime=1000)
+    assert index.scan() == 2
+    assert index.scan() == 0
+    assert _paths(index.find("notes")) == ["notes.txt"]
+    assert _paths(index.search("milk")) == ["notes.txt"]
+    assert [row[1] for row in index.find_symbols("main")] == ["main"]
+
+    _write(root / "notes.txt", "buy bread\n", mtime=2000)
+    assert index.scan() == 1
+    assert index.search("milk") == []
+    assert index.search("bread") == [("notes.txt", 1, "buy bread")]
+
+    _write(root / "src" / "app.py", "def start():\n    return 2\n", mtime=2000)
+    assert index.scan() == 1
+    assert index.find_symbols("main") == []
+    assert [row[1] for row in index.find_symbols("start")] == ["start"]
+
+    os.remove(root / "notes.txt")
+    assert index.scan() == 1
+    assert index.find("notes") == []
+    assert index.search("bread") == []
+    assert _paths(index.find("*.py")) == ["src/app.py"]
+
+
+def test_hidden_and_binary_files(index, root):
+    _write(root / ".hidden.txt", "secret\n")
+    (root / "blob.bin").write_bytes(b"\0\1secret")
+    index.scan()
+    assert index.search("secret") == []
+    assert _paths(index.find("blob")) == ["blob.bin"]
+
+
+def test_schema_upgrade_clears_every_table(index, root):
+    _write(root / "app.py", "def main():\n    pass\n", mtime=1000)
+    index.scan()
+    with sqlite3.connect(index.path) as conn:
+        conn.execute('PRAGMA user_version = 1')
+
+    upgraded = FileIndex(path=index.path, enabled=False)
+    conn = upgraded._connect()
+    try:
+        assert conn.execute('SELECT COUNT(*) FROM files').fetchone()[0] == 0
+        assert conn.execute('SELECT COUNT(*) FROM symbols').fetchone()[0] == 0
+        if upgraded.fts:
+            assert conn.execute('SELECT COUNT(*) FROM contents').fetchone()[0] == 0
+        assert conn.execute('PRAGMA user_version').fetchone()[0] == file_index_module.SCHEMA_VERSION
+    finally:
+        conn.close()
+    assert upgraded.scan() == 1
+    assert len(upgraded.find_symbols("main")) == 1
@@ -0,0 +1,89 @@
+# Tests for read_file paging in tools/file_tools.py (run with: python -m pytest tests)
+
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+
+from tools import file_tools
+
+_MARKER = re.compile(r"\n\[truncated: [^\]]*; continue with start_line=(\d+)(?: column=(\d+))?\]$")
+
+
+@pytest.fixture
+def files(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_tools, "ATLAS_FILES_DIR", str(tmp_path))
+    monkeypatch.setattr(file_tools, "READ_FILE_MAX_BYTES", 200)
+
+    def write(name, text):
+        with open(tmp_path / name, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+        return name
+    return write
+
+
+def _page_through(name):
+    """Follow the truncation markers from the top; returns (text, pages)."""
+    out, start, column, pages = [], 1, 1, 0
+    while True:
+        page = file_tools.read_file(name, start_line=start, column=column)
+        pages += 1
+        assert pages < 1000
+        marker = _MARKER.search(page)
+        if not marker:
+            out.append(page)
+            return "".join(out), pages
+        out.append(page[:marker.start()])
+        start, column = int(marker.group(1)), int(marker.group(2) or 1)
+
+
+def test_small_file_in_one_page(files):
+    assert _page_through(files("a.txt", "one\ntwo\n")) == ("one\ntwo\n", 1)
+
+
+def test_many_lines_round_trip(files):
+    text = "".join(f"line {i} " + "x" * (i % 37) + "\n" for i in range(300))
+    result, pages = _page_through(files("lines.txt", text))
+    assert result == text
+    assert pages > 1
+
+
+def test_overlong_line_paged_by_column(files):
+    text = "start\n" + "é€😀abc" * 400 + "\nend"
+    result, pages = _page_through(files("long.txt", text))
+    assert result == text
+    assert pages > 10
+
+
+def test_single_line_without_newline(files):
+    text = "0123456789" * 150
+    assert _page_through(files("one.txt", text))[0] == text
+
+
+def test_crlf_is_read_as_lf(files):
+    text = "".join(f"row {i}\r\n" for i in range(100))
+    assert _page_through(files("crlf.txt", text))[0] == text.replace("\r\n", "\n")
+
+
+def test_line_range(files):
+    name = files("r.txt", "a\nb\nc\nd\n")
+    assert file_tools.read_file(name, start_line=2, end_line=3) == "b\nc\n"
+    assert file_tools.read_file(name, start_line=9).startswith("[empty: the file has 4 lines]")
+
+
+def test_tail(files):
+    name = files("t.txt", "".join(f"{i}\n" for i in range(1, 101)))
+    assert file_tools.read_file(name, tail=3).startswith("98\n99\n100\n[truncated: showing lines 98-100 of 100")
+    page = file_tools.read_file(name, tail=100)
+    marker = re.search(r"\n\[truncated: [^\]]*; earlier lines: end_line=(\d+)\]$", page)
+    shown = page[:marker.start()]
+    assert len(shown.encode('utf-8')) <= 200
+    assert shown == "".join(f"{i}\n" for i in range(int(marker.group(1)) + 1, 101)).rstrip("\n")
+
+
+def test_pattern_numbers_lines(files):
+    name = files("p.txt", "alpha\nbeta\nAlphabet\n")
+    assert file_tools.read_file(name, pattern="alpha") == "1: alpha\n3: Alphabet"
@@ -0,0 +1,118 @@
+# Tests for brain/llm_queue.py (run with: python -m pytest tests)
+
+import os
+import sys
+import time
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from brain.llm_queue import LLMQueue, PRIORITY_VOICE, PRIORITY_CONSOLE, PRIORITY_BACKGROUND
+from core.cancellation import CancellationToken
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def _start(target, *args):
+    thread = threading.Thread(target=target, args=args, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_priority_order_voice_console_background():
+    queue = LLMQueue(1)
+    held = queue.acquire()
+    order = []
+
+    def request(name, priority):
+        with queue.slot(priority) as ticket:
+            assert ticket
+            order.append(name)
+
+    threads = [_start(request, "background", PRIORITY_BACKGROUND)]
+    _wait_for(lambda: queue.waiting() == 1)
+    threads.append(_start(request, "console", PRIORITY_CONSOLE))
+    _wait_for(lambda: queue.waiting() == 2)
+    threads.append(_start(request, "voice", PRIORITY_VOICE))
+    _wait_for(lambda: queue.waiting() == 3)
+
+    queue.release(held)
+    for thread in threads:
+        thread.join(2)
+    assert order == ["voice", "console", "background"]
+
+
+def test_same_session_supersedes_waiting_request():
+    queue = LLMQueue(1)
+    held = queue.acquire()
+    results = {}
+
+    def request(name):
+        ticket = queue.acquire(session="s")
+        results[name] = ticket
+        if ticket:
+            queue.release(ticket)
+
+    first = _start(request, "first")
+    _wait_for(lambda: queue.waiting() == 1)
+    second = _start(request, "second")
+    first.join(2)
+    assert results["first"] is None
+
+    queue.release(held)
+    second.join(2)
+    assert results["second"] is not None
+    assert queue.waiting() == 0
+
+
+def test_cancelled_waiter_leaves_heap():
+    queue = LLMQueue(1)
+    held = queue.acquire()
+    token = CancellationToken()
+    results = {}
+
+    def request(name, priority, cancel_token=None):
+        results[name] = queue.acquire(priority, cancel_token=cancel_token)
+
+    voice = _start(request, "voice", PRIORITY_VOICE)
+    _wait_for(lambda: queue.waiting() == 1)
+    console = _start(request, "console", PRIORITY_CONSOLE, token)
+    _wait_for(lambda: queue.waiting() == 2)
+
+    token.cancel("test")
+    console.join(2)
+    assert not console.is_alive()
+    assert results["console"] is None
+    assert len(queue._heap) == 1
+
+    queue.release(held)
+    voice.join(2)
+    assert results["voice"] is not None
+    queue.release(results["voice"])
+
+
+def test_in_flight_never_exceeds_limit():
+    queue = LLMQueue(2)
+    lock = threading.Lock()
+    state = {"running": 0, "peak": 0}
+
+    def request(priority):
+        with queue.slot(priority):
+            with lock:
+                state["running"] += 1
+                state["peak"] = max(state["peak"], state["running"])
+            time.sleep(0.01)
+            with lock:
+                state["running"] -= 1
+
+    threads = [_start(request, i % 3) for i in range(12)]
+    for thread in threads:
+        thread.join(5)
+    assert state["peak"] <= 2
+    assert state["running"] == 0
+    assert queue.waiting() == 0
@@ -0,0 +1,49 @@
+# Tests for brain/model_router.py (run with: python -m pytest tests)
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+
+from brain import llm
+from brain import model_router as router_module
+from brain.model_router import ModelRouter, ROUTE_TOOL, ROUTE_COMPLEX
+
+
+@pytest.fixture
+def pulled(monkeypatch):
+    models = {"names": ["qwen3:1.7b", "llama3:latest"], "calls": 0}
+
+    def list_models():
+        models["calls"] += 1
+        return models["names"]
+
+    monkeypatch.setattr(llm, "list_models", list_models)
+    monkeypatch.setattr(router_module, "MODEL_ROUTING_ENABLED", True)
+    return models
+
+
+def _router(tool_model):
+    return ModelRouter(routes={ROUTE_TOOL: tool_model, ROUTE_COMPLEX: "qwen3:1.7b"}, default="qwen3:1.7b")
+
+
+def test_exact_names_only(pulled):
+    assert _router("qwen3:0.6b").model_for(ROUTE_TOOL) == "qwen3:1.7b"
+    assert _router("qwen3").model_for(ROUTE_TOOL) == "qwen3:1.7b"
+    assert _router("llama3").model_for(ROUTE_TOOL) == "llama3"
+    assert _router("llama3:latest").model_for(ROUTE_TOOL) == "llama3:latest"
+
+
+def test_unreachable_assumes_available_then_rechecks(pulled, monkeypatch):
+    pulled["names"] = None
+    router = _router("qwen3:0.6b")
+    assert router.model_for(ROUTE_TOOL) == "qwen3:0.6b"
+    assert router.model_for(ROUTE_TOOL) == "qwen3:0.6b"
+    assert pulled["calls"] == 1
+
+    pulled["names"] = ["qwen3:1.7b"]
+    monkeypatch.setattr(router_module, "MODEL_LIST_TTL", 0)
+    assert router.model_for(ROUTE_TOOL) == "qwen3:1.7b"
+    assert pulled["calls"] == 2
@@ -0,0 +1,73 @@
+# Tests for utils/patch.py (run with: python -m pytest tests)
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+
+from utils import patch
+
+
+def _apply(text, patch_text):
+    return patch.apply(text, patch.parse(patch_text))
+
+
+def _block(search, replace):
+    return f"<<<<<<< SEARCH\n{search}=======\n{replace}>>>>>>> REPLACE\n"
+
+
+def test_empty_search_appends_before_final_newline():
+    assert _apply("return 3\n", _block("", "new line\n")) == "return 3\nnew line\n"
+
+
+def test_empty_search_appends_without_final_newline():
+    assert _apply("return 3", _block("", "new line\n")) == "return 3\nnew line"
+
+
+def test_empty_search_keeps_crlf():
+    assert _apply("a\r\nb\r\n", _block("", "c\n")) == "a\r\nb\r\nc\r\n"
+
+
+def test_empty_search_into_empty_file():
+    assert _apply("", _block("", "first\n")) == "first\n"
+
+
+def test_diff_insertion_at_hinted_line():
+    diff = "@@ -1,0 +2,1 @@\n+inserted\n"
+    assert _apply("one\ntwo\n", diff) == "one\ninserted\ntwo\n"
+
+
+def test_search_replace_exact():
+    assert _apply("def f():\n    return 1\n", _block("    return 1\n", "    return 2\n")) == "def f():\n    return 2\n"
+
+
+def test_search_replace_ignores_indentation_drift():
+    text = "class A:\n    def f(self):\n        return 1\n"
+    result = _apply(text, _block("def f(self):\n    return 1\n", "def f(self):\n    return 2\n"))
+    assert result == "class A:\n    def f(self):\n        return 2\n"
+
+
+def test_unmatched_search_raises():
+    with pytest.raises(patch.PatchError):
+        _apply("a\nb\n", _block("nothing like this\n", "x\n"))
+
+
+def test_fuzzy_refuses_different_identifiers():
+    with pytest.raises(patch.PatchError):
+        _apply("def f():\n    x = 1\n", _block("def h():\n  y = 1\n", "def h():\n  y = 2\n"))
+
+
+def test_fuzzy_forgives_punctuation():
+    text = "def f():\n    print('hi')\n"
+    result = _apply(text, _block('def f():\n    print("hi");\n', 'def f():\n    print("bye")\n'))
+    assert result == 'def f():\n    print("bye")\n'
+
+
+def test_two_space_body_reindented_into_four_space_file():
+    text = "class A:\n    def f(self):\n        return 1\n"
+    search = "def f(self):\n  return 1\n"
+    replace = "def f(self):\n  if x:\n    return 2\n  return 1\n"
+    result = _apply(text, _block(search, replace))
+    assert result == "class A:\n    def f(self):\n        if x:\n            return 2\n        return 1\n"
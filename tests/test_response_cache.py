@@ -0,0 +1,89 @@
+# Tests for brain/response_cache.py (run with: python -m pytest tests)
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+
+from brain import response_cache as cache_module
+from brain.response_cache import ResponseCache
+from core.tool_router import router
+from memory.memory_manager import memory
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(path=str(tmp_path / "cache.db"), ttl=60, max_entries=2)
+
+
+def test_hit_for_identical_request(cache):
+    key = cache.key("m", "prompt", {"think": False})
+    cache.put(key, "m", "reply")
+    assert cache.get(cache.key("m", "prompt", {"think": False})) == "reply"
+    assert cache.get(cache.key("m", "prompt", {"think": True})) is None
+
+
+def test_fact_change_misses(cache, monkeypatch):
+    monkeypatch.setattr(memory, "list_facts", lambda: [{"key": "name", "value": "Sam"}])
+    key = cache.key("m", "prompt", {})
+    cache.put(key, "m", "reply")
+
+    monkeypatch.setattr(memory, "list_facts", lambda: [{"key": "name", "value": "Alex"}])
+    monkeypatch.setattr(memory, "facts_version", memory.facts_version + 1)
+    assert cache.key("m", "prompt", {}) != key
+    assert cache.get(cache.key("m", "prompt", {})) is None
+
+
+def test_tool_change_misses(cache, monkeypatch):
+    key = cache.key("m", "prompt", {})
+
+    def extra_tool(arg):
+        """A tool registered after the reply was cached."""
+
+    monkeypatch.setattr(router, "tools", dict(router.tools, extra_tool=extra_tool))
+    monkeypatch.setattr(router, "version", router.version + 1)
+    assert cache.key("m", "prompt", {}) != key
+
+
+def test_ttl_expiry(cache, clock):
+    key = cache.key("m", "prompt", {})
+    cache.put(key, "m", "reply")
+    clock[0] += 59
+    assert cache.get(key) == "reply"
+    clock[0] += 2
+    assert cache.get(key) is None
+
+
+def test_lru_eviction(cache, clock):
+    keys = [cache.key("m", f"prompt {i}", {}) for i in range(3)]
+    cache.put(keys[0], "m", "zero")
+    clock[0] += 1
+    cache.put(keys[1], "m", "one")
+    clock[0] += 1
+    assert cache.get(keys[0]) == "zero"     # now more recent than keys[1]
+    clock[0] += 1
+    cache.put(keys[2], "m", "two")
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) == "zero"
+    assert cache.get(keys[2]) == "two"
+
+
+def test_routes_gate(monkeypatch):
+    import main
+
+    monkeypatch.setattr(main, "RESPONSE_CACHE_ROUTES", ["tool"])
+    use_cache = main.AtlasAssistant._use_cache
+    turn = {"cache": True}
+    assert use_cache(None, turn, "tool")
+    assert not use_cache(None, turn, "chat")
+    assert not use_cache(None, {"cache": False}, "tool")
+    assert not use_cache(None, {"cache": True, "escalated": True}, "tool")
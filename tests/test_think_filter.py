@@ -0,0 +1,71 @@
+# Tests for brain/think_filter.py (run with: python -m pytest tests)
+
+import os
+import sys
+import json
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from brain.think_filter import ThinkFilter, strip_think
+
+
+def _stream(chunks):
+    think = ThinkFilter()
+    visible = "".join(think.feed(chunk) for chunk in chunks) + think.flush()
+    return visible, think
+
+
+def test_open_tag_split_across_chunks():
+    visible, think = _stream(["<thi", "nk>plan", " it</think>\n\nHello", " there"])
+    assert visible == "Hello there"
+    assert think.reasoning == "plan it"
+
+
+def test_close_tag_split_across_chunks():
+    visible, think = _stream(["<think>a</th", "ink>Hi"])
+    assert visible == "Hi"
+    assert think.reasoning == "a"
+
+
+def test_every_split_point_gives_same_result():
+    text = "<think>reasoning here</think>\nThe answer is <b>42</b>."
+    for i in range(len(text) + 1):
+        assert _stream([text[:i], text[i:]])[0] == "The answer is <b>42</b>."
+
+
+def test_partial_tag_at_end_is_flushed_as_text():
+    visible, _ = _stream(["a < b and x <thi"])
+    assert visible == "a < b and x <thi"
+
+
+def test_unclosed_block_counts_as_reasoning():
+    visible, think = _stream(["Sure. <think>cut", " off"])
+    assert visible == "Sure. "
+    assert think.reasoning == "cut off"
+    assert think.reasoning_tokens > 0
+
+
+def test_strip_think():
+    assert strip_think("<think>x</think>Done")[0] == "Done"
+
+
+class _FakeResponse:
+    """Streamed Ollama response that ends without a "done" chunk."""
+
+    def __init__(self, pieces):
+        self.lines = [json.dumps({"response": piece}).encode('utf-8') for piece in pieces]
+
+    def iter_lines(self):
+        return iter(self.lines)
+
+    def close(self):
+        pass
+
+
+def test_stream_without_done_flushes_held_text():
+    from brain.llm import _read_stream
+
+    tokens = []
+    text = _read_stream(_FakeResponse(["<think>x</think>It costs <", "thi"]), None, tokens.append)
+    assert text == "It costs <thi"
+    assert "".join(tokens) == text
@@ -0,0 +1,67 @@
+# Tests for brain/tool_format.py (run with: python -m pytest tests)
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from brain.tool_format import ToolCallStream, parse_reply
+
+
+def _stream(chunks):
+    out = []
+    reader = ToolCallStream(out.append)
+    for chunk in chunks:
+        reader.feed(chunk)
+    return reader, "".join(out)
+
+
+def _splits(text):
+    """Every way of cutting text into two chunks, plus one chunk per character."""
+    yield from ([text[:i], text[i:]] for i in range(len(text) + 1))
+    yield list(text)
+
+
+def test_tool_key_split_mid_key():
+    reader, text = _stream(['{"to', 'ol": "get_time", "args": {}}'])
+    assert reader.kind == "tool"
+    assert text == ""
+
+
+def test_tool_call_detected_at_every_split():
+    raw = '{"tool": "create_file", "args": {"path": "a.txt"}}'
+    for chunks in _splits(raw):
+        reader, text = _stream(chunks)
+        assert reader.kind == "tool"
+        assert text == ""
+
+
+def test_reply_decoded_at_every_split():
+    raw = '{"reply": "Caf\\u00e9 \\"ok\\"\\n\\ud83d\\ude00 done"}'
+    for chunks in _splits(raw):
+        reader, text = _stream(chunks)
+        assert reader.kind == "reply"
+        assert text == 'Café "ok"\n\U0001F600 done'
+
+
+def test_unstructured_text_passes_through():
+    reader, text = _stream(["  Hel", "lo {there}"])
+    assert reader.kind == "text"
+    assert text == "Hello {there}"
+
+
+def test_parse_reply_tool_call():
+    call, _ = parse_reply('{"tool": "get_time", "args": {}}')
+    assert call == {"tool": "get_time", "args": {}}
+
+
+def test_parse_reply_fenced_with_trailing_chatter():
+    call, _ = parse_reply('```json\n{"tool": "open_app", "args": {"name": "x"}}\n```')
+    assert call == {"tool": "open_app", "args": {"name": "x"}}
+    call, _ = parse_reply('{"tool": "open_app", "args": {"name": "x"}} Opening it now.')
+    assert call == {"tool": "open_app", "args": {"name": "x"}}
+
+
+def test_parse_reply_text():
+    assert parse_reply('{"reply": "Hi"}') == (None, "Hi")
+    assert parse_reply("plain words") == (None, "plain words")
@@ -0,0 +1,59 @@
+# Tests for core/tool_selector.py (run with: python -m pytest tests)
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+
+from core import tool_selector as selector_module
+from core.tool_router import router
+from core.tool_selector import ToolSelector
+
+CORE = ["get_time", "get_fact", "list_memories"]
+
+
+@pytest.fixture
+def selector():
+    return ToolSelector(top_n=5, min_score=0.2, core=CORE, embed_model=None)
+
+
+@pytest.mark.parametrize("text, tool", [
+    ("create a file notes.txt saying hi", "create_file"),
+    ("remind me in 10 minutes to stretch", "set_reminder"),
+    ("where is parse_reply defined", "find_symbol"),
+    ("forget my birthday", "delete_fact"),
+])
+def test_expected_tool_is_offered(selector, text, tool):
+    chosen = selector.select(text)
+    assert tool in chosen
+    assert len(chosen) <= 5 + len(CORE)
+
+
+def test_small_talk_gets_only_core_tools(selector):
+    assert selector.select("hello there") == CORE
+
+
+def test_selection_is_deterministic_and_in_registry_order(selector):
+    text = "create a file notes.txt saying hi"
+    first = selector.select(text)
+    assert selector.select(text) == first
+    assert ToolSelector(top_n=5, min_score=0.2, core=CORE, embed_model=None).select(text) == first
+    order = list(router.tools)
+    assert first == sorted(first, key=order.index)
+
+
+def test_core_tools_always_offered(selector):
+    for text in ("open spotify", "list my tasks", "zzz"):
+        assert set(CORE) <= set(selector.select(text))
+
+
+def test_every_tool_chosen_means_none(selector):
+    everything = ToolSelector(top_n=len(router.tools), min_score=0.0, core=CORE, embed_model=None)
+    assert everything.select("anything at all") is None
+
+
+def test_disabled_offers_all_tools(selector, monkeypatch):
+    monkeypatch.setattr(selector_module, "TOOL_SELECTION_ENABLED", False)
+    assert selector.select("what time is it") is None
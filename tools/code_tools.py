@@ -0,0 +1,37 @@
+from core.file_index import file_index
+
+def find_symbol(name, path=None):
+    """
+    Finds where functions, classes or imports are defined in ATLAS_FILES code.
+    Args:
+        name (str): Symbol name, e.g. 'load_config' or 'Parser.parse'.
+        path (str): Optional. Only look in this file.
+    """
+    try:
+        matches = file_index.find_symbols(name, path)
+        if not matches:
+            return f"No symbol matches '{name}'."
+        return "\n".join(f"{rel}:{start}-{end} {kind} {symbol}: {signature}"
+                         for rel, symbol, kind, start, end, signature in matches)
+    except Exception as e:
+        return f"Error finding symbol: {e}"
+
+def get_symbol_source(name, path=None):
+    """
+    Returns the source code of one function or class (instead of the whole file).
+    Args:
+        name (str): Symbol name, e.g. 'load_config' or 'Parser.parse'.
+        path (str): Optional. File containing it, if the name is defined in several places.
+    """
+    try:
+        found = file_index.symbol_source(name, path)
+        if not found:
+            return f"No symbol matches '{name}'."
+        
+        (rel, symbol, kind, start, end, _), source, others = found
+        text = f"# {rel}:{start}-{end} ({kind} {symbol})\n{source}"
+        if others:
+            text += "\n[also defined in: " + ", ".join(f"{row[0]}:{row[3]}" for row in others) + "]"
+        return text
+    except Exception as e:
+        return f"Error reading symbol: {e}"
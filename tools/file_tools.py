@@ -1,4 +1,11 @@
 import os
+import re
+import mmap
+import shutil
+import tempfile
+
+from config import READ_FILE_MAX_BYTES, READ_FILE_MAX_MATCHES
+from utils import patch as patching
 
 # Allowed directory for file operations
 ATLAS_FILES_DIR = r"C:\Users\Mohan\OneDrive\Desktop\ATLAS_FILES"
@@ -41,28 +48,164 @@ def create_file(path, content):
         if directory:
             os.makedirs(directory, exist_ok=True)
             
-        with open(full_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+        _write_atomic(full_path, content)
         return f"Successfully created file: {full_path}"
     except Exception as e:
         return f"Error creating file: {e}"
 
-def read_file(path):
+def read_file(path, start_line=1, end_line=None, tail=None, pattern=None, column=1):
     """
-    Reads content from a file.
+    Reads content from a file. Large files are returned a page at a time.
     Args:
         path (str): Filename or path relative to ATLAS_FILES.
+        start_line (int): First line to read (1-based).
+        end_line (int): Last line to read (default: as much as fits).
+        tail (int): Read the last N lines instead.
+        pattern (str): Only return lines matching this regex, with line numbers.
+        column (int): Byte column in start_line to start at, for lines too long to read at once.
     """
     try:
         full_path = _get_safe_path(path)
         if not os.path.exists(full_path):
             return f"File not found: {path}"
+        if os.path.getsize(full_path) == 0:
+            return ""
         
-        with open(full_path, 'r', encoding='utf-8') as f:
-            return f.read()
+        start_line = max(1, int(start_line or 1))
+        end_line = int(end_line) if end_line else None
+        # Memory-mapped: only the pages that are scanned or returned are read
+        with open(full_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if pattern:
+                return _read_matches(data, pattern, start_line, end_line)
+            if tail:
+                return _read_tail(data, int(tail))
+            return _read_lines(data, start_line, end_line, max(1, int(column or 1)))
     except Exception as e:
         return f"Error reading file: {e}"
 
+def _decode(raw):
+    return raw.decode('utf-8', errors='replace').replace('\r\n', '\n')
+
+def _count_lines(data):
+    """Number of lines in a mapped file, counted in 1 MB chunks."""
+    count = 0
+    for offset in range(0, len(data), 1 << 20):
+        count += data[offset:offset + (1 << 20)].count(b'\n')
+    return count + (0 if data[-1:] == b'\n' else 1)
+
+def _line_offset(data, line):
+    """Byte offset where a 1-based line starts (len(data) if past the end)."""
+    pos = 0
+    for _ in range(line - 1):
+        newline = data.find(b'\n', pos)
+        if newline < 0:
+            return len(data)
+        pos = newline + 1
+    return pos
+
+def _truncated(first, last, data, hint, columns=None):
+    """Marker appended to partial output, so the model knows how to page on."""
+    shown = f"lines {first}-{last}" if columns is None else f"line {first}, columns {columns[0]}-{columns[1]},"
+    return f"\n[truncated: showing {shown} of {_count_lines(data)} ({len(data)} bytes); {hint}]"
+
+def _char_boundary(data, index, low):
+    """Move index back so it doesn't split a UTF-8 character."""
+    while index > low + 1 and index < len(data) and (data[index] & 0xC0) == 0x80:
+        index -= 1
+    return index
+
+def _read_lines(data, start_line, end_line, column=1):
+    """Lines start_line..end_line, capped at READ_FILE_MAX_BYTES; overlong lines are paged by column."""
+    line_begin = _line_offset(data, start_line)
+    if line_begin >= len(data):
+        return f"[empty: the file has {_count_lines(data)} lines]"
+    line_end = data.find(b'\n', line_begin)
+    pos = min(line_begin + column - 1, len(data) if line_end < 0 else line_end)
+    
+    limit = pos + READ_FILE_MAX_BYTES
+    end = pos
+    line = start_line - 1
+    cut = False
+    while end < len(data) and (end_line is None or line < end_line):
+        newline = data.find(b'\n', end)
+        stop = len(data) if newline < 0 else newline + 1
+        if stop > limit and line >= start_line:
+            break
+        line += 1
+        if stop > limit:
+            # Only the first line can be cut: it alone doesn't fit
+            end = _char_boundary(data, limit, pos)
+            cut = True
+            break
+        end = stop
+    
+    text = _decode(data[pos:end])
+    if cut:
+        columns = (pos - line_begin + 1, end - line_begin)
+        text += _truncated(start_line, start_line, data,
+                           f"continue with start_line={start_line} column={end - line_begin + 1}", columns)
+    elif end < len(data) and (end_line is None or line < end_line):
+        text += _truncated(start_line, line, data, f"continue with start_line={line + 1}")
+    return text
+
+def _read_tail(data, count):
+    """The last count lines, capped at READ_FILE_MAX_BYTES."""
+    stop = len(data) - 1 if data[-1:] == b'\n' else len(data)
+    cut = stop
+    begin = stop
+    for _ in range(max(1, count)):
+        newline = data.rfind(b'\n', 0, cut)
+        begin = newline + 1
+        if newline < 0:
+            break
+        cut = newline
+    
+    cut = False
+    if stop - begin > READ_FILE_MAX_BYTES:
+        newline = data.find(b'\n', stop - READ_FILE_MAX_BYTES, stop)
+        if newline >= 0:
+            begin = newline + 1
+        else:
+            # The last line alone is too long: show its end
+            begin = stop - READ_FILE_MAX_BYTES
+            while begin < stop and (data[begin] & 0xC0) == 0x80:
+                begin += 1
+            cut = True
+    
+    text = _decode(data[begin:stop])
+    if cut:
+        total = _count_lines(data)
+        line_begin = data.rfind(b'\n', 0, begin) + 1
+        columns = (begin - line_begin + 1, stop - line_begin)
+        text += _truncated(total, total, data, f"start of this line: start_line={total}", columns)
+    elif begin > 0:
+        total = _count_lines(data)
+        first = total - text.count('\n')
+        text += _truncated(first, total, data, f"earlier lines: end_line={first - 1}")
+    return text
+
+def _read_matches(data, pattern, start_line, end_line):
+    """Numbered lines matching pattern (case-insensitive), capped in count and size."""
+    try:
+        regex = re.compile(rb'^.*(?:' + pattern.encode('utf-8') + rb').*$', re.IGNORECASE | re.MULTILINE)
+    except re.error:
+        regex = re.compile(rb'^.*' + re.escape(pattern.encode('utf-8')) + rb'.*$', re.IGNORECASE | re.MULTILINE)
+    
+    pos = _line_offset(data, start_line)
+    endpos = _line_offset(data, end_line + 1) if end_line else len(data)
+    line, counted = start_line, pos
+    out, size = [], 0
+    for match in regex.finditer(data, pos, endpos):
+        line += data[counted:match.start()].count(b'\n')
+        counted = match.start()
+        entry = f"{line}: {_decode(match.group()).rstrip()[:300]}"
+        if len(out) >= READ_FILE_MAX_MATCHES or size + len(entry) > READ_FILE_MAX_BYTES:
+            out.append(f"[truncated: {len(out)} matches shown; continue with start_line={line}]")
+            break
+        out.append(entry)
+        size += len(entry) + 1
+    return "\n".join(out) if out else f"No lines match '{pattern}'."
+
 def list_files(directory="."):
     """
     Lists files in a directory.
@@ -79,12 +222,58 @@ def list_files(directory="."):
     except Exception as e:
         return f"Error listing files: {e}"
 
-def edit_file(path, content):
+def edit_file(path, patch):
     """
-    Overwrites an existing file.
+    Changes part of an existing file with a patch.
     Args:
         path (str): Filename relative to ATLAS_FILES.
-        content (str): New content.
+        patch (str): SEARCH/REPLACE blocks ("<<<<<<< SEARCH", old lines, "=======", new lines, ">>>>>>> REPLACE") or a unified diff.
+    """
+    try:
+        full_path, text, hunks = _patched(path, patch)
+        _write_atomic(full_path, text, newline='')
+        lines = sum(len(hunk.new) for hunk in hunks)
+        return f"Successfully edited file: {full_path} ({len(hunks)} change(s), {lines} line(s) written)"
+    except Exception as e:
+        return f"Error editing file: {e}"
+
+def _patched(path, patch):
+    """
+    Applies a patch to a file in memory.
+    Returns (full_path, new_text, hunks); raises on a missing file or a patch that doesn't match.
+    """
+    full_path = _get_safe_path(path)
+    if not os.path.exists(full_path):
+        raise FileNotFoundError(f"File not found: {path}")
+    with open(full_path, 'r', encoding='utf-8', newline='') as f:
+        text = f.read()
+    hunks = patching.parse(patch)
+    return full_path, patching.apply(text, hunks), hunks
+
+def _preview_edit(path, patch):
+    """
+    Dry run of edit_file for the confirmation prompt: only the changed hunks.
+    Raises patching.PatchError (or OSError) if the patch can't be applied.
+    """
+    _, _, hunks = _patched(path, patch)
+    return patching.preview(hunks)
+
+def _write_atomic(full_path, content, newline=None):
     """
-    # Currently same as create_file, but semantically distinct
-    return create_file(path, content)
+    Writes via a temporary file in the same directory and os.replace, so an
+    interrupted write never leaves a half-written file.
+    """
+    directory = os.path.dirname(full_path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".atlas-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', newline=newline) as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(full_path):
+            shutil.copymode(full_path, tmp_path)
+        os.replace(tmp_path, full_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,36 @@
+import time
+
+from core.file_index import file_index
+
+def find_files(name):
+    """
+    Finds files in ATLAS_FILES (all folders) by name or pattern.
+    Args:
+        name (str): Part of a file name, or a pattern like '*.py'.
+    """
+    try:
+        matches = file_index.find(name)
+        if not matches:
+            return f"No files match '{name}'."
+        
+        lines = []
+        for path, size, mtime in matches:
+            modified = time.strftime('%Y-%m-%d %H:%M', time.localtime(mtime))
+            lines.append(f"{path} ({size} bytes, modified {modified})")
+        return "\n".join(lines)
+    except Exception as e:
+        return f"Error finding files: {e}"
+
+def search_files(query):
+    """
+    Searches the contents of all files in ATLAS_FILES; returns matching lines with line numbers.
+    Args:
+        query (str): Words to look for.
+    """
+    try:
+        results = file_index.search(query)
+        if not results:
+            return f"No files contain '{query}'."
+        return "\n".join(f"{path}:{number}: {line}" for path, number, line in results)
+    except Exception as e:
+        return f"Error searching files: {e}"
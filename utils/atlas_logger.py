@@ -1,27 +1,18 @@
-import logging
-import os
-from logging.handlers import RotatingFileHandler
+# Atlas Event Log
+# File-only structured events (logs/atlas.log) on the shared logging queue
 
-LOG_DIR = os.path.join(os.path.dirname(__file__), '..', 'logs')
-os.makedirs(LOG_DIR, exist_ok=True)
+from utils.logger import get_logger
 
-LOG_FILE = os.path.join(LOG_DIR, 'atlas.log')
-
-logger = logging.getLogger('atlas')
-logger.setLevel(logging.INFO)
-
-handler = RotatingFileHandler(LOG_FILE, maxBytes=2*1024*1024, backupCount=3)
-handler.setFormatter(logging.Formatter('%(asctime)s [%(levelname)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S'))
-logger.addHandler(handler)
+logger = get_logger("events")
 
 def log_wake():
-    logger.info("Wake word detected")
+    logger.event("Wake word detected")
 
 def log_tool(tool_name, args=None, result=None):
     if result:
-        logger.info(f"Tool: {tool_name} -> {result}")
+        logger.event(f"Tool: {tool_name} -> {result}", tool=tool_name)
     else:
-        logger.info(f"Tool: {tool_name} args={args}")
+        logger.event(f"Tool: {tool_name} args={args}", tool=tool_name)
 
 def log_error(message, exc=None):
     if exc:
@@ -30,7 +21,7 @@ def log_error(message, exc=None):
         logger.error(message)
 
 def log_reminder(message):
-    logger.info(f"Reminder: {message}")
+    logger.event(f"Reminder: {message}")
 
 def log_info(message):
-    logger.info(message)
+    logger.event(message)
@@ -1,35 +1,235 @@
-# Simple Logger
-# Console logging for debugging
+# Logger
+# Queue-based logging. Callers only check the level and enqueue a record;
+# a single listener thread formats and writes to the console and to
+# logs/atlas.log (one JSON object per line), so slow terminals or disks
+# never stall the audio, STT or LLM threads.
+#
+# Usage:
+#   from utils.logger import get_logger
+#   log = get_logger("stt")
+#   log.status("   (Recording...)")          # console status line, as printed before
+#   log.error("Transcribe failed", error=str(e))
 
-from datetime import datetime
+import os
+import sys
+import json
+import queue
+import atexit
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from config import LOG_LEVEL
+
+LOG_DIR = os.path.join(os.path.dirname(__file__), '..', 'logs')
+LOG_FILE = os.path.join(LOG_DIR, 'atlas.log')
+
+# Unbounded, lock-light queue: put() never blocks the caller
+_queue = queue.SimpleQueue()
+
+# Loggers whose records go to their own handler instead of console/atlas.log
+# (e.g. atlas.trace -> logs/trace.jsonl); see add_route()
+_routes = {}
+
+
+class _EnqueueHandler(QueueHandler):
+    """QueueHandler that leaves all formatting to the listener thread."""
+
+    def prepare(self, record):
+        return record
+
+
+class _Listener(QueueListener):
+    """Writer thread; also answers flush() markers."""
+
+    def handle(self, record):
+        event = getattr(record, 'flush_event', None)
+        if event is not None:
+            for handler in self.handlers + tuple(_routes.values()):
+                handler.flush()
+            event.set()
+            return
+        routed = _routes.get(record.name)
+        if routed is not None:
+            if record.levelno >= routed.level:
+                routed.handle(record)
+            return
+        super().handle(record)
+
+
+class _ConsoleFormatter(logging.Formatter):
+    """Status lines print bare, as the old print() calls did; logs get a timestamp."""
+
+    def __init__(self):
+        super().__init__('[%(asctime)s] %(levelname)s: %(message)s', datefmt='%H:%M:%S')
+
+    def format(self, record):
+        if getattr(record, 'status', False):
+            return record.getMessage()
+        return super().format(record)
+
+
+class _JsonFormatter(logging.Formatter):
+    """One structured JSON object per record."""
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "component": record.name.split('.', 1)[-1],
+            "msg": record.getMessage().strip(),
+            "thread": record.threadName,
+        }
+        fields = getattr(record, 'fields', None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _ConsoleHandler(logging.StreamHandler):
+    """Console output that can be muted for file-only records and redirected."""
+
+    def emit(self, record):
+        if not getattr(record, 'console', True):
+            return
+        # Debug lines would interleave with typed replies; keep them in the file
+        if record.levelno <= logging.DEBUG and not Logger.DEBUG:
+            return
+        super().emit(record)
+
+
+def _build_pipeline():
+    root = logging.getLogger('atlas')
+    root.setLevel(getattr(logging, LOG_LEVEL.upper(), logging.INFO))
+    root.propagate = False
+    root.addHandler(_EnqueueHandler(_queue))
+
+    console = _ConsoleHandler(sys.stdout)
+    console.setFormatter(_ConsoleFormatter())
+
+    handlers = [console]
+    try:
+        os.makedirs(LOG_DIR, exist_ok=True)
+        file_handler = RotatingFileHandler(LOG_FILE, maxBytes=2 * 1024 * 1024, backupCount=3, encoding='utf-8')
+        file_handler.setFormatter(_JsonFormatter())
+        handlers.append(file_handler)
+    except OSError:
+        # Read-only install: console only
+        pass
+
+    listener = _Listener(_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener, console
+
+
+_listener, _console = _build_pipeline()
+
+
+def add_route(name, handler):
+    """
+    Send one logger's records only to handler, written on the listener thread.
+
+    Args:
+        name: Logger name (e.g. "atlas.trace")
+        handler: Handler that owns the records (not console or atlas.log)
+
+    Returns:
+        The logging.Logger to log to
+    """
+    _routes[name] = handler
+    route_logger = logging.getLogger(name)
+    route_logger.setLevel(logging.INFO)
+    route_logger.propagate = False
+    route_logger.addHandler(_EnqueueHandler(_queue))
+    return route_logger
+
+
+def set_console_stream(stream):
+    """Send console output elsewhere (replay keeps stdout for its JSONL)."""
+    _console.setStream(stream)
+
+
+def flush(timeout=1.0):
+    """
+    Wait until everything logged so far has been written.
+
+    Used before printing interactive output that must appear after status lines.
+    """
+    event = threading.Event()
+    record = logging.LogRecord('atlas', logging.INFO, __file__, 0, "", None, None)
+    record.flush_event = event
+    _queue.put(record)
+    return event.wait(timeout)
+
+
+class ComponentLogger:
+    """Per-module logger; extra keyword arguments become structured fields."""
+
+    def __init__(self, name):
+        self._logger = logging.getLogger(f"atlas.{name}")
+
+    def _log(self, level, message, fields, status=False, console=True):
+        # Level check first: filtered records cost no formatting or allocation
+        if self._logger.isEnabledFor(level):
+            # makeRecord directly skips logging's per-call stack walk (findCaller)
+            record = self._logger.makeRecord(self._logger.name, level, "", 0, message, None, None,
+                                             extra={"status": status, "console": console, "fields": fields})
+            self._logger.handle(record)
+
+    def status(self, message, **fields):
+        """User-facing status line (printed without timestamp)."""
+        self._log(logging.INFO, message, fields, status=True)
+
+    def event(self, message, **fields):
+        """File-only record for the structured log."""
+        self._log(logging.INFO, message, fields, console=False)
+
+    def debug(self, message, **fields):
+        self._log(logging.DEBUG, message, fields)
+
+    def info(self, message, **fields):
+        self._log(logging.INFO, message, fields)
+
+    def warning(self, message, **fields):
+        self._log(logging.WARNING, message, fields)
+
+    def error(self, message, **fields):
+        self._log(logging.ERROR, message, fields)
+
+
+def get_logger(name):
+    """Logger for one component (e.g. "stt", "wake", "main")."""
+    return ComponentLogger(name)
+
+
+_core = ComponentLogger("core")
 
 
 class Logger:
     """Simple console logger for debugging."""
-    
+
     DEBUG = True  # Set to False to disable debug logs
-    
+
     @staticmethod
     def info(message):
         """Log info message."""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        print(f"[{timestamp}] INFO: {message}")
-    
+        _core.info(message)
+
     @staticmethod
     def debug(message):
         """Log debug message (only if DEBUG is True)."""
         if Logger.DEBUG:
-            timestamp = datetime.now().strftime("%H:%M:%S")
-            print(f"[{timestamp}] DEBUG: {message}")
-    
+            _core.debug(message)
+
     @staticmethod
     def error(message):
         """Log error message."""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        print(f"[{timestamp}] ERROR: {message}")
-    
+        _core.error(message)
+
     @staticmethod
     def warning(message):
         """Log warning message."""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        print(f"[{timestamp}] WARNING: {message}")
+        _core.warning(message)
@@ -0,0 +1,317 @@
+# Metrics
+# In-process counters, gauges and fixed-bucket histograms, cheap enough for
+# hot paths (one small lock per metric). Exported in Prometheus text format
+# to logs/metrics.prom every METRICS_EXPORT_INTERVAL seconds, and optionally
+# served at http://127.0.0.1:METRICS_PORT/metrics for scraping.
+#
+# Usage:
+#   from utils import metrics
+#   REQUESTS = metrics.counter("atlas_llm_requests_total", "Ollama generate calls")
+#   REQUESTS.inc(status="ok")
+
+import os
+import time
+import atexit
+import bisect
+import threading
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import METRICS_ENABLED, METRICS_EXPORT_INTERVAL, METRICS_PORT
+
+METRICS_DIR = os.path.join(os.path.dirname(__file__), '..', 'logs')
+METRICS_FILE = os.path.join(METRICS_DIR, 'metrics.prom')
+
+# Latency buckets in seconds, from wake/DB calls up to slow LLM turns
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _key(labels):
+    return tuple(sorted(labels.items())) if labels else ()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(key):
+    if not key:
+        return ""
+    body = ",".join(f'{k}="{_escape(v)}"' for k, v in key)
+    return "{" + body + "}"
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonically increasing count."""
+
+    kind = "counter"
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(_key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [(self.name, key, value) for key, value in items]
+
+
+class Gauge(Counter):
+    """Value that can go up and down, or be read from a callback at export."""
+
+    kind = "gauge"
+
+    def __init__(self, name, help_text):
+        super().__init__(name, help_text)
+        self._functions = {}
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[_key(labels)] = value
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, func, **labels):
+        """Sample func() at export time instead of updating on the hot path."""
+        self._functions[_key(labels)] = func
+
+    def samples(self):
+        samples = super().samples()
+        for key, func in list(self._functions.items()):
+            try:
+                samples.append((self.name, key, func()))
+            except Exception:
+                continue
+        return samples
+
+
+class Histogram:
+    """Distribution over fixed buckets, plus sum and count."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                # Per-bucket counts (last slot is +Inf), sum, count
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def time(self, **labels):
+        """Context manager observing the elapsed seconds of a block."""
+        return _Timer(self, labels)
+
+    def count(self, **labels):
+        entry = self._values.get(_key(labels))
+        return entry[2] if entry else 0
+
+    def samples(self):
+        with self._lock:
+            items = [(key, list(counts), total, n) for key, (counts, total, n) in self._values.items()]
+        samples = []
+        for key, counts, total, n in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                samples.append((f"{self.name}_bucket", key + (("le", _format_value(float(bound))),), cumulative))
+            samples.append((f"{self.name}_sum", key, total))
+            samples.append((f"{self.name}_count", key, n))
+        return samples
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class MetricsRegistry:
+    """Named metrics for the whole process."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, help_text, *args):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, *args)
+            elif type(metric) is not cls:
+                raise ValueError(f"Metric '{name}' already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name, help_text):
+        return self._get_or_create(Counter, name, help_text)
+
+    def gauge(self, name, help_text):
+        return self._get_or_create(Gauge, name, help_text)
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, help_text, buckets)
+
+    def render(self):
+        """All metrics in Prometheus text exposition format."""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines = []
+        for metric in metrics:
+            samples = metric.samples()
+            if not samples:
+                continue
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, key, value in samples:
+                lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# Singleton instance
+registry = MetricsRegistry()
+
+
+def counter(name, help_text):
+    return registry.counter(name, help_text)
+
+
+def gauge(name, help_text):
+    return registry.gauge(name, help_text)
+
+
+def histogram(name, help_text, buckets=DEFAULT_BUCKETS):
+    return registry.histogram(name, help_text, buckets)
+
+
+def timed(histogram, **labels):
+    """Decorator observing each call's latency in histogram."""
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start, **labels)
+        return wrapper
+    return decorate
+
+
+# ==================== EXPORT ====================
+
+def write_file(path=METRICS_FILE):
+    """Write the current metrics atomically to a Prometheus text file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(registry.render())
+    os.replace(tmp, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split('?')[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class MetricsExporter:
+    """Background thread writing the metrics file, plus the optional /metrics endpoint."""
+
+    def __init__(self, interval=METRICS_EXPORT_INTERVAL, port=METRICS_PORT, path=METRICS_FILE):
+        self.interval = interval
+        self.port = port
+        self.path = path
+        self.thread = None
+        self.httpd = None
+        self._stop = threading.Event()
+
+    def start(self):
+        self.thread = threading.Thread(target=self._loop, daemon=True, name="atlas-metrics")
+        self.thread.start()
+        if self.port:
+            try:
+                self.httpd = ThreadingHTTPServer(("127.0.0.1", self.port), _MetricsHandler)
+                threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+                print(f"[Metrics] Serving http://127.0.0.1:{self.port}/metrics")
+            except OSError as e:
+                print(f"[Metrics] Could not bind port {self.port}: {e}")
+                self.httpd = None
+        # Final snapshot so short runs (replay) still leave a file behind
+        atexit.register(self.export)
+        return self
+
+    def export(self):
+        try:
+            write_file(self.path)
+        except Exception as e:
+            print(f"[Metrics Error] {e}")
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.export()
+
+    def stop(self):
+        self._stop.set()
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+        self.export()
+
+
+_exporter = None
+
+
+def start_exporter():
+    """Start periodic export once per process (no-op if METRICS_ENABLED is off)."""
+    global _exporter
+    if METRICS_ENABLED and _exporter is None:
+        _exporter = MetricsExporter().start()
+    return _exporter
@@ -0,0 +1,257 @@
+# Patch
+# Applies model-written edits to text: SEARCH/REPLACE blocks or unified diffs.
+# Models miscount diff line numbers and drift on whitespace, so each hunk is
+# located by its context rather than its header: exact match first, then
+# ignoring indentation/trailing space, then the closest window by similarity
+# (PATCH_FUZZ_THRESHOLD). A fuzzy window must use the same words line for
+# line, so it only forgives spacing, quotes and punctuation - never a different
+# name or value. Headers only break ties between equal matches.
+#
+# SEARCH/REPLACE block:
+#   <<<<<<< SEARCH
+#   old lines
+#   =======
+#   new lines
+#   >>>>>>> REPLACE
+
+import re
+import difflib
+
+from config import PATCH_FUZZ_THRESHOLD
+
+_SEARCH = re.compile(r"^<{5,}\s*SEARCH\s*$")
+_DIVIDER = re.compile(r"^={5,}\s*$")
+_REPLACE = re.compile(r"^>{5,}\s*REPLACE\s*$")
+_HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+\d+(?:,\d+)? @@")
+_WORD = re.compile(r"\w+")
+
+
+class PatchError(ValueError):
+    """A patch that can't be parsed or doesn't match the file."""
+
+
+class Hunk:
+    """One replacement: old lines -> new lines, near line `hint` (0-based) if known."""
+
+    __slots__ = ("old", "new", "hint", "start", "match")
+
+    def __init__(self, old, new, hint=None):
+        self.old = old
+        self.new = new
+        self.hint = hint
+        self.start = None       # where it applied (0-based line)
+        self.match = None       # "exact", "whitespace" or "fuzzy"
+
+
+def parse(patch):
+    """
+    Parse SEARCH/REPLACE blocks or a unified diff.
+
+    Returns:
+        List of Hunk
+
+    Raises:
+        PatchError: No hunks found, or a block is malformed
+    """
+    lines = patch.replace('\r\n', '\n').split('\n')
+    if any(_SEARCH.match(line) for line in lines):
+        hunks = _parse_blocks(lines)
+    elif any(_HUNK_HEADER.match(line) for line in lines):
+        hunks = _parse_diff(lines)
+    else:
+        raise PatchError("expected SEARCH/REPLACE blocks or a unified diff with @@ hunk headers")
+    if not hunks:
+        raise PatchError("patch contains no changes")
+    return hunks
+
+
+def _parse_blocks(lines):
+    hunks = []
+    state, old, new = None, [], []
+    for line in lines:
+        if state is None:
+            if _SEARCH.match(line):
+                state, old, new = "search", [], []
+        elif state == "search":
+            if _DIVIDER.match(line):
+                state = "replace"
+            else:
+                old.append(line)
+        elif _REPLACE.match(line):
+            if old != new:
+                hunks.append(Hunk(old, new))
+            state = None
+        else:
+            new.append(line)
+    if state is not None:
+        raise PatchError("unterminated SEARCH/REPLACE block (missing '=======' or '>>>>>>> REPLACE')")
+    return hunks
+
+
+def _parse_diff(lines):
+    hunks = []
+    current = None
+    for line in lines:
+        header = _HUNK_HEADER.match(line)
+        if header:
+            # "-L,0" inserts after line L; otherwise the hunk starts at line L
+            line = int(header.group(1))
+            current = Hunk([], [], line if header.group(2) == "0" else max(0, line - 1))
+            hunks.append(current)
+        elif current is None or line.startswith(('--- ', '+++ ', '\\')):
+            continue
+        elif line.startswith('-'):
+            current.old.append(line[1:])
+        elif line.startswith('+'):
+            current.new.append(line[1:])
+        else:
+            # Context; models often drop the leading space on blank lines
+            text = line[1:] if line.startswith(' ') else line
+            current.old.append(text)
+            current.new.append(text)
+
+    for hunk in hunks:
+        # A trailing blank context line is usually the diff's final newline
+        while hunk.old and hunk.new and hunk.old[-1] == "" and hunk.new[-1] == "":
+            hunk.old.pop()
+            hunk.new.pop()
+    return [hunk for hunk in hunks if hunk.old != hunk.new]
+
+
+def _candidates(lines, old, key):
+    wanted = [key(line) for line in old]
+    size = len(old)
+    first = wanted[0]
+    return [i for i in range(len(lines) - size + 1)
+            if key(lines[i]) == first and [key(line) for line in lines[i:i + size]] == wanted]
+
+
+def _closest(candidates, hint):
+    if len(candidates) == 1:
+        return candidates[0]
+    if hint is None:
+        raise PatchError(f"the text to replace occurs {len(candidates)} times; include more surrounding lines")
+    return min(candidates, key=lambda i: abs(i - hint))
+
+
+def _same_words(old, window):
+    """Whether each line of window has the same identifiers and numbers as old."""
+    return all(_WORD.findall(a) == _WORD.findall(b) for a, b in zip(old, window))
+
+
+def _locate(lines, hunk):
+    """Index of hunk.old in lines and how it matched."""
+    old = hunk.old
+    if not old:
+        # Pure insertion (e.g. "@@ -0,0 +1,3 @@"): at the hinted line or the
+        # end - before the "" left by a final newline, which stays last
+        end = len(lines) - 1 if lines[-1] == "" else len(lines)
+        return (end if hunk.hint is None else min(hunk.hint, end)), "exact"
+
+    for match, key in (("exact", lambda line: line), ("whitespace", lambda line: line.strip())):
+        candidates = _candidates(lines, old, key)
+        if candidates:
+            return _closest(candidates, hunk.hint), match
+
+    # Fuzzy: best-scoring window of the same length with the same words
+    size = len(old)
+    target = "\n".join(line.strip() for line in old)
+    best, best_ratio = None, 0.0
+    matcher = difflib.SequenceMatcher(None, b=target, autojunk=False)
+    for i in range(len(lines) - size + 1):
+        matcher.set_seq1("\n".join(line.strip() for line in lines[i:i + size]))
+        floor = max(best_ratio, PATCH_FUZZ_THRESHOLD)
+        if matcher.real_quick_ratio() < floor or matcher.quick_ratio() < floor:
+            continue
+        ratio = matcher.ratio()
+        if not (ratio > best_ratio or (ratio == best_ratio and hunk.hint is not None and best is not None
+                                       and abs(i - hunk.hint) < abs(best - hunk.hint))):
+            continue
+        if _same_words(old, lines[i:i + size]):
+            best, best_ratio = i, ratio
+    if best is None:
+        preview = old[0].strip()[:60]
+        raise PatchError(f"could not find the lines to replace (starting '{preview}'); "
+                         "read the file again and copy them exactly")
+    return best, "fuzzy"
+
+
+def _indent(line):
+    return line[:len(line) - len(line.lstrip())]
+
+
+def _reindent(new, old, found):
+    """
+    Re-indent new lines to the file's style, learned from every matched line:
+    indents seen in old map to the file's, others are scaled by the step
+    between levels (e.g. a 2-space patch into a 4-space or tab file).
+    """
+    pairs = [(_indent(o), _indent(f)) for o, f in zip(old, found) if o.strip() and f.strip()]
+    if all(have == want for have, want in pairs):
+        return new
+    mapping = dict(pairs)
+    base_have, base_want = min(pairs, key=lambda pair: len(pair[0]))
+    steps = {(len(want) - len(base_want)) / (len(have) - len(base_have))
+             for have, want in pairs if len(have) > len(base_have) and len(want) > len(base_want)}
+    scale = steps.pop() if len(steps) == 1 else 1
+    deeper = [want[len(base_want)] for _, want in pairs if len(want) > len(base_want)]
+    fill = deeper[0] if deeper else (base_want or base_have or " ")[0]
+
+    result = []
+    for line in new:
+        have = _indent(line)
+        if line.strip() and have in mapping:
+            line = mapping[have] + line[len(have):]
+        elif line.strip() and len(have) > len(base_have):
+            line = base_want + fill * round((len(have) - len(base_have)) * scale) + line[len(have):]
+        result.append(line)
+    return result
+
+
+def apply(text, hunks):
+    """
+    Apply hunks to text in order.
+
+    Args:
+        text: Current file content (any newline style; it is preserved)
+        hunks: From parse()
+
+    Returns:
+        New text
+
+    Raises:
+        PatchError: A hunk doesn't match
+    """
+    newline = '\r\n' if '\r\n' in text else '\n'
+    lines = text.replace('\r\n', '\n').split('\n')
+    offset = 0
+    for number, hunk in enumerate(hunks, 1):
+        if hunk.hint is not None:
+            hunk.hint += offset
+        try:
+            start, hunk.match = _locate(lines, hunk)
+        except PatchError as e:
+            raise PatchError(f"hunk {number}: {e}")
+        found = lines[start:start + len(hunk.old)]
+        new = hunk.new if hunk.match == "exact" else _reindent(hunk.new, hunk.old, found)
+        lines[start:start + len(hunk.old)] = new
+        offset += len(new) - len(hunk.old)
+        # Keep what actually changed, for preview()
+        hunk.start, hunk.old, hunk.new = start, found, new
+    return newline.join(lines)
+
+
+def preview(hunks):
+    """Diff-style summary of applied hunks (changed lines and their context only)."""
+    out = []
+    for hunk in hunks:
+        where = f"line {hunk.start + 1}" if hunk.start is not None else "new"
+        note = f" ({hunk.match} match)" if hunk.match not in (None, "exact") else ""
+        out.append(f"@@ {where}{note} @@")
+        for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, hunk.old, hunk.new, autojunk=False).get_opcodes():
+            if tag == "equal":
+                out.extend(" " + line for line in hunk.old[i1:i2])
+            else:
+                out.extend("-" + line for line in hunk.old[i1:i2])
+                out.extend("+" + line for line in hunk.new[j1:j2])
+    return "\n".join(out)
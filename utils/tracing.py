@@ -0,0 +1,243 @@
+# Tracing
+# Lightweight span tracer for per-turn latency. Spans nest through
+# contextvars, follow work into executor/worker threads (bind() and
+# current_span()), and are appended to a rotating JSONL file by the logging
+# listener thread, so timed threads never wait on disk.
+#
+# Summarize p50/p95 per stage:
+#   python -m utils.tracing [logs/trace.jsonl] [--last N] [--json]
+
+import os
+import sys
+import json
+import math
+import time
+import uuid
+import logging
+import argparse
+import threading
+import contextvars
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+
+from config import TRACE_ENABLED, TRACE_MAX_BYTES, TRACE_BACKUPS
+from utils import logger
+
+TRACE_DIR = os.path.join(os.path.dirname(__file__), '..', 'logs')
+TRACE_FILE = os.path.join(TRACE_DIR, 'trace.jsonl')
+
+# perf_counter() + offset = wall clock; spans are timed with perf_counter
+_WALL_OFFSET = time.time() - time.perf_counter()
+
+_current = contextvars.ContextVar('atlas_span', default=None)
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+class Span:
+    """One timed stage of a turn."""
+
+    __slots__ = ('name', 'trace_id', 'span_id', 'parent_id', 'start', 'end', 'attrs')
+
+    def __init__(self, name, trace_id=None, parent_id=None, start=None, attrs=None):
+        self.name = name
+        self.trace_id = trace_id or uuid.uuid4().hex[:16]
+        self.span_id = uuid.uuid4().hex[:8]
+        self.parent_id = parent_id
+        self.start = time.perf_counter() if start is None else start
+        self.end = None
+        self.attrs = dict(attrs or {})
+
+    def set(self, **attrs):
+        """Attach attributes (sizes, counts, names) to the span."""
+        self.attrs.update(attrs)
+
+    def to_record(self):
+        record = {
+            "trace": self.trace_id,
+            "span": self.span_id,
+            "parent": self.parent_id,
+            "name": self.name,
+            "ts": round(self.start + _WALL_OFFSET, 6),
+            "ms": round((self.end - self.start) * 1000, 3),
+            "thread": threading.current_thread().name,
+        }
+        if self.attrs:
+            record["attrs"] = self.attrs
+        return record
+
+
+def _get_writer():
+    """
+    Create the trace logger on first use. Its rotating file handler runs on
+    the shared logging listener thread; callers only enqueue.
+    """
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                os.makedirs(TRACE_DIR, exist_ok=True)
+                handler = RotatingFileHandler(TRACE_FILE, maxBytes=TRACE_MAX_BYTES,
+                                              backupCount=TRACE_BACKUPS, encoding='utf-8')
+                handler.setFormatter(logging.Formatter('%(message)s'))
+                _writer = logger.add_route('atlas.trace', handler)
+    return _writer
+
+
+def _emit(span):
+    try:
+        _get_writer().info(json.dumps(span.to_record(), default=str))
+    except Exception:
+        # Tracing must never break a turn
+        pass
+
+
+def current_span():
+    """The active span in this context, or None."""
+    return _current.get()
+
+
+@contextmanager
+def span(name, parent=None, **attrs):
+    """
+    Time a block as a child of the current span (or of parent).
+
+    With no active span this starts a new trace.
+
+    Yields:
+        The Span, so callers can attach attributes
+    """
+    if not TRACE_ENABLED:
+        yield Span(name, attrs=attrs)
+        return
+
+    parent = parent or _current.get()
+    s = Span(name, parent.trace_id if parent else None, parent.span_id if parent else None, attrs=attrs)
+    reset = _current.set(s)
+    try:
+        yield s
+    finally:
+        _current.reset(reset)
+        s.end = time.perf_counter()
+        _emit(s)
+
+
+@contextmanager
+def trace(name, **attrs):
+    """Time a block as the root of a new trace, ignoring any active span."""
+    reset = _current.set(None)
+    try:
+        with span(name, **attrs) as s:
+            yield s
+    finally:
+        _current.reset(reset)
+
+
+def record(name, start, end, parent=None, **attrs):
+    """
+    Record a span measured elsewhere (perf_counter start/end), e.g. timings
+    reported by Ollama or observed on a worker thread.
+    """
+    if not TRACE_ENABLED:
+        return
+    parent = parent or _current.get()
+    s = Span(name, parent.trace_id if parent else None, parent.span_id if parent else None,
+             start=start, attrs=attrs)
+    s.end = end
+    _emit(s)
+
+
+def bind(func):
+    """Wrap func to run in a copy of the caller's context (for executor threads)."""
+    ctx = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return ctx.run(func, *args, **kwargs)
+    return run
+
+
+# ==================== SUMMARY CLI ====================
+
+def load_spans(path=TRACE_FILE):
+    """Read spans from a trace file and its rotated backups, oldest first."""
+    paths = [f"{path}.{i}" for i in range(TRACE_BACKUPS, 0, -1)] + [path]
+    spans = []
+    for p in paths:
+        if not os.path.exists(p):
+            continue
+        with open(p, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    spans.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    return spans
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a sorted list."""
+    if not values:
+        return None
+    index = max(0, math.ceil(pct / 100 * len(values)) - 1)
+    return values[index]
+
+
+def summarize(spans, last=None):
+    """
+    Latency per stage name.
+
+    Args:
+        spans: Span records
+        last: Only use the most recent N traces
+
+    Returns:
+        {name: {"count", "p50_ms", "p95_ms", "max_ms"}}
+    """
+    if last:
+        order = list(dict.fromkeys(s["trace"] for s in spans))
+        keep = set(order[-last:])
+        spans = [s for s in spans if s["trace"] in keep]
+
+    by_name = {}
+    for s in spans:
+        by_name.setdefault(s["name"], []).append(s["ms"])
+
+    summary = {}
+    for name, values in sorted(by_name.items()):
+        values.sort()
+        summary[name] = {
+            "count": len(values),
+            "p50_ms": percentile(values, 50),
+            "p95_ms": percentile(values, 95),
+            "max_ms": values[-1],
+        }
+    return summary
+
+
+def format_summary(summary):
+    lines = [f"{'stage':<22}{'count':>7}{'p50 ms':>11}{'p95 ms':>11}{'max ms':>11}"]
+    for name, row in summary.items():
+        lines.append(f"{name:<22}{row['count']:>7}{row['p50_ms']:>11.1f}{row['p95_ms']:>11.1f}{row['max_ms']:>11.1f}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize Atlas turn traces (p50/p95 per stage).")
+    parser.add_argument('path', nargs='?', default=TRACE_FILE, help="Trace file (default: logs/trace.jsonl)")
+    parser.add_argument('--last', type=int, help="Only the most recent N traces")
+    parser.add_argument('--json', action='store_true', help="Print JSON instead of a table")
+    args = parser.parse_args(argv)
+
+    spans = load_spans(args.path)
+    if not spans:
+        print(f"No spans found in {args.path}")
+        return 1
+
+    summary = summarize(spans, args.last)
+    print(json.dumps(summary, indent=2) if args.json else format_summary(summary))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())